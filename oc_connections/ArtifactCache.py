@@ -0,0 +1,376 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Size of block artifacts are downloaded and copied by
+_BLOCK_SIZE = 1048576
+
+# Nexus 2 ETag contains SHA-1 of artifact: "{SHA1{hex}}"
+_ETAG_SHA1 = re.compile(r"\{SHA1\{([0-9a-fA-F]{40})\}\}")
+
+
+@contextmanager
+def _file_lock(path):
+    """
+    Exclusive lock shared by threads and processes, held until the block exits.
+
+    :param path: lock file path, created if absent
+    """
+    with open(path, "a+b") as stream:
+        if fcntl is not None:
+            fcntl.flock(stream.fileno(), fcntl.LOCK_EX)
+        else:
+            stream.seek(0)
+            msvcrt.locking(stream.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(stream.fileno(), fcntl.LOCK_UN)
+            else:
+                stream.seek(0)
+                msvcrt.locking(stream.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _write_atomically(path, data, directory):
+    """
+    Replace file content so readers never see partially written file.
+
+    :param path: file path
+    :param data: bytes
+    :param directory: directory for temporary file, on the same file system as path
+    """
+    descriptor, temporary = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as stream:
+            stream.write(data)
+        os.replace(temporary, path)
+    except Exception:
+        os.unlink(temporary)
+        raise
+
+
+def _expected_sha1(headers):
+    """
+    Get SHA-1 of artifact announced by repository server.
+
+    :param headers: HTTP response headers
+    :returns: lowercase hex digest or None
+    """
+    checksum = headers.get("X-Checksum-Sha1")
+    if checksum:
+        return checksum.lower()
+    match = _ETAG_SHA1.search(headers.get("ETag") or "")
+    return match.group(1).lower() if match else None
+
+
+class ArtifactCache(object):
+    """
+    On-disk cache of artifacts downloaded from Nexus (or Artifactory), shared by threads and processes.
+
+    Artifact data are stored once per content under their SHA-256, GAVs refer to them by index records,
+    so the same artifact in several repositories or under several GAVs takes place once. Records older than
+    'revalidate_after' are checked by conditional request, unchanged artifacts are not downloaded again.
+    Total size is bounded, the least recently used data are evicted. Concurrent downloads of the same GAV
+    are serialized by file locks, so the artifact is downloaded once.
+    """
+
+    def __init__(self, directory, max_size=10737418240, revalidate_after=3600, stale_if_error=True):
+        """
+        Initialize.
+
+        :param directory: cache directory, created if absent
+        :param max_size: maximum size of cached data in bytes
+        :param revalidate_after: seconds after which cached GAV is checked on server, None means never
+            (release artifacts do not change)
+        :param stale_if_error: return cached artifact if server is not available during revalidation
+        """
+        if max_size < 1:
+            raise ArtifactCacheError("max_size must be positive")
+        self.directory = os.path.abspath(directory)
+        self.max_size = max_size
+        self.revalidate_after = revalidate_after
+        self.stale_if_error = stale_if_error
+        for name in ("objects", "index", "locks", "tmp"):
+            os.makedirs(os.path.join(self.directory, name), exist_ok=True)
+        self.__counters = {"hits": 0, "misses": 0, "revalidations": 0, "evictions": 0}
+        self.__counters_lock = threading.Lock()
+
+    def __count(self, name):
+        with self.__counters_lock:
+            self.__counters[name] += 1
+
+    @property
+    def stats(self):
+        """
+        Dictionary of hits, misses, revalidations and evictions counted by this instance
+        """
+        with self.__counters_lock:
+            return dict(self.__counters)
+
+    @property
+    def size(self):
+        """
+        Size of cached data in bytes
+        """
+        return sum(size for path, size, used in self.__objects())
+
+    def __object_path(self, sha256):
+        return os.path.join(self.directory, "objects", sha256[:2], sha256)
+
+    def __objects(self):
+        """
+        List cached data files.
+
+        :returns: list of (path, size, last use time)
+        """
+        objects = []
+        root = os.path.join(self.directory, "objects")
+        for subdirectory in os.listdir(root):
+            for name in os.listdir(os.path.join(root, subdirectory)):
+                path = os.path.join(root, subdirectory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    # evicted by another process
+                    continue
+                objects.append((path, status.st_size, status.st_mtime))
+        return objects
+
+    @staticmethod
+    def key(root, gav, repo=None):
+        """
+        Get cache key of GAV.
+
+        :param root: repository server URL
+        :param gav: GAV string
+        :param repo: repository name, None for default repository of client
+        :returns: hex string
+        """
+        return hashlib.sha256(("%s|%s|%s" % (root.rstrip("/"), repo or "", gav)).encode("utf-8")).hexdigest()
+
+    def __read_record(self, key):
+        try:
+            with open(os.path.join(self.directory, "index", key + ".json"), "r") as stream:
+                return json.load(stream)
+        except (OSError, ValueError):
+            return None
+
+    def __write_record(self, key, record):
+        _write_atomically(os.path.join(self.directory, "index", key + ".json"),
+                          json.dumps(record).encode("utf-8"), os.path.join(self.directory, "tmp"))
+
+    def __download(self, client, gav, repo, record):
+        """
+        Download artifact by conditional request if record is given.
+
+        :param client: oc_cdtapi.NexusAPI.NexusAPI
+        :param gav: GAV string
+        :param repo: repository name or None
+        :param record: index record of cached artifact or None
+        :returns: new index record, the given one if artifact is not modified
+        """
+        headers = {}
+        if record is not None:
+            if record.get("etag"):
+                headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                headers["If-Modified-Since"] = record["last_modified"]
+        response = client.cat(gav, repo=repo, response=True, stream=True, headers=headers or None)
+        if record is not None and response.status_code == 304:
+            response.close()
+            return record
+        sha256 = hashlib.sha256()
+        sha1 = hashlib.sha1()
+        size = 0
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.join(self.directory, "tmp"))
+        try:
+            with os.fdopen(descriptor, "wb") as stream:
+                for block in response.iter_content(_BLOCK_SIZE):
+                    sha256.update(block)
+                    sha1.update(block)
+                    size += len(block)
+                    stream.write(block)
+            expected = _expected_sha1(response.headers)
+            if expected is not None and expected != sha1.hexdigest():
+                raise ArtifactCacheError("Checksum of '%s' does not match: expected %s, got %s" % (
+                    gav, expected, sha1.hexdigest()))
+            path = self.__object_path(sha256.hexdigest())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temporary, path)
+        except Exception:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        finally:
+            response.close()
+        return {"gav": gav, "repo": repo, "sha256": sha256.hexdigest(), "sha1": sha1.hexdigest(), "size": size,
+                "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+
+    def open(self, client, gav, repo=None):
+        """
+        Open cached artifact, downloading or revalidating it if needed.
+
+        :param client: oc_cdtapi.NexusAPI.NexusAPI (not CachedNexusClient)
+        :param gav: GAV string
+        :param repo: repository name, default repository of client if omitted
+        :returns: binary file object, it stays readable even if data are evicted meanwhile
+        """
+        key = ArtifactCache.key(client.root, gav, repo)
+        downloaded = False
+        # GAVs are locked by 256 stripes, so number of lock files is bounded
+        with _file_lock(os.path.join(self.directory, "locks", key[:2] + ".lock")):
+            record = self.__read_record(key)
+            stream = None
+            if record is not None:
+                try:
+                    # data are opened at once, so they can not be evicted before reading
+                    stream = open(self.__object_path(record["sha256"]), "rb")
+                except OSError:
+                    record = None
+            if stream is not None and (self.revalidate_after is None
+                                       or time.time() - record["validated"] < self.revalidate_after):
+                self.__count("hits")
+            else:
+                self.__count("misses" if stream is None else "revalidations")
+                try:
+                    new_record = self.__download(client, gav, repo, record)
+                except Exception:
+                    if stream is None or not self.stale_if_error:
+                        if stream is not None:
+                            stream.close()
+                        raise
+                    # stale data are served, but record stays unvalidated, so the next call revalidates it again
+                    new_record = None
+                if new_record is not None:
+                    if new_record is not record:
+                        downloaded = True
+                        if stream is not None:
+                            stream.close()
+                        stream = open(self.__object_path(new_record["sha256"]), "rb")
+                    record = new_record
+                    record["validated"] = time.time()
+                    self.__write_record(key, record)
+            try:
+                # modification time is the last use time for eviction
+                os.utime(self.__object_path(record["sha256"]), None)
+            except OSError:
+                # evicted meanwhile, opened stream is still readable
+                pass
+        if downloaded:
+            self.evict()
+        return stream
+
+    def evict(self):
+        """
+        Remove the least recently used data until cache fits into max_size.
+        Index records of removed data are replaced on next access of their GAVs.
+
+        :returns: number of removed data files
+        """
+        with _file_lock(os.path.join(self.directory, "locks", "evict.lock")):
+            objects = self.__objects()
+            total = sum(size for path, size, used in objects)
+            removed = 0
+            for path, size, used in sorted(objects, key=lambda item: item[2]):
+                if total <= self.max_size:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError:
+                    # open elsewhere on Windows, try the next one
+                    continue
+                total -= size
+                removed += 1
+                self.__count("evictions")
+        return removed
+
+    def clear(self):
+        """
+        Remove all cached artifacts.
+        """
+        with _file_lock(os.path.join(self.directory, "locks", "evict.lock")):
+            for path, size, used in self.__objects():
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
+def _copy(source, target):
+    """
+    Copy file object content block by block.
+
+    :param source: binary file object
+    :param target: binary file object
+    """
+    while True:
+        block = source.read(_BLOCK_SIZE)
+        if not block:
+            break
+        target.write(block)
+
+
+class CachedNexusClient(object):
+    """
+    NexusAPI wrapper which serves artifact downloads ('cat') from ArtifactCache.
+    Other methods and 'cat' calls asking for HTTP response are passed to the wrapped client,
+    so the wrapper may be used wherever NexusAPI is expected, for example by NexusFS.
+    """
+
+    def __init__(self, client, cache):
+        """
+        Initialize.
+
+        :param client: oc_cdtapi.NexusAPI.NexusAPI
+        :param cache: ArtifactCache
+        """
+        self.client = client
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def cat(self, gav, repo=None, binary=False, response=False, stream=False, encoding=None, enc_errors=None,
+            write_to=None, rest_call=False, **kwargs):
+        """
+        Get artifact data, see NexusAPI.cat.
+
+        :returns: artifact data; None if 'write_to' is given
+        """
+        if response or rest_call or kwargs:
+            return self.client.cat(gav, repo=repo, binary=binary, response=response, stream=stream,
+                                   encoding=encoding, enc_errors=enc_errors, write_to=write_to,
+                                   rest_call=rest_call, **kwargs)
+        with self.cache.open(self.client, gav, repo) as source:
+            if write_to is None:
+                data = source.read()
+                if binary:
+                    return data
+                return data.decode(encoding or self.client.codepage, enc_errors or self.client.codepage_errors
+                                   or "strict")
+            if isinstance(write_to, str):
+                with open(write_to, "wb") as target:
+                    _copy(source, target)
+            else:
+                _copy(source, write_to)
+                write_to.flush()
+        return None
+
+
+class ArtifactCacheError(Exception):
+    """
+    ArtifactCache exception
+    """
+    pass
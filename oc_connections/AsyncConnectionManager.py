@@ -0,0 +1,148 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from .ConnectionManager import ConnectionManager, ConnectionManagerError, _extract_host_port
+
+# Optional asyncio-native client libraries
+_NATIVE_MODULES = ("psycopg", "aioftp", "aiosmtplib")
+
+
+def _import_native(name):
+    """
+    Import optional asyncio-native client library.
+
+    :param name: module name
+    :returns: module or None if it is not installed
+    """
+    try:
+        return import_module(name)
+    except ImportError:
+        return None
+
+
+class AsyncConnectionManager(object):
+    """
+    asyncio counterpart of ConnectionManager.
+
+    Clients are asyncio-native if corresponding library is installed (psycopg 3, aioftp, aiosmtplib).
+    Otherwise blocking clients of ConnectionManager are created in a bounded thread pool, so connects do not stall
+    the event loop and their number running at once does not exceed 'max_workers'.
+    Credentials are read in the thread pool too, since credential backends may do network or file I/O.
+    """
+
+    def __init__(self, credential_manager=None, connection_manager=None, max_workers=16, native=True):
+        """
+        Initialize.
+
+        :param credential_manager: credential manager, ignored if connection_manager is given
+        :param connection_manager: ConnectionManager used for credentials, URL parsing and blocking clients
+        :param max_workers: maximum number of blocking connects running at once
+        :param native: use asyncio-native client libraries if they are installed
+        """
+        if connection_manager:
+            self.__connection_manager = connection_manager
+        else:
+            self.__connection_manager = ConnectionManager(credential_manager)
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers)
+        # resolved once, failed imports scan sys.path and must not be repeated on the event loop
+        self.__natives = dict((name, _import_native(name) if native else None) for name in _NATIVE_MODULES)
+
+    @property
+    def connection_manager(self):
+        """
+        ConnectionManager used for blocking clients
+        """
+        return self.__connection_manager
+
+    def __get_native(self, name):
+        return self.__natives[name]
+
+    async def run(self, function, *args, **kwargs):
+        """
+        Run blocking callable in the manager's thread pool.
+        Example: await manager.run(manager.connection_manager.get_mvn_client, "MVN")
+
+        :param function: callable
+        :param args: positional arguments
+        :param kwargs: keyword arguments
+        :returns: callable result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, functools.partial(function, *args, **kwargs))
+
+    async def get_psql_client(self, resource, **kwargs):
+        """
+        Get PostgreSQL connection.
+
+        :param resource: resource name
+        :param kwargs: additional parameters, 'readonly=True' routes connection to a replica of multi-host resource
+        :returns: psycopg.AsyncConnection if psycopg 3 is installed, psycopg2 connection otherwise
+        """
+        psycopg = self.__get_native("psycopg")
+        if psycopg is None or kwargs.get("readonly"):
+            # routing of read-only connections to replicas is done by ConnectionManager
+            return await self.run(self.__connection_manager.get_psql_client, resource, **kwargs)
+        kwargs.pop("readonly", None)
+        url, user, password = await self.run(self.__connection_manager._get_connection_credentials, resource)
+        host, port, dbname, options = ConnectionManager.parse_psql_url(url)
+        if "," in host:
+            # libpq tries listed hosts in order until it finds the primary one
+            kwargs.setdefault("target_session_attrs", "read-write")
+        return await psycopg.AsyncConnection.connect(user=user, password=password, host=host, port=port,
+                                                     dbname=dbname, options="-c " + options if options else "",
+                                                     **kwargs)
+
+    async def get_ftp_client(self, resource, **kwargs):
+        """
+        Get FTP client.
+
+        :param resource: resource name
+        :param kwargs: additional parameters
+        :returns: logged in aioftp.Client if aioftp is installed, ftplib.FTP otherwise
+        """
+        aioftp = self.__get_native("aioftp")
+        if aioftp is None:
+            return await self.run(self.__connection_manager.get_ftp_client, resource, **kwargs)
+        url, user, password = await self.run(self.__connection_manager._get_connection_credentials, resource)
+        host, port = _extract_host_port(url)
+        client = aioftp.Client(**kwargs)
+        await client.connect(host, port)
+        await client.login(user, password)
+        return client
+
+    async def get_smtp_client(self, resource, **kwargs):
+        """
+        Get SMTP client. Note: Authorization is performed only if USER credential is set.
+
+        :param resource: resource name
+        :param kwargs: additional parameters
+        :returns: connected aiosmtplib.SMTP if aiosmtplib is installed, smtplib.SMTP otherwise
+        """
+        aiosmtplib = self.__get_native("aiosmtplib")
+        if aiosmtplib is None:
+            return await self.run(self.__connection_manager.get_smtp_client, resource, **kwargs)
+        url, user, password = await self.run(self.__connection_manager._get_connection_credentials, resource, False)
+        if not url:
+            raise ConnectionManagerError("URL credential is not set for '%s' resource" % resource)
+        host, port = _extract_host_port(url)
+        if user and not password:
+            raise ConnectionManagerError("PASSWORD credential is not set for '%s' resource" % resource)
+        client = aiosmtplib.SMTP(hostname=host, port=port, **kwargs)
+        await client.connect()
+        if user:
+            await client.login(user, password)
+        return client
+
+    def close(self):
+        """
+        Shut down thread pool. Running connects are not interrupted.
+        """
+        self.__executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,295 @@
+import argparse
+import gc
+import socketserver
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from .ConnectionManager import ConnectionManager, _close_ftp_session, _extract_host_port
+from .ConnectionPool import _close_connection
+from .CredentialManager import CredentialManager
+from .SmtpSessionPool import _close_smtp_session
+
+
+class _LineProtocolHandler(socketserver.StreamRequestHandler):
+    """
+    Answers line based protocol (SMTP, FTP control connection) from the server's 'greeting' and 'replies'
+    """
+
+    def handle(self):
+        self.wfile.write(self.server.greeting)
+        for line in self.rfile:
+            command = line.split(b" ", 1)[0].strip().upper()
+            reply = self.server.replies.get(command, self.server.default_reply)
+            self.wfile.write(reply)
+            if command == b"QUIT":
+                break
+
+
+class _HttpHandler(BaseHTTPRequestHandler):
+    """
+    Answers every request with empty JSON object
+    """
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, Nagle's algorithm would delay kept alive responses
+    disable_nagle_algorithm = True
+
+    def __reply(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_GET = do_HEAD = do_POST = do_PUT = __reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StandInServer(object):
+    """
+    Local server which answers just enough of a protocol for connecting and logging in
+    """
+
+    SMTP = {
+        "greeting": b"220 localhost ESMTP stand-in\r\n",
+        "replies": {
+            b"EHLO": b"250-localhost\r\n250 AUTH PLAIN\r\n",
+            b"HELO": b"250 localhost\r\n",
+            b"AUTH": b"235 Authentication successful\r\n",
+            b"NOOP": b"250 OK\r\n",
+            b"RSET": b"250 OK\r\n",
+            b"QUIT": b"221 Bye\r\n",
+        },
+        "default_reply": b"502 Command not implemented\r\n",
+    }
+
+    FTP = {
+        "greeting": b"220 FTP stand-in\r\n",
+        "replies": {
+            b"USER": b"331 Password required\r\n",
+            b"PASS": b"230 Logged in\r\n",
+            b"NOOP": b"200 OK\r\n",
+            b"TYPE": b"200 OK\r\n",
+            b"QUIT": b"221 Bye\r\n",
+        },
+        "default_reply": b"502 Command not implemented\r\n",
+    }
+
+    def __init__(self, protocol=None):
+        """
+        Initialize.
+
+        :param protocol: StandInServer.SMTP, StandInServer.FTP or None for HTTP server
+        """
+        if protocol is None:
+            self.__server = _ThreadingHTTPServer(("127.0.0.1", 0), _HttpHandler)
+        else:
+            self.__server = _ThreadingTCPServer(("127.0.0.1", 0), _LineProtocolHandler)
+            self.__server.greeting = protocol["greeting"]
+            self.__server.replies = protocol["replies"]
+            self.__server.default_reply = protocol["default_reply"]
+        self.__thread = None
+
+    @property
+    def address(self):
+        """
+        host:port string
+        """
+        return "%s:%d" % self.__server.server_address[:2]
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name="StandInServer")
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class BenchmarkResult(object):
+    """
+    Measurements of single benchmark
+    """
+
+    def __init__(self, name, latencies, seconds, memory_per_call=None):
+        """
+        Initialize.
+
+        :param name: benchmark name
+        :param latencies: seconds spent by each call
+        :param seconds: wall clock time of all calls
+        :param memory_per_call: bytes allocated and kept per call (for example, per open client) or None
+        """
+        self.name = name
+        self.latencies = sorted(latencies)
+        self.seconds = seconds
+        self.memory_per_call = memory_per_call
+
+    def percentile(self, percent):
+        """
+        Get latency percentile.
+
+        :param percent: percentile, from 0 to 100
+        :returns: seconds
+        """
+        if not self.latencies:
+            return 0.0
+        index = min(len(self.latencies) - 1, int(round(percent / 100.0 * (len(self.latencies) - 1))))
+        return self.latencies[index]
+
+    @property
+    def calls_per_second(self):
+        return len(self.latencies) / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return "BenchmarkResult(%r, calls=%d, p50=%.6f, p99=%.6f)" % (
+            self.name, len(self.latencies), self.percentile(50), self.percentile(99))
+
+
+def measure(name, call, iterations=100, memory_samples=0, release=None):
+    """
+    Run benchmark.
+
+    :param name: benchmark name
+    :param call: callable without arguments to be measured
+    :param iterations: number of measured calls
+    :param memory_samples: number of call results kept at once for memory measurement, 0 disables it
+    :param release: callable(result) finalizing call result (for example, closing client)
+    :returns: BenchmarkResult
+    """
+    # the first call is not measured: it imports backend libraries
+    if release is not None:
+        release(call())
+    else:
+        call()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        value = call()
+        latencies.append(time.perf_counter() - call_start)
+        if release is not None:
+            release(value)
+    seconds = time.perf_counter() - start
+    memory_per_call = None
+    if memory_samples:
+        gc.collect()
+        values = []
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            for _ in range(memory_samples):
+                values.append(call())
+            memory_per_call = (tracemalloc.get_traced_memory()[0] - baseline) / float(memory_samples)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        if release is not None:
+            for value in values:
+                release(value)
+    return BenchmarkResult(name, latencies, seconds, memory_per_call)
+
+
+def run(iterations=100, memory_samples=20, psql_resource=None):
+    """
+    Run benchmarks of credential lookup, URL parsing and client factories against local stand-in servers.
+
+    :param iterations: number of measured calls of each benchmark
+    :param memory_samples: number of clients kept open at once for memory measurement
+    :param psql_resource: resource of real PostgreSQL server to be benchmarked, there is no stand-in for it
+    :returns: list of BenchmarkResult
+    """
+    credential_manager = CredentialManager()
+    connection_manager = ConnectionManager(credential_manager)
+    results = [
+        measure("credentials", lambda: credential_manager.get_credentials("BENCH_SMTP", ["URL", "USER", "PASSWORD"]),
+                iterations * 10),
+        measure("parse_psql_url", lambda: ConnectionManager.parse_psql_url("127.0.0.1:5432/db?search_path=bench"),
+                iterations * 10),
+        measure("extract_host_port", lambda: _extract_host_port("ftp://127.0.0.1:21"), iterations * 10),
+    ]
+    with StandInServer(StandInServer.SMTP) as smtp, StandInServer(StandInServer.FTP) as ftp, \
+            StandInServer() as http:
+        for resource, server in [("BENCH_SMTP", smtp), ("BENCH_FTP", ftp), ("BENCH_HTTP", http)]:
+            url = server.address if server is not http else "http://" + server.address
+            credential_manager.override_credential(resource, "URL", url)
+            credential_manager.override_credential(resource, "USER", "bench")
+            credential_manager.override_credential(resource, "PASSWORD", "bench")
+        results.append(measure("get_smtp_client", lambda: connection_manager.get_smtp_client("BENCH_SMTP"),
+                               iterations, memory_samples, _close_smtp_session))
+        results.append(measure("get_ftp_client", lambda: connection_manager.get_ftp_client("BENCH_FTP"),
+                               iterations, memory_samples, _close_ftp_session))
+        try:
+            for kind in ["mvn", "jenkins"]:
+                factory = getattr(connection_manager, "get_%s_client" % kind)
+                # HTTP clients are not closed: closing client session closes the shared connection pool
+                # mounted into it, and '+request' benchmarks must measure reuse of its connections
+                results.append(measure("get_%s_client" % kind, lambda: factory("BENCH_HTTP"),
+                                       iterations, memory_samples))
+
+                def request():
+                    client = factory("BENCH_HTTP")
+                    client.web.get(client.root)
+                    return client
+
+                results.append(measure("get_%s_client+request" % kind, request, iterations))
+        finally:
+            connection_manager.close_pools()
+    if psql_resource:
+        results.append(measure("get_psql_client", lambda: connection_manager.get_psql_client(psql_resource),
+                               iterations, memory_samples, _close_connection))
+    return results
+
+
+def format_results(results):
+    """
+    Format benchmark results as a table.
+
+    :param results: list of BenchmarkResult
+    :returns: string
+    """
+    lines = ["%-28s %8s %10s %10s %10s %12s %12s" % (
+        "benchmark", "calls", "p50, ms", "p90, ms", "p99, ms", "calls/sec", "KiB/client")]
+    for result in results:
+        memory = "-" if result.memory_per_call is None else "%.1f" % (result.memory_per_call / 1024.0)
+        lines.append("%-28s %8d %10.3f %10.3f %10.3f %12.1f %12s" % (
+            result.name, len(result.latencies), result.percentile(50) * 1000, result.percentile(90) * 1000,
+            result.percentile(99) * 1000, result.calls_per_second, memory))
+    return "\n".join(lines)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark ConnectionManager factories against local stand-in servers")
+    parser.add_argument("--iterations", type=int, default=100, help="number of measured calls of each benchmark")
+    parser.add_argument("--memory-samples", type=int, default=20, help="number of clients used for memory measurement")
+    parser.add_argument("--psql-resource", help="resource of real PostgreSQL server to benchmark 'get_psql_client'")
+    options = parser.parse_args(args)
+    print(format_results(run(options.iterations, options.memory_samples, options.psql_resource)))
+
+
+if __name__ == "__main__":
+    main()
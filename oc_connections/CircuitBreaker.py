@@ -0,0 +1,199 @@
+import threading
+import time
+
+
+class CircuitBreaker(object):
+    """
+    Thread-safe circuit breaker of single resource.
+
+    After 'failure_threshold' consecutive failures the circuit is open and calls fail fast with CircuitOpenError.
+    When 'reset_timeout' seconds are over, the circuit is half-open: a limited number of trial calls is let through,
+    the first success closes the circuit and a failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, half_open_max_calls=1):
+        """
+        Initialize.
+
+        :param failure_threshold: number of consecutive failures which opens the circuit
+        :param reset_timeout: seconds after which open circuit lets trial calls through
+        :param half_open_max_calls: number of concurrent trial calls in half-open state
+        """
+        if failure_threshold < 1:
+            raise CircuitBreakerError("failure_threshold must be positive")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failures = 0
+        self.last_error = None
+        self.__opened_at = None
+        self.__trial_calls = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.__lock:
+            return self.__get_state(time.monotonic())
+
+    def __get_state(self, now):
+        if self.__opened_at is None:
+            return CircuitBreaker.CLOSED
+        if now - self.__opened_at >= self.reset_timeout:
+            return CircuitBreaker.HALF_OPEN
+        return CircuitBreaker.OPEN
+
+    def before_call(self):
+        """
+        Ask for permission to call the resource. Every permitted call must be finished by
+        'record_success', 'record_failure' or 'cancel'.
+        """
+        with self.__lock:
+            state = self.__get_state(time.monotonic())
+            if state == CircuitBreaker.CLOSED:
+                return
+            if state == CircuitBreaker.HALF_OPEN and self.__trial_calls < self.half_open_max_calls:
+                self.__trial_calls += 1
+                return
+            error = self.last_error
+        raise CircuitOpenError("Circuit is open after %d failures, last one: %r" % (self.failures, error))
+
+    def record_success(self, probe=False):
+        """
+        Close the circuit after successful call.
+
+        :param probe: True if call was made by health checker without 'before_call'
+        """
+        with self.__lock:
+            if not probe and self.__opened_at is not None:
+                self.__trial_calls = max(0, self.__trial_calls - 1)
+            self.failures = 0
+            self.last_error = None
+            self.__opened_at = None
+
+    def record_failure(self, error=None, probe=False):
+        """
+        Count failed call, the circuit is opened when threshold is reached or trial call failed.
+
+        :param error: exception raised by the call
+        :param probe: True if call was made by health checker without 'before_call'
+        """
+        with self.__lock:
+            if not probe and self.__opened_at is not None:
+                self.__trial_calls = max(0, self.__trial_calls - 1)
+            self.failures += 1
+            self.last_error = error
+            if self.__opened_at is not None or self.failures >= self.failure_threshold:
+                self.__opened_at = time.monotonic()
+
+    def cancel(self):
+        """
+        Finish call which tells nothing about resource health (for example, it failed because of configuration).
+        """
+        with self.__lock:
+            if self.__opened_at is not None:
+                self.__trial_calls = max(0, self.__trial_calls - 1)
+
+    def reset(self):
+        """
+        Close the circuit and forget failures.
+        """
+        with self.__lock:
+            self.failures = 0
+            self.last_error = None
+            self.__opened_at = None
+            self.__trial_calls = 0
+
+    def __repr__(self):
+        return "CircuitBreaker(state=%r, failures=%d)" % (self.state, self.failures)
+
+
+class HealthChecker(object):
+    """
+    Background thread which periodically probes resources with 'ConnectionManager.probe',
+    so circuit breakers of broken resources are opened and ones of recovered resources are closed
+    without making callers wait for connect timeouts.
+    """
+
+    def __init__(self, connection_manager, resources, interval=10, timeout=5):
+        """
+        Initialize.
+
+        :param connection_manager: ConnectionManager
+        :param resources: dictionary of resource names and client kinds or list of (resource, kind) pairs
+        :param interval: seconds between rounds of probes
+        :param timeout: connect timeout of single probe, seconds
+        """
+        self.connection_manager = connection_manager
+        self.resources = list(resources.items()) if isinstance(resources, dict) else list(resources)
+        self.interval = interval
+        self.timeout = timeout
+        # resource: exception of the last probe or None if it succeeded
+        self.results = {}
+        self.__stop = None
+        self.__thread = None
+
+    def check(self):
+        """
+        Probe all resources once.
+
+        :returns: dictionary of resource names and exceptions (None for healthy resources)
+        """
+        results = {}
+        for resource, kind in self.resources:
+            try:
+                self.connection_manager.probe(resource, kind, self.timeout)
+                results[resource] = None
+            except Exception as error:
+                results[resource] = error
+        self.results = results
+        return results
+
+    def start(self):
+        """
+        Start probing in daemon thread.
+        """
+        if self.__thread is not None:
+            return self
+        stop = self.__stop = threading.Event()
+
+        def run():
+            while not stop.is_set():
+                self.check()
+                stop.wait(self.interval)
+
+        self.__thread = threading.Thread(target=run, name="HealthChecker")
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop probing. Probe being run is not interrupted.
+        """
+        if self.__thread is None:
+            return
+        self.__stop.set()
+        self.__thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class CircuitBreakerError(Exception):
+    """
+    CircuitBreaker exception
+    """
+    pass
+
+
+class CircuitOpenError(CircuitBreakerError):
+    """
+    Resource is known to be unavailable, call was rejected without connecting
+    """
+    pass
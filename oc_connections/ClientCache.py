@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def _freeze(kwargs):
+    """
+    Converts keyword arguments to hashable cache key part.
+
+    :param kwargs: keyword arguments
+    :returns: hashable representation or None if some value is not hashable
+    """
+    key = tuple(sorted(kwargs.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class ClientCache(object):
+    """
+    Thread-safe LRU cache of clients with time-to-live.
+
+    Entries are keyed by client kind, resource name and client parameters, so they may be invalidated per resource.
+    """
+
+    def __init__(self, ttl=300, max_size=128):
+        """
+        Initialize.
+
+        :param ttl: seconds during which cached client is reused, None means forever
+        :param max_size: maximum number of cached clients, least recently used ones are dropped first
+        """
+        if max_size < 1:
+            raise ClientCacheError("max_size must be positive")
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def stats(self):
+        """
+        Cache statistics
+
+        :returns: dictionary with 'hits', 'misses' and 'size' keys
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.__entries)}
+
+    def get(self, kind, resource, kwargs, create):
+        """
+        Get cached client or create and cache a new one.
+
+        :param kind: client kind
+        :param resource: resource name
+        :param kwargs: client parameters, clients with unhashable parameters are not cached
+        :param create: callable without arguments which creates client
+        :returns: client
+        """
+        frozen = _freeze(kwargs)
+        key = (resource, kind, frozen)
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(key) if frozen is not None else None
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        client = create()
+        if frozen is None:
+            return client
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.__lock:
+            self.__entries[key] = (client, expires)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+        return client
+
+    def invalidate(self, resource):
+        """
+        Drop cached clients of resource.
+
+        :param resource: resource name
+        :returns: number of dropped clients
+        """
+        with self.__lock:
+            keys = [key for key in self.__entries if key[0] == resource]
+            for key in keys:
+                del self.__entries[key]
+        return len(keys)
+
+    def clear(self):
+        """
+        Drop all cached clients and reset statistics.
+        """
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class ClientCacheError(Exception):
+    """
+    ClientCache exception
+    """
+    pass
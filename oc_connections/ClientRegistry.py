@@ -0,0 +1,228 @@
+import os
+import sys
+import threading
+import time
+import traceback
+import warnings
+
+from .ConnectionPool import _close_connection
+
+# Frames of this package are not interesting in acquisition stacks
+_PACKAGE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+# Number of the innermost caller frames kept in acquisition stack
+_STACK_DEPTH = 10
+
+# Number of records after which closed clients are pruned on 'track'
+_PRUNE_THRESHOLD = 64
+
+
+def _is_client_closed(client):
+    """
+    Tells if client was closed by its owner.
+
+    :param client: client object
+    :returns: True for closed psycopg2 connections, FS objects and socket based clients (FTP, SMTP, SMB)
+    """
+    closed = getattr(client, "closed", None)
+    if isinstance(closed, (bool, int)):
+        return bool(closed)
+    isclosed = getattr(client, "isclosed", None)
+    if callable(isclosed):
+        try:
+            return bool(isclosed())
+        except Exception:
+            return False
+    if hasattr(client, "sock"):
+        return client.sock is None
+    return False
+
+
+def _acquisition_stack():
+    """
+    Get the innermost frames of the caller stack without frames of this package.
+    Source lines are not read, so the call is cheap; they are read when stack is formatted.
+
+    :returns: traceback.StackSummary, the outermost frame first
+    """
+    frames = []
+    for frame, line in traceback.walk_stack(sys._getframe(1)):
+        if os.path.dirname(os.path.abspath(frame.f_code.co_filename)) != _PACKAGE_DIRECTORY:
+            frames.append((frame, line))
+            if len(frames) == _STACK_DEPTH:
+                break
+    summary = traceback.StackSummary.extract(frames, lookup_lines=False)
+    summary.reverse()
+    return summary
+
+
+class TrackedClient(object):
+    """
+    Registry record of open client
+    """
+    __slots__ = ("kind", "resource", "client", "close", "acquired", "thread", "_frames")
+
+    def __init__(self, kind, resource, client, close, stack):
+        """
+        Initialize.
+
+        :param kind: client kind
+        :param resource: resource name
+        :param client: client object
+        :param close: callable(client) which closes client
+        :param stack: traceback.StackSummary where client was acquired
+        """
+        self.kind = kind
+        self.resource = resource
+        self.client = client
+        self.close = close
+        self.acquired = time.monotonic()
+        self.thread = threading.current_thread().name
+        self._frames = stack
+
+    @property
+    def stack(self):
+        """
+        List of formatted frames where client was acquired
+        """
+        return self._frames.format()
+
+    @property
+    def age(self):
+        """
+        Seconds since client was acquired
+        """
+        return time.monotonic() - self.acquired
+
+    def format(self):
+        """
+        Describe client with its acquisition stack.
+
+        :returns: string
+        """
+        return "%s client of '%s' resource is open for %.1f seconds, acquired in thread '%s' at:\n%s" % (
+            self.kind, self.resource, self.age, self.thread, "".join(self.stack).rstrip())
+
+    def __repr__(self):
+        return "TrackedClient(%r, %r, age=%.1f, thread=%r)" % (self.kind, self.resource, self.age, self.thread)
+
+
+class ClientRegistry(object):
+    """
+    Thread-safe registry of open clients, used for closing them at once and finding leaked ones.
+
+    Clients closed by their owners are dropped from the registry on 'clients' call,
+    and by 'track' when the registry has grown twice since the last pruning.
+    """
+
+    def __init__(self):
+        # id(client): TrackedClient
+        self.__clients = {}
+        self.__lock = threading.Lock()
+        # closed clients are pruned when registry grows twice since the last pruning, so 'track' is O(1) amortized
+        self.__prune_at = _PRUNE_THRESHOLD
+
+    def __len__(self):
+        return len(self.__clients)
+
+    def track(self, kind, resource, client, close=None):
+        """
+        Register open client. Client which is registered already keeps its record.
+
+        :param kind: client kind
+        :param resource: resource name
+        :param client: client object
+        :param close: callable(client) which closes client, 'client.close()' is used by default
+        :returns: TrackedClient
+        """
+        if len(self.__clients) >= self.__prune_at:
+            self.prune()
+        with self.__lock:
+            record = self.__clients.get(id(client))
+            if record is None or record.client is not client:
+                record = self.__clients[id(client)] = TrackedClient(kind, resource, client,
+                                                                     close or _close_connection,
+                                                                     _acquisition_stack())
+        return record
+
+    def untrack(self, client):
+        """
+        Forget client without closing it.
+
+        :param client: client object
+        :returns: TrackedClient or None if client was not registered
+        """
+        with self.__lock:
+            record = self.__clients.get(id(client))
+            if record is None or record.client is not client:
+                return None
+            return self.__clients.pop(id(client))
+
+    def close(self, client):
+        """
+        Close client and forget it.
+
+        :param client: client object
+        :returns: True if client was registered
+        """
+        record = self.untrack(client)
+        if record is None:
+            return False
+        record.close(client)
+        return True
+
+    def close_all(self):
+        """
+        Close all registered clients. Errors of closing are ignored, so every client gets its chance.
+
+        :returns: number of closed clients
+        """
+        with self.__lock:
+            records = list(self.__clients.values())
+            self.__clients.clear()
+        for record in records:
+            try:
+                record.close(record.client)
+            except Exception:
+                # client is dropped anyway
+                pass
+        return len(records)
+
+    def prune(self):
+        """
+        Drop clients closed by their owners.
+
+        :returns: number of dropped clients
+        """
+        with self.__lock:
+            closed = [key for key, record in self.__clients.items() if _is_client_closed(record.client)]
+            for key in closed:
+                del self.__clients[key]
+            self.__prune_at = max(_PRUNE_THRESHOLD, len(self.__clients) * 2)
+        return len(closed)
+
+    def clients(self, older_than=None):
+        """
+        Get open clients.
+
+        :param older_than: seconds, only clients acquired earlier are returned if given
+        :returns: list of TrackedClient, the oldest first
+        """
+        self.prune()
+        with self.__lock:
+            records = list(self.__clients.values())
+        if older_than is not None:
+            records = [record for record in records if record.age >= older_than]
+        return sorted(records, key=lambda record: record.acquired)
+
+    def check_leaks(self, older_than=300):
+        """
+        Report clients held for too long with ResourceWarning containing their acquisition stacks.
+
+        :param older_than: seconds after which open client is considered leaked
+        :returns: list of TrackedClient
+        """
+        records = self.clients(older_than)
+        for record in records:
+            warnings.warn(record.format(), ResourceWarning, 2)
+        return records
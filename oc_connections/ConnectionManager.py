@@ -9,23 +9,132 @@ if version_info.major == 3:
     import urllib.parse as urlparse
 
 import warnings
-from ftplib import FTP
-from smtplib import SMTP
-import psycopg2
-import pysvn
-from functools import wraps
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from importlib import import_module
+from functools import wraps, lru_cache
 
 if version_info.major == 2:
     from .ExtendedSMBClient import ExtendedSMBClient
 
-from oc_cdtapi.NexusAPI import NexusAPI
-from oc_cdtapi.JenkinsAPI import Jenkins
-from oc_pyfs.NexusFS import NexusFS
-from oc_pyfs.SvnFS import SvnFS
-from fs.ftpfs import FTPFS
-from smb.SMBConnection import SMBConnection
-
 from .CredentialManager import CredentialManager
+from .ConnectionPool import ConnectionPool, _close_connection
+from .SmtpSessionPool import SmtpSessionPool, _close_smtp_session
+from .SvnClientPool import SvnClientPool, _svn_fs_client
+from .SvnBatch import SvnBatch
+from .SmbFileClient import SmbFileClient
+from .FtpTransfer import FtpTransfer
+from .CircuitBreaker import CircuitBreaker
+from .ClientRegistry import ClientRegistry
+from .PsqlHostRouter import PsqlHostRouter
+from .PsqlStream import PsqlStream
+from .PsqlLoader import PsqlLoader
+from .ArtifactCache import CachedNexusClient
+
+# Client kinds which are served from ClientCache if it is enabled
+_CACHED_KINDS = ("mvn", "svn", "jenkins")
+
+# Client kinds without close lifecycle (HTTP API objects, pysvn clients), they are not registered by client tracking
+_UNTRACKED_KINDS = ("mvn", "svn", "jenkins")
+
+# Connect timeout of single host of multi-host PostgreSQL resource, seconds
+_PSQL_FAILOVER_TIMEOUT = 5
+
+# Seconds to wait for each resource during warm-up, unless given per resource
+_WARM_UP_TIMEOUT = 30
+
+# Samba direct TCP port
+_SMB_PORT = 445
+
+# Number of parsed URLs kept by endpoint cache
+_ENDPOINT_CACHE_SIZE = 1024
+
+# Endpoint kind of resource URL for every client kind
+_ENDPOINT_KINDS = {
+    "psql": "psql",
+    "smb": "smb",
+    "smb_fs": "smb",
+    "ftp": "host",
+    "ftp_fs": "host",
+    "smtp": "host",
+    "mvn": "url",
+    "mvn_fs": "url",
+    "jenkins": "url",
+    "svn": "url",
+    "svn_fs": "url",
+}
+
+# Backend libraries are heavy, so they are imported on first use only.
+# Name: (module, attribute or None for module itself)
+_LAZY_IMPORTS = {
+    "FTP": ("ftplib", "FTP"),
+    "SMTP": ("smtplib", "SMTP"),
+    "psycopg2": ("psycopg2", None),
+    "pysvn": ("pysvn", None),
+    "NexusAPI": ("oc_cdtapi.NexusAPI", "NexusAPI"),
+    "Jenkins": ("oc_cdtapi.JenkinsAPI", "Jenkins"),
+    "NexusFS": ("oc_pyfs.NexusFS", "NexusFS"),
+    "SvnFS": ("oc_pyfs.SvnFS", "SvnFS"),
+    "FTPFS": ("fs.ftpfs", "FTPFS"),
+    "SMBConnection": ("smb.SMBConnection", "SMBConnection"),
+    "HTTPAdapter": ("requests.adapters", "HTTPAdapter"),
+    "Retry": ("urllib3.util.retry", "Retry"),
+}
+
+# Defaults of shared HTTP connection pools, retry policy is the same as NexusAPI and Jenkins clients use by themselves
+_HTTP_POLICY = {
+    "pool_maxsize": 10,
+    "max_retries": 2,
+    "backoff_factor": 0,
+    "status_forcelist": (401,),
+    "allowed_methods": ("HEAD", "GET", "PUT", "DELETE", "OPTIONS", "POST"),
+    "keep_alive": True,
+}
+
+
+def _backend(name):
+    """
+    Get backend library object, importing it on first call. Imported object is stored in module globals,
+    so it may be replaced (for example, by 'unittest.mock.patch') as a regular module attribute.
+
+    :param name: name from _LAZY_IMPORTS
+    :returns: module or class
+    """
+    try:
+        return globals()[name]
+    except KeyError:
+        pass
+    module_name, attribute = _LAZY_IMPORTS[name]
+    value = import_module(module_name)
+    if attribute:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        return _backend(name)
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+
+def _instrumented(kind):
+    """
+    Reports timing and failure of client factory call to observers of ConnectionManager
+    and guards it with circuit breaker of resource. Created client is registered if client tracking is on.
+
+    :param kind: client kind
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapped(self, resource, *args, **kwargs):
+            if not self._observers and not self._circuit_breaking and not self._tracking:
+                return func(self, resource, *args, **kwargs)
+            return self._call_client(kind, resource, lambda: func(self, resource, *args, **kwargs))
+        return wrapped
+    return decorator
 
 
 def _deprecated(replacement):
@@ -48,75 +157,489 @@ class ConnectionManager(object):
     Factory which generates clients to external systems (Nexus, SVN and e.c.)
     """
 
-    if version_info.major == 2:
-        @staticmethod
-        def parse_smb_user(user):
-            """
-            Parses Samba user string.
+    @staticmethod
+    def parse_smb_user(user):
+        """
+        Parses Samba user string.
 
-            :param user: user string, which must determine domain and user name
-            :returns: domain, user name
-            """
-            parts = user.split( '/', 1)
-            if len(parts) < 2:
-                raise ConnectionManagerError("Invalid smb user given: domain and user name are required")
-            return parts[0], parts[1]
+        :param user: user string, which must determine domain and user name
+        :returns: domain, user name
+        """
+        parts = user.split( '/', 1)
+        if len(parts) < 2:
+            raise ConnectionManagerError("Invalid smb user given: domain and user name are required")
+        return parts[0], parts[1]
 
-        @staticmethod
-        def parse_smb_url(url):
-            """
-            Parses Samba connection string.
-            
-            :param url: connection string, which must determine host, share and may determine path
-            :returns: host, share, path
-            """
-            parts = url.split("//", 1)[1].split('/', 2)
-            parts_number = len(parts)
-            if parts_number < 2:
-                raise ConnectionManagerError("Invalid smb url given: host and share are required")
-            elif parts_number == 2:
-                parts.append('')
-            return parts[0], parts[1], parts[2]
+    @staticmethod
+    def parse_smb_url(url):
+        """
+        Parses Samba connection string.
+        
+        :param url: connection string, which must determine host, share and may determine path
+        :returns: host, share, path
+        """
+        endpoint = _parse_endpoint(url, "smb")
+        share, path = endpoint.path.split('/', 1)
+        return endpoint.host, share, path
 
     @staticmethod
     def parse_psql_url(url):
         """
-        Parses PostgreSQL connection string.
+        Parses PostgreSQL connection string. Several comma separated 'host:port' pairs may be given
+        (for example, 'primary:5432,replica:5432/db'), they are returned as comma separated strings understood by libpq.
         
         :param url: connection string, which must determine host, port, database name and may determine options
         :returns: hosts, port, database name, options
         """
-        if not re.match("(.*?:)?//", url):
-            url = "//" + url
-        parse_result = urlparse.urlparse(url)
-        host = parse_result.hostname
-        port = parse_result.port
-        dbname = parse_result.path.strip('/')
-        options = parse_result.query
-        if not all([host, port, dbname]):
-            raise ConnectionManagerError("Invalid psql url given: host, port and dbname are required")
-        return host, port, dbname, options
+        endpoint = _parse_endpoint(url, "psql")
+        if len(endpoint.hosts) > 1:
+            return (",".join(host for host, port in endpoint.hosts),
+                    ",".join(str(port) for host, port in endpoint.hosts), endpoint.path, endpoint.options)
+        return endpoint.host, endpoint.port, endpoint.path, endpoint.options
+
+    @staticmethod
+    def parse_endpoint(url, kind="url"):
+        """
+        Parses and validates connection string. Parsed strings are cached, so repeated calls are cheap.
+
+        :param url: connection string
+        :param kind: 'psql' (host, port and database are required), 'smb' (host and share are required),
+            'host' (host and port are required) or 'url' (scheme and host are required)
+        :returns: Endpoint
+        """
+        return _parse_endpoint(url, kind)
+
+    @staticmethod
+    def parse_endpoints(urls, kind="url"):
+        """
+        Parses and validates many connection strings at once, invalid ones do not stop parsing.
+
+        :param urls: iterable of connection strings
+        :param kind: endpoint kind, see 'parse_endpoint'
+        :returns: list of Endpoint or ConnectionManagerError (for invalid strings) in order of urls
+        """
+        result = []
+        for url in urls:
+            try:
+                result.append(_parse_endpoint(url, kind))
+            except ConnectionManagerError as error:
+                result.append(error)
+        return result
 
-    def __init__(self, credential_manager=None):
+    def __init__(self, credential_manager=None, client_cache=None, share_http_connections=True, circuit_breaker=None,
+                 track_clients=False, artifact_cache=None):
         """
         Initialize.
         
         :param credential_manager: credential manager
+        :param client_cache: ClientCache for reusing Nexus, Jenkins and SVN clients, clients are not cached if omitted
+        :param share_http_connections: Nexus and Jenkins clients of the same host use common HTTP connection pool
+        :param circuit_breaker: dictionary of CircuitBreaker parameters (may be empty) used for every resource,
+            resources are not guarded if omitted unless 'set_circuit_breaker' is called for them
+        :param track_clients: register every client returned by 'get_*_client' (except pooled ones and Nexus, Jenkins
+            and SVN clients, which have nothing to close), so leaked clients are found by 'check_leaks'
+            and closed by 'close_all'
+        :param artifact_cache: ArtifactCache serving artifact downloads of Nexus clients, artifacts are downloaded
+            on every call if omitted
         """
         if credential_manager:
             self.__credential_manager = credential_manager
         else:
             self.__credential_manager = CredentialManager()
+        self.__client_cache = client_cache
+        if client_cache is not None:
+            self.__credential_manager.add_listener(self.__on_credential_changed)
+        self.__pools = {}
+        self.__pools_lock = threading.Lock()
+        self.__host_limiters = {}
+        self.__host_limiters_lock = threading.Lock()
+        self.__share_http_connections = share_http_connections
+        self.__http_policies = {}
+        self.__http_adapters = {}
+        self._observers = []
+        self.__instrumentation = threading.local()
+        self.__circuit_breaker_defaults = None if circuit_breaker is None else dict(circuit_breaker)
+        self.__circuit_breakers = {}
+        self._circuit_breaking = circuit_breaker is not None
+        self.__registry = ClientRegistry()
+        self.__psql_routing = {}
+        self.__psql_routers = {}
+        self._tracking = track_clients
+        self.__artifact_cache = artifact_cache
+
+    @property
+    def credential_manager(self):
+        """
+        CredentialManager used by this manager
+        """
+        return self.__credential_manager
+
+    @property
+    def artifact_cache(self):
+        """
+        ArtifactCache used by Nexus clients or None
+        """
+        return self.__artifact_cache
+
+    @property
+    def client_cache(self):
+        """
+        ClientCache used by this manager or None
+        """
+        return self.__client_cache
+
+    def add_observer(self, observer):
+        """
+        Add observer of client factory calls.
+
+        :param observer: callable(ClientEvent) called for every stage of 'get_*_client' calls and for the whole call
+        """
+        self._observers = self._observers + [observer]
+
+    def remove_observer(self, observer):
+        """
+        Remove observer of client factory calls.
+
+        :param observer: observer added earlier
+        """
+        self._observers = [item for item in self._observers if item != observer]
+
+    def __notify_observers(self, event):
+        """
+        Passes event to observers. Failing observer does not break client creation.
+
+        :param event: ClientEvent
+        """
+        for observer in self._observers:
+            try:
+                observer(event)
+            except Exception:
+                pass
+
+    def set_circuit_breaker(self, resource, **parameters):
+        """
+        Guard client factories of resource with circuit breaker: when resource fails repeatedly,
+        'get_*_client' calls raise CircuitOpenError without connecting until trial call succeeds.
+        Note: Nexus and Jenkins clients are created without network access, so failures of their requests
+        are not seen by the breaker; it is opened and closed by 'probe' (and HealthChecker) only.
+
+        :param resource: resource name
+        :param parameters: CircuitBreaker parameters (failure_threshold, reset_timeout, half_open_max_calls)
+        :returns: CircuitBreaker
+        """
+        breaker = CircuitBreaker(**parameters)
+        with self.__pools_lock:
+            self.__circuit_breakers[resource] = breaker
+            self._circuit_breaking = True
+        return breaker
+
+    def get_circuit_breaker(self, resource):
+        """
+        Get circuit breaker of resource.
+
+        :param resource: resource name
+        :returns: CircuitBreaker or None if resource is not guarded
+        """
+        breaker = self.__circuit_breakers.get(resource)
+        if breaker is None and self.__circuit_breaker_defaults is not None:
+            with self.__pools_lock:
+                breaker = self.__circuit_breakers.get(resource)
+                if breaker is None:
+                    breaker = self.__circuit_breakers[resource] = CircuitBreaker(**self.__circuit_breaker_defaults)
+        return breaker
+
+    def _call_client(self, kind, resource, call):
+        """
+        Protected method running client factory call with instrumentation and circuit breaker.
+        Breaker is consulted by the outermost factory call only, nested calls (for example, 'get_mvn_client'
+        made by 'get_mvn_fs_client') are not counted twice.
+
+        :param kind: client kind
+        :param resource: resource name
+        :param call: callable without arguments which creates client
+        :returns: client
+        """
+        state = self.__instrumentation
+        depth = getattr(state, "depth", 0)
+        breaker = None
+        if depth == 0 and self._circuit_breaking and not getattr(state, "probing", False):
+            breaker = self.get_circuit_breaker(resource)
+        if breaker is not None:
+            breaker.before_call()
+        state.depth = depth + 1
+        try:
+            if self._observers:
+                with self._instrument(kind, resource):
+                    client = call()
+            else:
+                client = call()
+        except ConnectionManagerError:
+            # configuration errors tell nothing about resource health
+            if breaker is not None:
+                breaker.cancel()
+            raise
+        except Exception as error:
+            if breaker is not None:
+                breaker.record_failure(error)
+            raise
+        except BaseException:
+            if breaker is not None:
+                breaker.cancel()
+            raise
+        finally:
+            state.depth = depth
+        if breaker is not None:
+            breaker.record_success()
+        if depth == 0 and self._tracking and kind not in _UNTRACKED_KINDS \
+                and not getattr(state, "probing", False) and not getattr(state, "pooled", False):
+            self.__registry.track(kind, resource, client, _client_closer(kind))
+        return client
+
+    def __pooled(self, factory):
+        """
+        Marks clients created by factory as owned by pool, so they are not registered by client tracking.
+
+        :param factory: callable without arguments which creates client
+        :returns: callable without arguments
+        """
+        def create():
+            state = self.__instrumentation
+            pooled = getattr(state, "pooled", False)
+            state.pooled = True
+            try:
+                return factory()
+            finally:
+                state.pooled = pooled
+        return create
+
+    def open_client(self, resource, kind=None, **kwargs):
+        """
+        Get client registered in lifecycle registry, so it is closed by 'close_all' if owner forgets it.
+
+        :param resource: resource name
+        :param kind: client kind, a part of 'get_<kind>_client' method name; may be omitted for default resources
+            named after kinds (PSQL, FTP, SMTP, SMB, SVN, MVN, JENKINS)
+        :param kwargs: additional client parameters
+        :returns: client, close it with 'release_client'
+        """
+        if kind is None:
+            kind = resource.lower()
+            if kind not in _ENDPOINT_KINDS:
+                raise ConnectionManagerError("Client kind is required for '%s' resource" % resource)
+        factory = getattr(self, "get_%s_client" % kind, None)
+        if factory is None:
+            raise ConnectionManagerError("Unknown client kind '%s'" % kind)
+        client = factory(resource, **kwargs)
+        if self.__client_cache is None or kind not in _CACHED_KINDS:
+            self.__registry.track(kind, resource, client, _client_closer(kind))
+        return client
+
+    def release_client(self, client):
+        """
+        Close client registered by 'open_client' or client tracking.
+
+        :param client: client
+        :returns: True if client was registered
+        """
+        return self.__registry.close(client)
+
+    @contextmanager
+    def client(self, resource, kind=None, **kwargs):
+        """
+        Context manager which opens registered client and closes it on exit.
+        Cached clients (see 'client_cache') are not closed.
+
+        :param resource: resource name
+        :param kind: client kind, see 'open_client'
+        :param kwargs: additional client parameters
+        :returns: client
+        """
+        client = self.open_client(resource, kind, **kwargs)
+        try:
+            yield client
+        finally:
+            self.__registry.close(client)
+
+    def get_open_clients(self, older_than=None):
+        """
+        Get registered clients which are not closed yet.
+
+        :param older_than: seconds, only clients held longer are returned if given
+        :returns: list of TrackedClient with kind, resource, age, thread and acquisition stack, the oldest first
+        """
+        return self.__registry.clients(older_than)
+
+    def check_leaks(self, older_than=300):
+        """
+        Report registered clients held for too long with ResourceWarning containing their acquisition stacks.
+
+        :param older_than: seconds after which open client is considered leaked
+        :returns: list of TrackedClient
+        """
+        return self.__registry.check_leaks(older_than)
+
+    def close_all(self):
+        """
+        Close all registered clients and all pools created by this manager.
+
+        :returns: number of closed registered clients
+        """
+        closed = self.__registry.close_all()
+        self.close_pools()
+        return closed
+
+    def probe(self, resource, kind, timeout=5):
+        """
+        Check that resource is reachable by creating and closing client, bypassing circuit breaker.
+        Result is recorded by circuit breaker of resource, so broken resource is opened and recovered one is closed.
+        Clients which do not connect on creation are checked by a request: HTTP resources (Nexus, Jenkins) with
+        GET to their URL, FTP FS with NOOP, SVN with 'info2' of resource URL.
+
+        :param resource: resource name
+        :param kind: client kind, a part of 'get_<kind>_client' method name
+        :param timeout: connect timeout, seconds
+        :returns: seconds spent
+        """
+        factory = getattr(self, "get_%s_client" % kind, None)
+        if factory is None:
+            raise ConnectionManagerError("Unknown client kind '%s'" % kind)
+        breaker = self.get_circuit_breaker(resource)
+        state = self.__instrumentation
+        state.probing = True
+        start = time.monotonic()
+        try:
+            if kind == "psql":
+                client = factory(resource, connect_timeout=timeout)
+                try:
+                    if not _check_psql_connection(client):
+                        raise ConnectionManagerError("PostgreSQL connection is not usable")
+                finally:
+                    client.close()
+            elif kind == "ftp":
+                _close_ftp_session(factory(resource, timeout=timeout))
+            elif kind == "smtp":
+                _close_smtp_session(factory(resource, timeout=timeout))
+            elif kind in ("mvn", "mvn_fs", "jenkins"):
+                # NexusFS only wraps Nexus client, so the client itself is checked
+                client = self.get_mvn_client(resource) if kind == "mvn_fs" else factory(resource)
+                # any HTTP response means that server is alive
+                client.web.get(self.get_url(resource), timeout=timeout, stream=True).close()
+            elif kind == "ftp_fs":
+                # FTPFS connects on first use
+                client = factory(resource, timeout=timeout)
+                try:
+                    _noop_ftp_session(client.ftp)
+                finally:
+                    client.close()
+            elif kind in ("svn", "svn_fs"):
+                # pysvn client does not connect by itself
+                client = factory(resource)
+                (client.svn if kind == "svn_fs" else client).info2(self.get_url(resource), recurse=False)
+            elif kind in ("smb", "smb_fs"):
+                # Samba FS client opens pooled sessions on first use, so a session is opened directly
+                _close_connection(self.get_smb_client(resource, timeout=timeout))
+            else:
+                raise ConnectionManagerError("Client kind '%s' can not be probed" % kind)
+        except ConnectionManagerError:
+            raise
+        except Exception as error:
+            if breaker is not None:
+                breaker.record_failure(error, probe=True)
+            raise
+        finally:
+            state.probing = False
+        if breaker is not None:
+            breaker.record_success(probe=True)
+        return time.monotonic() - start
+
+    @contextmanager
+    def _instrument(self, kind, resource):
+        """
+        Protected context manager measuring the whole client factory call, stages inside it are attributed to it.
 
-    def __get_connection_credentials(self, resource, required=True):
+        :param kind: client kind
+        :param resource: resource name
         """
-        Get resource connection credentials.
+        calls = getattr(self.__instrumentation, "calls", None)
+        if calls is None:
+            calls = self.__instrumentation.calls = []
+        calls.append((kind, resource))
+        start = time.monotonic()
+        error = None
+        try:
+            yield
+        except BaseException as exception:
+            error = exception
+            raise
+        finally:
+            calls.pop()
+            self.__notify_observers(ClientEvent(kind, resource, "total", time.monotonic() - start, error))
+
+    @contextmanager
+    def __stage(self, stage):
+        """
+        Context manager measuring stage of client factory call (credentials, parse, connect, login).
+
+        :param stage: stage name
+        """
+        calls = getattr(self.__instrumentation, "calls", None)
+        if not self._observers or not calls:
+            yield
+            return
+        kind, resource = calls[-1]
+        start = time.monotonic()
+        error = None
+        try:
+            yield
+        except BaseException as exception:
+            error = exception
+            raise
+        finally:
+            self.__notify_observers(ClientEvent(kind, resource, stage, time.monotonic() - start, error))
+
+    def get_pool_stats(self):
+        """
+        Get sizes of pools created by this manager.
+
+        :returns: dictionary of (kind, resource) and dictionaries with 'size', 'idle' and 'in_use' keys
+        """
+        with self.__pools_lock:
+            pools = list(self.__pools.items())
+        return dict((key, {"size": pool.size, "idle": pool.idle, "in_use": pool.in_use}) for key, pool in pools)
+
+    def __on_credential_changed(self, resource, name):
+        """
+        Drops cached clients of resource which credential was changed.
+
+        :param resource: resource name
+        :param name: credential name
+        """
+        self.__client_cache.invalidate(resource)
+
+    def __cached(self, kind, resource, kwargs, create):
+        """
+        Get client from cache if caching is enabled.
+
+        :param kind: client kind
+        :param resource: resource name
+        :param kwargs: client parameters
+        :param create: callable without arguments which creates client
+        :returns: client
+        """
+        if self.__client_cache is None:
+            return create()
+        return self.__client_cache.get(kind, resource, kwargs, create)
+
+    def _get_connection_credentials(self, resource, required=True):
+        """
+        Protected method for resource connection credentials retrieval.
         
         :param resource: resource name
         :param required: defines credentials necessity
         :returns: values of URL, USER, PASSWORD credentials for resource
         """
-        url, user, password = self.__credential_manager.get_credentials(resource, ["URL", "USER", "PASSWORD"])
+        with self.__stage("credentials"):
+            url, user, password = self.__credential_manager.get_credentials(resource, ["URL", "USER", "PASSWORD"])
         def assert_credential_given(name, value):
             if not value:
                 raise ConnectionManagerError("%s credential is not set for '%s' resource" %
@@ -135,65 +658,416 @@ class ConnectionManager(object):
         :param required: defines URL credential necessity
         :returns: URL credential value
         """
-        url = self.__credential_manager.get_credential(resource, "URL")
+        with self.__stage("credentials"):
+            url = self.__credential_manager.get_credential(resource, "URL")
         if not url and required:
             raise ConnectionManagerError("URL credential is not set for '%s' resource" % resource)
         return url
 
-    def get_psql_django_configuration(self, resource):
+    def get_endpoints(self, resources):
+        """
+        Parses and validates URLs of many resources at once, for example for configuration checks.
+
+        :param resources: dictionary of resource names and client kinds (for example, {"PSQL": "psql", "MVN": "mvn"})
+            or list of (resource, kind) pairs; kind is a part of 'get_<kind>_client' method name
+        :returns: dictionary of resource names and Endpoint or ConnectionManagerError for invalid or missing URL
+        """
+        if isinstance(resources, dict):
+            resources = resources.items()
+        result = {}
+        for resource, kind in resources:
+            try:
+                if kind not in _ENDPOINT_KINDS:
+                    raise ConnectionManagerError("Unknown client kind '%s'" % kind)
+                result[resource] = _parse_endpoint(self.get_url(resource), _ENDPOINT_KINDS[kind])
+            except ConnectionManagerError as error:
+                result[resource] = error
+        return result
+
+    def get_psql_django_configuration(self, resource, replicas=None, conn_max_age=0, health_checks=False, pool=None):
         """
         Returns PostgreSQL-specific django database connection parameters.
+        Connections are opened per request by default; 'conn_max_age' makes them persistent,
+        'pool' makes them taken from psycopg 3 pool (Django 5.1+), which excludes persistent connections.
+        Replica aliases mirror 'default' in tests and are used for reads by PsqlDjangoRouter.
 
-        :param resource: resource name
+        :param resource: resource name of 'default' alias
+        :param replicas: resource names of replicas, list (aliases are 'replica_1', 'replica_2', ...)
+            or dictionary of alias: resource name
+        :param conn_max_age: seconds persistent connection is kept for, None means forever
+        :param health_checks: check persistent connection before reusing it in new request (Django 4.1+)
+        :param pool: True or dictionary of psycopg_pool.ConnectionPool parameters (min_size, max_size, timeout, ...)
         :returns: DATABASES config dictionary for Django settings.
         """
-        url, user, password = self.__get_connection_credentials(resource)
+        if pool and conn_max_age != 0:
+            raise ConnectionManagerError("Pooled connections can not be persistent, conn_max_age must be 0")
+        if replicas is None:
+            replicas = {}
+        elif not isinstance(replicas, dict):
+            replicas = dict(("replica_%d" % number, name) for number, name in enumerate(replicas, 1))
+        if "default" in replicas:
+            raise ConnectionManagerError("'default' alias is reserved for '%s' resource" % resource)
+        databases = {"default": self.__get_psql_django_database(resource, conn_max_age, health_checks, pool, False)}
+        for alias, name in replicas.items():
+            databases[alias] = self.__get_psql_django_database(name, conn_max_age, health_checks, pool, True)
+        return databases
+
+    def __get_psql_django_database(self, resource, conn_max_age, health_checks, pool, replica):
+        """
+        Build DATABASES entry of single resource.
+
+        :param resource: resource name
+        :param conn_max_age: seconds persistent connection is kept for, None means forever
+        :param health_checks: check persistent connection before reusing it
+        :param pool: pool parameters or None
+        :param replica: entry is a replica of 'default'
+        :returns: dictionary
+        """
+        url, user, password = self._get_connection_credentials(resource)
         host, port, dbname, options = ConnectionManager.parse_psql_url(url)
         if not options:
             raise ConnectionManagerError("Options are required for django configuration")
-        return {
-            "default": {
-                "ENGINE": "django.db.backends.postgresql_psycopg2",
-                "NAME": dbname,
-                "USER": user,
-                "PASSWORD": password,
-                "HOST": host,
-                "PORT": port,
-                "OPTIONS": {"options": "-c " + options},
-            }}
+        database = {
+            # connection pool is supported by new engine only
+            "ENGINE": "django.db.backends.postgresql" if pool else "django.db.backends.postgresql_psycopg2",
+            "NAME": dbname,
+            "USER": user,
+            "PASSWORD": password,
+            "HOST": host,
+            "PORT": port,
+            "OPTIONS": {"options": "-c " + options},
+        }
+        if conn_max_age != 0:
+            database["CONN_MAX_AGE"] = conn_max_age
+        if health_checks:
+            database["CONN_HEALTH_CHECKS"] = True
+        if pool:
+            database["OPTIONS"]["pool"] = dict(pool) if isinstance(pool, dict) else True
+        if "," in str(host) and not replica:
+            # libpq tries listed hosts in order until it finds the primary one
+            database["OPTIONS"]["target_session_attrs"] = "read-write"
+        if replica:
+            database["TEST"] = {"MIRROR": "default"}
+        return database
 
-    def get_psql_client(self, resource, **kwargs):
+    @_instrumented("psql")
+    def get_psql_client(self, resource, readonly=False, **kwargs):
         """
-        Get PostgreSQL connection.
+        Get PostgreSQL connection. If resource URL lists several hosts, connection is routed by 'get_psql_router':
+        writable connection goes to the primary server, read-only one goes to a replica; hosts which refuse
+        connection are skipped.
 
         :param resource: resource name
+        :param readonly: connection is used for reads only, it may be connected to a replica
         :param kwargs: additional parameters
         :returns: psycopg2 connection
         """
-        url, user, password = self.__get_connection_credentials(resource)
-        host, port, dbname, options = ConnectionManager.parse_psql_url(url)
-        return psycopg2.connect(user=user, password=password, host=host, port=port, dbname=dbname,
-                                options="-c " + options if options else "", **kwargs)
+        url, user, password = self._get_connection_credentials(resource)
+        with self.__stage("parse"):
+            endpoint = _parse_endpoint(url, "psql")
+        options = "-c " + endpoint.options if endpoint.options else ""
+        if len(endpoint.hosts) == 1:
+            with self.__stage("connect"):
+                return _backend("psycopg2").connect(user=user, password=password, host=endpoint.host,
+                                                    port=endpoint.port, dbname=endpoint.path, options=options,
+                                                    **kwargs)
+        kwargs.setdefault("connect_timeout", _PSQL_FAILOVER_TIMEOUT)
+        router = self.get_psql_router(resource, endpoint)
+        error = None
+        for host, port in router.candidates(readonly):
+            start = time.monotonic()
+            try:
+                with self.__stage("connect"):
+                    connection = _backend("psycopg2").connect(user=user, password=password, host=host, port=port,
+                                                              dbname=endpoint.path, options=options, **kwargs)
+            except Exception as exception:
+                router.record_failure((host, port))
+                error = exception
+                continue
+            try:
+                primary = not _is_psql_in_recovery(connection)
+            except Exception as exception:
+                _close_connection(connection)
+                router.record_failure((host, port))
+                error = exception
+                continue
+            router.record_success((host, port), time.monotonic() - start, primary)
+            if primary or readonly:
+                return connection
+            _close_connection(connection)
+        if error is None:
+            raise ConnectionManagerError("There is no primary server of '%s' resource" % resource)
+        raise error
+
+    def set_psql_routing(self, resource, **parameters):
+        """
+        Set routing parameters of multi-host PostgreSQL resource. Statistics collected earlier are dropped.
+
+        :param resource: resource name
+        :param parameters: PsqlHostRouter parameters (strategy, failure_timeout, latency_weight)
+        """
+        with self.__pools_lock:
+            self.__psql_routing[resource] = dict(parameters)
+            self.__psql_routers.pop(resource, None)
+
+    def get_psql_router(self, resource, endpoint=None):
+        """
+        Get router of multi-host PostgreSQL resource, which keeps known roles and latencies of its hosts.
+        Router is recreated if resource URL lists other hosts.
+
+        :param resource: resource name
+        :param endpoint: parsed resource URL, read from credentials if omitted
+        :returns: PsqlHostRouter
+        """
+        if endpoint is None:
+            endpoint = _parse_endpoint(self.get_url(resource), "psql")
+        with self.__pools_lock:
+            router = self.__psql_routers.get(resource)
+            if router is None or router.hosts != list(endpoint.hosts):
+                router = self.__psql_routers[resource] = PsqlHostRouter(
+                    endpoint.hosts, **self.__psql_routing.get(resource, {}))
+        return router
+
+    def get_psql_pool(self, resource, min_size=0, max_size=10, max_idle=600, max_lifetime=3600, readonly=False,
+                      **kwargs):
+        """
+        Get PostgreSQL connection pool. Pools are kept per resource, so pool parameters are used only on first call.
+        Connections are created by 'get_psql_client', checked for liveness on checkout and rolled back on return.
+        Read-only and writable connections of multi-host resource are kept in separate pools;
+        writable connection is dropped on checkout if its server is not primary any more.
+
+        :param resource: resource name
+        :param min_size: number of connections kept open even if they are idle
+        :param max_size: maximum number of connections
+        :param max_idle: seconds after which idle connection is closed, None means forever
+        :param max_lifetime: seconds after which connection is reopened, None means forever
+        :param readonly: connections are used for reads only, see 'get_psql_client'
+        :param kwargs: additional connection parameters
+        :returns: ConnectionPool, use 'with pool.connection() as connection:' for checkout
+        """
+        def create():
+            check = _check_psql_connection
+            if not readonly and len(_parse_endpoint(self.get_url(resource), "psql").hosts) > 1:
+                check = _check_psql_primary
+            return ConnectionPool(
+                self.__pooled(lambda: self.get_psql_client(resource, readonly=readonly, **kwargs)),
+                min_size=min_size, max_size=max_size, max_idle=max_idle, max_lifetime=max_lifetime,
+                check=check, reset=_reset_psql_connection)
+        return self.__get_pool("psql_ro" if readonly else "psql", resource, create)
+
+    def get_psql_stream(self, resource, itersize=2000, readonly=False, **kwargs):
+        """
+        Get streaming access to large result sets of resource over pooled connections (see 'get_psql_pool').
+
+        :param resource: resource name
+        :param itersize: number of rows fetched from server at once
+        :param readonly: connections are used for reads only, 'copy_from' is not available then
+        :param kwargs: additional pool parameters
+        :returns: PsqlStream, use 'rows', 'batches', 'copy_to' or 'copy_from'
+        """
+        return PsqlStream(self.get_psql_pool(resource, readonly=readonly, **kwargs), itersize)
+
+    def get_psql_loader(self, resource, table, columns=None, method="copy", batch_size=10000, workers=1, **kwargs):
+        """
+        Get bulk loader of records into table of resource over pooled connections (see 'get_psql_pool').
+
+        :param resource: resource name
+        :param table: table name, may be schema-qualified
+        :param columns: list of column names, see PsqlLoader
+        :param method: 'copy' (COPY FROM STDIN) or 'values' (INSERT ... VALUES by psycopg2.extras.execute_values)
+        :param batch_size: number of records written and committed at once
+        :param workers: number of concurrent connections, also pool size if pool does not exist yet
+        :param kwargs: additional pool parameters
+        :returns: PsqlLoader, use 'load' with iterable of tuples or dictionaries
+        """
+        kwargs.setdefault("max_size", max(workers, 10))
+        return PsqlLoader(self.get_psql_pool(resource, **kwargs), table, columns=columns, method=method,
+                          batch_size=batch_size, workers=workers)
+
+    def __get_pool(self, kind, resource, create):
+        """
+        Get existing pool or create a new one.
+
+        :param kind: pool kind
+        :param resource: resource name
+        :param create: callable without arguments which creates pool
+        :returns: pool
+        """
+        with self.__pools_lock:
+            pool = self.__pools.get((kind, resource))
+            if pool is None or pool.closed:
+                pool = self.__pools[(kind, resource)] = create()
+        return pool
+
+    def close_pools(self):
+        """
+        Close all pools created by this manager, including shared HTTP connection pools.
+        """
+        with self.__pools_lock:
+            pools = list(self.__pools.values())
+            self.__pools.clear()
+            pools.extend(self.__http_adapters.values())
+            self.__http_adapters.clear()
+        for pool in pools:
+            pool.close()
+
+    def warm_up(self, resources, timeout=_WARM_UP_TIMEOUT, max_workers=None):
+        """
+        Establish clients for several resources concurrently.
+        Existing pools of resources are filled and cache is populated if caching is enabled,
+        other clients are only opened and closed to check that resources are reachable.
+
+        :param resources: dictionary of resource names and client kinds (for example, {"PSQL": "psql", "MVN": "mvn"})
+            or list of (resource, kind) pairs; kind is a part of 'get_<kind>_client' method name
+        :param timeout: seconds to wait for each resource since warm-up start, or dictionary of timeouts per resource;
+            resources missing from dictionary are waited for default timeout, None means no timeout
+        :param max_workers: number of threads, by default all resources are warmed up at once
+        :returns: list of WarmUpResult in order of resources
+        """
+        if isinstance(resources, dict):
+            resources = list(resources.items())
+        else:
+            resources = list(resources)
+        if not resources:
+            return []
+        start = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(resources))
+        try:
+            futures = [executor.submit(self.__warm_up_client, resource, kind) for resource, kind in resources]
+            results = []
+            for (resource, kind), future in zip(resources, futures):
+                resource_timeout = timeout.get(resource, _WARM_UP_TIMEOUT) if isinstance(timeout, dict) else timeout
+                remaining = None if resource_timeout is None else max(0, start + resource_timeout - time.monotonic())
+                try:
+                    latency = future.result(remaining)
+                    results.append(WarmUpResult(resource, kind, latency))
+                except FutureTimeoutError:
+                    results.append(WarmUpResult(resource, kind, time.monotonic() - start, ConnectionManagerError(
+                        "Warm-up of '%s' resource timed out" % resource)))
+                except Exception as error:
+                    results.append(WarmUpResult(resource, kind, time.monotonic() - start, error))
+            return results
+        finally:
+            # timed out connects are left to finish in background
+            executor.shutdown(wait=False)
+
+    def __warm_up_client(self, resource, kind):
+        """
+        Establish single client for warm-up.
 
+        :param resource: resource name
+        :param kind: client kind
+        :returns: seconds spent
+        """
+        start = time.monotonic()
+        with self.__pools_lock:
+            pool = self.__pools.get((kind, resource))
+        if pool is not None:
+            pool.fill()
+            with pool.connection():
+                pass
+            return time.monotonic() - start
+        factory = getattr(self, "get_%s_client" % kind, None)
+        if factory is None:
+            raise ConnectionManagerError("Unknown client kind '%s'" % kind)
+        client = factory(resource)
+        if self.__client_cache is None or kind not in _CACHED_KINDS:
+            _close_connection(client)
+        return time.monotonic() - start
+
+    def set_http_policy(self, resource, **policy):
+        """
+        Set parameters of HTTP connection pool shared by Nexus and Jenkins clients of resource.
+        Resources of the same host share connection pool if their policies are equal.
+        Clients created earlier keep policy they were created with.
+
+        :param resource: resource name
+        :param pool_maxsize: maximum number of kept alive connections to the host
+        :param max_retries: total number of retries of failed request
+        :param backoff_factor: factor of exponential delay between retries
+        :param status_forcelist: HTTP status codes which are retried
+        :param allowed_methods: HTTP methods which are retried
+        :param keep_alive: keep connections open between requests
+        """
+        unknown = set(policy) - set(_HTTP_POLICY)
+        if unknown:
+            raise ConnectionManagerError("Unknown HTTP policy parameters: %s" % ", ".join(sorted(unknown)))
+        # policy is a part of shared pool key, so sequences (lists are usual for urllib3 Retry) must be hashable
+        policy = dict((name, tuple(value) if isinstance(value, (list, set, frozenset)) else value)
+                      for name, value in policy.items())
+        with self.__pools_lock:
+            self.__http_policies[resource] = policy
+
+    def get_http_policy(self, resource):
+        """
+        Get parameters of HTTP connection pool of resource.
+
+        :param resource: resource name
+        :returns: dictionary of policy parameters, see 'set_http_policy'
+        """
+        policy = dict(_HTTP_POLICY)
+        policy.update(self.__http_policies.get(resource, {}))
+        return policy
+
+    def __mount_shared_http_pool(self, resource, url, client):
+        """
+        Mounts HTTP connection pool shared by clients of the same host into client session.
+
+        :param resource: resource name
+        :param url: resource URL
+        :param client: oc_cdtapi.API.HttpAPI descendant
+        :returns: client
+        """
+        web = getattr(client, "web", None)
+        if not self.__share_http_connections or web is None:
+            return client
+        parse_result = urlparse.urlparse(url)
+        if not parse_result.scheme or not parse_result.netloc:
+            return client
+        prefix = "%s://%s/" % (parse_result.scheme.lower(), parse_result.netloc.lower())
+        policy = self.get_http_policy(resource)
+        key = (prefix, tuple(sorted(policy.items())))
+        with self.__pools_lock:
+            adapter = self.__http_adapters.get(key)
+            if adapter is None:
+                retry = _backend("Retry")(total=policy["max_retries"], backoff_factor=policy["backoff_factor"],
+                                          status_forcelist=list(policy["status_forcelist"]), raise_on_status=False,
+                                          allowed_methods=list(policy["allowed_methods"]))
+                adapter = self.__http_adapters[key] = _backend("HTTPAdapter")(
+                    pool_connections=1, pool_maxsize=policy["pool_maxsize"], max_retries=retry)
+        web.mount(prefix, adapter)
+        if not policy["keep_alive"]:
+            web.headers["Connection"] = "close"
+        return client
+
+    @_instrumented("mvn")
     def get_mvn_client(self, resource, **kwargs):
         """
         Get Nexus client.
 
         :param resource: resource name
         :param kwargs: additional parameters
-        :returns: cdt.NexusAPI.NexusAPI
+        :returns: cdt.NexusAPI.NexusAPI, wrapped by CachedNexusClient if manager has artifact cache
         """
-        url, user, password = self.__get_connection_credentials(resource, False)
+        return self.__cached("mvn", resource, kwargs, lambda: self.__create_mvn_client(resource, **kwargs))
+
+    def __create_mvn_client(self, resource, **kwargs):
+        url, user, password = self._get_connection_credentials(resource, False)
         if not url:
             raise ConnectionManagerError("URL credential is not set for '%s' resource" % resource)
-        if user:
-            if not password:
-                raise ConnectionManagerError("PASSWORD credential is not set for '%s' resource" % resource)
-            client = NexusAPI(root=url, user=user, auth=password, **kwargs)
-        else:
-            client = NexusAPI(root=url, anonymous=True, **kwargs)
+        if user and not password:
+            raise ConnectionManagerError("PASSWORD credential is not set for '%s' resource" % resource)
+        with self.__stage("connect"):
+            if user:
+                client = _backend("NexusAPI")(root=url, user=user, auth=password, **kwargs)
+            else:
+                client = _backend("NexusAPI")(root=url, anonymous=True, **kwargs)
+        client = self.__mount_shared_http_pool(resource, url, client)
+        if self.__artifact_cache is not None:
+            client = CachedNexusClient(client, self.__artifact_cache)
         return client
 
+    @_instrumented("mvn_fs")
     def get_mvn_fs_client(self, resource, **kwargs):
         """
         Get Nexus FS client.
@@ -203,16 +1077,34 @@ class ConnectionManager(object):
         :returns: cdt.pyfs.NexusFS.NexusFS
         """
         work_fs=kwargs.pop("work_fs", None) # this is a parameter to NexusFS, not NexusAPI
-        return NexusFS(self.get_mvn_client(resource, **kwargs), work_fs=work_fs)
+        client = self.get_mvn_client(resource, **kwargs)
+        with self.__stage("connect"):
+            return _backend("NexusFS")(client, work_fs=work_fs)
 
+    @_instrumented("svn")
     def get_svn_client(self, resource):
         """
-        Get SVN client.
+        Get SVN client. Note: cached client (if caching is enabled) is shared, while pysvn clients are not thread-safe.
+        Use 'get_svn_pool' for reusing clients in many threads.
         
         :param resource: resource name
         :returns: pysvn client 
         """
-        user, password = self.__credential_manager.get_credentials(resource, ["USER", "PASSWORD"])
+        return self.__cached("svn", resource, {}, lambda: self.__create_svn_client(resource))
+
+    @_instrumented("svn")
+    def __get_new_svn_client(self, resource):
+        """
+        Create SVN client bypassing cache, for pools.
+
+        :param resource: resource name
+        :returns: pysvn client
+        """
+        return self.__create_svn_client(resource)
+
+    def __create_svn_client(self, resource):
+        with self.__stage("credentials"):
+            user, password = self.__credential_manager.get_credentials(resource, ["USER", "PASSWORD"])
         if not user:
             raise ConnectionManagerError("USER credential is not set for '%s' resource" % resource)
         if not password:
@@ -226,6 +1118,12 @@ class ConnectionManager(object):
             def __init__(self):
                 self.__attempt_tried = False
 
+            def reset(self):
+                """
+                Allow one more attempt, called when pooled client is reused.
+                """
+                self.__attempt_tried = False
+
             def __call__(self, x, y, z):
                 # return value: retcode, username, password, credentials caching
                 if not self.__attempt_tried:
@@ -234,7 +1132,8 @@ class ConnectionManager(object):
                 else:
                     return False, "xx", "xx", False
 
-        client = pysvn.Client()
+        with self.__stage("connect"):
+            client = _backend("pysvn").Client()
         client.callback_get_login = OneAttemptLogin()
         # return values: trust, accept occured failures, save certificate
         # based on example by pysvn author: https://stackoverflow.com/questions/4893218/pysvn-client-callback-ssl-server-trust-prompt-error
@@ -246,6 +1145,7 @@ class ConnectionManager(object):
         client.set_interactive(False)
         return client
 
+    @_instrumented("svn_fs")
     def get_svn_fs_client(self, resource, *args, **kwargs):
         """
         Get SVN FS client.
@@ -255,26 +1155,135 @@ class ConnectionManager(object):
         :param kwargs: additional parameters
         :returns: cdt.pyfs.SvnFS.SvnFS
         """
-        return SvnFS(self.get_url(resource), self.get_svn_client(resource), *args, **kwargs)
+        url = self.get_url(resource)
+        client = self.get_svn_client(resource)
+        with self.__stage("connect"):
+            return _backend("SvnFS")(url, client, *args, **kwargs)
 
-    if version_info.major == 2:
-        def get_smb_client(self, resource):
-            """
-            Get Samba client.
-    
-            :param resource: resource name
-            :returns: SMBConnection
-            """
-            url, user, password = self.__get_connection_credentials(resource)
+    @_instrumented("svn_fs")
+    def __get_new_svn_fs_client(self, resource, *args, **kwargs):
+        """
+        Create SVN FS client with its own SVN client bypassing cache, for pools.
+
+        :param resource: resource name
+        :returns: cdt.pyfs.SvnFS.SvnFS
+        """
+        url = self.get_url(resource)
+        client = self.__get_new_svn_client(resource)
+        with self.__stage("connect"):
+            return _backend("SvnFS")(url, client, *args, **kwargs)
+
+    def get_svn_pool(self, resource, min_size=0, max_size=4, max_idle=600, max_lifetime=None, thread_affinity=False):
+        """
+        Get pool of SVN clients. Pools are kept per resource, so pool parameters are used only on first call.
+        Client is used by one thread between checkout and return; client which failed with authentication
+        error is discarded together with idle ones.
+
+        :param resource: resource name
+        :param min_size: number of clients kept even if they are idle
+        :param max_size: maximum number of clients
+        :param max_idle: seconds after which idle client is dropped, None means forever
+        :param max_lifetime: seconds after which client is recreated, None means forever
+        :param thread_affinity: prefer client used last by the current thread on checkout
+        :returns: SvnClientPool, use 'with pool.connection() as client:' for checkout
+        """
+        return self.__get_pool("svn", resource, lambda: SvnClientPool(
+            self.__pooled(lambda: self.__get_new_svn_client(resource)),
+            min_size=min_size, max_size=max_size, max_idle=max_idle, max_lifetime=max_lifetime,
+            thread_affinity=thread_affinity))
+
+    def get_svn_fs_pool(self, resource, min_size=0, max_size=4, max_idle=600, max_lifetime=None,
+                        thread_affinity=False, **kwargs):
+        """
+        Get pool of SVN FS clients, each one with its own SVN client. Parameters are the same as for 'get_svn_pool'.
+
+        :param kwargs: additional SvnFS parameters
+        :returns: SvnClientPool of SvnFS clients
+        """
+        return self.__get_pool("svn_fs", resource, lambda: SvnClientPool(
+            self.__pooled(lambda: self.__get_new_svn_fs_client(resource, **kwargs)),
+            min_size=min_size, max_size=max_size, max_idle=max_idle, max_lifetime=max_lifetime,
+            thread_affinity=thread_affinity, svn_client=_svn_fs_client))
+
+    def get_svn_batch(self, resource, workers=4, **kwargs):
+        """
+        Get executor running SvnFS operations for many paths concurrently over clients of resource pool
+        (see 'get_svn_fs_pool'). Clients prefer threads they were used by, so each worker keeps its own client.
+
+        :param resource: resource name
+        :param workers: number of concurrent operations, also pool size if pool does not exist yet
+        :param kwargs: additional pool parameters
+        :returns: SvnBatch, use 'listdir', 'info', 'cat' or 'run' with iterable of paths
+        """
+        kwargs.setdefault("thread_affinity", True)
+        return SvnBatch(self.get_svn_fs_pool(resource, max_size=workers, **kwargs), workers)
+
+    @_instrumented("smb")
+    def get_smb_client(self, resource, **kwargs):
+        """
+        Get Samba client.
+
+        :param resource: resource name
+        :param kwargs: additional connect parameters, for example 'timeout'
+        :returns: SMBConnection
+        """
+        url, user, password = self._get_connection_credentials(resource)
+        with self.__stage("parse"):
             host, share, path = ConnectionManager.parse_smb_url(url)
             domain, user = ConnectionManager.parse_smb_user(user)
-            client = SMBConnection(user, password, 'cln', host, domain, use_ntlm_v2=True, is_direct_tcp=True)
-            if not client.connect(host, port=445):
+        client = _backend("SMBConnection")(user, password, 'cln', host, domain, use_ntlm_v2=True, is_direct_tcp=True)
+        with self.__stage("connect"):
+            if not client.connect(host, port=_SMB_PORT, **kwargs):
                 raise ConnectionManagerError('Connection to Samba server failed')
-            return client
-    
-        # TODO: create get_smb_fs_client when oc_pyfs.SmbFS will be ready to use
+        return client
+
+    def get_smb_pool(self, resource, min_size=0, max_size=4, max_idle=300, max_lifetime=None, keepalive=60,
+                     max_sessions_per_host=None, **kwargs):
+        """
+        Get pool of authenticated Samba sessions. Session is not bound to share, so pools are kept
+        per (host, domain, user): resources of different shares of the same server and user share sessions,
+        and pool parameters are used only on first call. Sessions are created by 'get_smb_client'
+        and checked with ECHO on checkout.
+
+        :param resource: resource name
+        :param min_size: number of sessions kept open even if they are idle
+        :param max_size: maximum number of sessions of the pool
+        :param max_idle: seconds after which idle session is closed, None means forever
+        :param max_lifetime: seconds after which session is reopened, None means forever
+        :param keepalive: seconds of idleness after which ECHO is sent to session in background, None disables it
+        :param max_sessions_per_host: maximum number of pooled Samba sessions to the resource host from all pools
+        :param kwargs: additional connect parameters
+        :returns: ConnectionPool, use 'with pool.connection() as client:' for checkout
+        """
+        url, user, password = self._get_connection_credentials(resource)
+        host, share, path = ConnectionManager.parse_smb_url(url)
+        domain, user = ConnectionManager.parse_smb_user(user)
+        limiter = None
+        if max_sessions_per_host:
+            limiter = lambda: self.__get_host_limiter("smb", host, _SMB_PORT, max_sessions_per_host)
+        return self.__get_session_pool("smb", "%s/%s@%s" % (domain, user, host),
+                                       lambda: self.get_smb_client(resource, **kwargs), _echo_smb_session,
+                                       _close_connection, min_size, max_size, max_idle, max_lifetime, keepalive,
+                                       limiter)
+
+    def get_smb_fs_client(self, resource, sessions=4, chunk_size=1048576, retries=1, **kwargs):
+        """
+        Get file access to the share of resource URL over pooled sessions (see 'get_smb_pool').
+        Paths are relative to the directory of resource URL.
+
+        :param resource: resource name
+        :param sessions: maximum number of concurrent sessions, used only if pool does not exist yet
+        :param chunk_size: size of chunk read or written by single request
+        :param retries: number of times a chunk is requested over a new session if its session is broken
+        :param kwargs: additional pool parameters
+        :returns: SmbFileClient
+        """
+        url = self.get_url(resource)
+        host, share, path = ConnectionManager.parse_smb_url(url)
+        return SmbFileClient(self.get_smb_pool(resource, max_size=sessions, **kwargs), share, path,
+                             chunk_size=chunk_size, retries=retries)
 
+    @_instrumented("ftp")
     def get_ftp_client(self, resource, **kwargs):
         """
         Get FTP client.
@@ -283,13 +1292,17 @@ class ConnectionManager(object):
         :param kwargs: additional parameters
         :returns: FTP client
         """
-        url, user, password = self.__get_connection_credentials(resource)
-        host, port = _extract_host_port(url)
-        client = FTP()
-        client.connect(host, port, **kwargs)
-        client.login(user, password)
+        url, user, password = self._get_connection_credentials(resource)
+        with self.__stage("parse"):
+            host, port = _extract_host_port(url)
+        client = _backend("FTP")()
+        with self.__stage("connect"):
+            client.connect(host, port, **kwargs)
+        with self.__stage("login"):
+            client.login(user, password)
         return client
 
+    @_instrumented("ftp_fs")
     def get_ftp_fs_client(self, resource, **kwargs):
         """
         Get FTP FS client.
@@ -298,10 +1311,114 @@ class ConnectionManager(object):
         :param kwargs: additional parameters
         :returns: FTPFS client
         """
-        url, user, password = self.__get_connection_credentials(resource)
-        host, port = _extract_host_port(url)
-        return FTPFS(user=user, passwd=password, host=host, port=port, **kwargs)
+        url, user, password = self._get_connection_credentials(resource)
+        with self.__stage("parse"):
+            host, port = _extract_host_port(url)
+        with self.__stage("connect"):
+            return _backend("FTPFS")(user=user, passwd=password, host=host, port=port, **kwargs)
+
+    def get_ftp_pool(self, resource, min_size=0, max_size=4, max_idle=300, max_lifetime=None, keepalive=60,
+                     max_sessions_per_host=None, **kwargs):
+        """
+        Get pool of logged in FTP sessions. Pools are kept per resource, so pool parameters are used only on first call.
+        Sessions are created by 'get_ftp_client' and checked with NOOP on checkout.
+
+        :param resource: resource name
+        :param min_size: number of sessions kept open even if they are idle
+        :param max_size: maximum number of sessions of the resource
+        :param max_idle: seconds after which idle session is closed, None means forever
+        :param max_lifetime: seconds after which session is reopened, None means forever
+        :param keepalive: seconds of idleness after which NOOP is sent to session in background, None disables it
+        :param max_sessions_per_host: maximum number of pooled FTP sessions to the resource host from all pools
+        :param kwargs: additional parameters
+        :returns: ConnectionPool, use 'acquire'/'release' or 'with pool.connection() as client:' for checkout
+        """
+        return self.__get_session_pool("ftp", resource, lambda: self.get_ftp_client(resource, **kwargs),
+                                       _noop_ftp_session, _close_ftp_session, min_size, max_size, max_idle,
+                                       max_lifetime, keepalive, self.__ftp_host_limiter(resource, max_sessions_per_host))
+
+    def get_ftp_fs_pool(self, resource, min_size=0, max_size=4, max_idle=300, max_lifetime=None, keepalive=60,
+                        max_sessions_per_host=None, **kwargs):
+        """
+        Get pool of FTP FS clients. Parameters are the same as for 'get_ftp_pool'.
+
+        :returns: ConnectionPool of FTPFS clients created by 'get_ftp_fs_client'
+        """
+        return self.__get_session_pool("ftp_fs", resource, lambda: self.get_ftp_fs_client(resource, **kwargs),
+                                       lambda client: _noop_ftp_session(client.ftp), _close_connection,
+                                       min_size, max_size, max_idle, max_lifetime, keepalive,
+                                       self.__ftp_host_limiter(resource, max_sessions_per_host))
+
+    def get_ftp_transfer(self, resource, sessions=4, blocksize=65536, retries=1, **kwargs):
+        """
+        Get engine transferring many files over concurrent sessions of resource pool (see 'get_ftp_pool').
+
+        :param resource: resource name
+        :param sessions: maximum number of concurrent sessions, used only if pool does not exist yet
+        :param blocksize: size of transferred block
+        :param retries: number of times a file is resumed over a new session if its session is broken
+        :param kwargs: additional pool parameters
+        :returns: FtpTransfer, use 'download' and 'upload' with lists of (remote, local) pairs
+        """
+        return FtpTransfer(self.get_ftp_pool(resource, max_size=sessions, **kwargs), blocksize=blocksize,
+                           retries=retries)
+
+    def __ftp_host_limiter(self, resource, max_sessions_per_host):
+        """
+        Get callable returning limiter of FTP sessions to the resource host.
+
+        :param resource: resource name
+        :param max_sessions_per_host: maximum number of sessions, None means no limit
+        :returns: callable without arguments or None
+        """
+        if not max_sessions_per_host:
+            return None
+
+        def limiter():
+            host, port = _extract_host_port(self.get_url(resource))
+            return self.__get_host_limiter("ftp", host, port, max_sessions_per_host)
+        return limiter
+
+    def __get_session_pool(self, kind, key, factory, noop, close, min_size, max_size, max_idle, max_lifetime,
+                           keepalive, limiter):
+        """
+        Get existing pool of sessions or create a new one with keepalive maintenance and per host limit.
 
+        :param kind: pool kind
+        :param key: resource name or other key the pool is kept by
+        :param factory: callable without arguments which creates session
+        :param noop: callable(session) used for liveness check and keepalive
+        :param close: callable(session) which closes session
+        :param limiter: callable without arguments returning semaphore shared by pools of the host, or None
+        :returns: ConnectionPool
+        """
+        def create():
+            pool = ConnectionPool(self.__pooled(factory), min_size=min_size, max_size=max_size, max_idle=max_idle,
+                                  max_lifetime=max_lifetime, check=noop, close=close,
+                                  keepalive=noop, keepalive_interval=keepalive,
+                                  limiter=limiter() if limiter is not None else None)
+            if keepalive:
+                pool.start_maintenance(keepalive)
+            return pool
+        return self.__get_pool(kind, key, create)
+
+    def __get_host_limiter(self, protocol, host, port, limit):
+        """
+        Get semaphore limiting number of pooled sessions to host. Limit is set on first call for the host.
+
+        :param protocol: protocol name
+        :param host: host name
+        :param port: port
+        :param limit: maximum number of sessions
+        :returns: threading.BoundedSemaphore
+        """
+        with self.__host_limiters_lock:
+            limiter = self.__host_limiters.get((protocol, host, port))
+            if limiter is None:
+                limiter = self.__host_limiters[(protocol, host, port)] = threading.BoundedSemaphore(limit)
+        return limiter
+
+    @_instrumented("smtp")
     def get_smtp_client(self, resource, **kwargs):
         """
         Get SMTP client. Note: Authorization is performed only if USER credential is set.
@@ -310,17 +1427,38 @@ class ConnectionManager(object):
         :param kwargs: additional parameters
         :returns: SMTP client
         """
-        url, user, password = self.__get_connection_credentials(resource, False)
+        url, user, password = self._get_connection_credentials(resource, False)
         if not url:
             raise ConnectionManagerError("URL credential is not set for '%s' resource" % resource)
-        host, port = _extract_host_port(url)
-        client = SMTP(host=host, port=port, **kwargs)
+        with self.__stage("parse"):
+            host, port = _extract_host_port(url)
+        with self.__stage("connect"):
+            client = _backend("SMTP")(host=host, port=port, **kwargs)
         if user:
             if not password:
                 raise ConnectionManagerError("PASSWORD credential is not set for '%s' resource" % resource)
-            client.login(user, password)
+            with self.__stage("login"):
+                client.login(user, password)
         return client
 
+    def get_smtp_pool(self, resource, min_size=0, max_size=4, max_idle=60, max_lifetime=None, **kwargs):
+        """
+        Get pool of SMTP sessions. Pools are kept per resource, so pool parameters are used only on first call.
+        Sessions are created by 'get_smtp_client' and checked with NOOP on checkout.
+
+        :param resource: resource name
+        :param min_size: number of sessions kept open even if they are idle
+        :param max_size: maximum number of sessions
+        :param max_idle: seconds after which idle session is closed, None means forever
+        :param max_lifetime: seconds after which session is reopened, None means forever
+        :param kwargs: additional parameters
+        :returns: SmtpSessionPool, use 'send' and 'send_many' for sending messages
+        """
+        return self.__get_pool("smtp", resource, lambda: SmtpSessionPool(
+            self.__pooled(lambda: self.get_smtp_client(resource, **kwargs)),
+            min_size=min_size, max_size=max_size, max_idle=max_idle, max_lifetime=max_lifetime))
+
+    @_instrumented("jenkins")
     def get_jenkins_client(self, resource, **kwargs):
         """
         Get Jenkins client. Note: PASSWORD credential is used as auth token.
@@ -329,8 +1467,13 @@ class ConnectionManager(object):
         :param kwargs: additional parameters
         :returns: cdt.jenkins.Jenkins
         """
-        url, user, password = self.__get_connection_credentials(resource)
-        return Jenkins(url, user, password, **kwargs)
+        return self.__cached("jenkins", resource, kwargs, lambda: self.__create_jenkins_client(resource, **kwargs))
+
+    def __create_jenkins_client(self, resource, **kwargs):
+        url, user, password = self._get_connection_credentials(resource)
+        with self.__stage("connect"):
+            client = _backend("Jenkins")(url, user, password, **kwargs)
+        return self.__mount_shared_http_pool(resource, url, client)
 
     ########################
     # DEPRECATED FUNCTIONS #
@@ -349,10 +1492,10 @@ class ConnectionManager(object):
     def get_mvn_connection(self, anonymous=False, **kwargs):
         if anonymous:
             url = self.get_url("MVN")
-            client = NexusAPI(root=url, anonymous=True, **kwargs)
+            client = _backend("NexusAPI")(root=url, anonymous=True, **kwargs)
         else:
-            url, username, password = self.__get_connection_credentials("MVN")
-            client = NexusAPI(root=url, user=username, auth=password, **kwargs)
+            url, username, password = self._get_connection_credentials("MVN")
+            client = _backend("NexusAPI")(root=url, user=username, auth=password, **kwargs)
         return client
 
     @_deprecated(replacement="get_svn_client")
@@ -362,7 +1505,7 @@ class ConnectionManager(object):
     if version_info.major == 2:
         @_deprecated(replacement="get_smb_client")
         def get_smb_connection(self, path=""):
-            url, user, password = self.__get_connection_credentials("SMB")
+            url, user, password = self._get_connection_credentials("SMB")
             domain = "spb"
             if re.search(r"/", user):
                 domain, user = user.split('/')
@@ -398,6 +1541,117 @@ class ConnectionManager(object):
         return [self.get_credential(prefix + '_' + name, required) for name in names]
 
 
+def _check_psql_connection(connection):
+    """
+    Liveness check for pooled PostgreSQL connection.
+
+    :param connection: psycopg2 connection
+    :returns: True if connection is usable
+    """
+    if connection.closed:
+        return False
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    finally:
+        cursor.close()
+    if not connection.autocommit:
+        connection.rollback()
+    return True
+
+
+def _is_psql_in_recovery(connection):
+    """
+    Tells if PostgreSQL server of connection is a replica.
+
+    :param connection: psycopg2 connection
+    :returns: True if server is in recovery (read-only standby)
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT pg_is_in_recovery()")
+        in_recovery = bool(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+    if not connection.autocommit:
+        connection.rollback()
+    return in_recovery
+
+
+def _check_psql_primary(connection):
+    """
+    Liveness check for pooled writable connection of multi-host PostgreSQL resource.
+
+    :param connection: psycopg2 connection
+    :returns: True if connection is usable and its server is still primary
+    """
+    return not connection.closed and not _is_psql_in_recovery(connection)
+
+
+def _reset_psql_connection(connection):
+    """
+    Rolls back unfinished transaction of PostgreSQL connection returned to pool.
+
+    :param connection: psycopg2 connection
+    """
+    if connection.closed:
+        raise ConnectionManagerError("Connection is closed")
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+    status = connection.get_transaction_status()
+    if status == TRANSACTION_STATUS_UNKNOWN:
+        raise ConnectionManagerError("Connection to server is lost")
+    if status != TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+def _noop_ftp_session(client):
+    """
+    Liveness check and keepalive for pooled FTP session.
+
+    :param client: ftplib.FTP
+    :returns: True if server answered NOOP
+    """
+    client.voidcmd("NOOP")
+    return True
+
+
+def _echo_smb_session(client):
+    """
+    Liveness check and keepalive for pooled Samba session.
+
+    :param client: SMBConnection
+    :returns: True if server answered ECHO
+    """
+    client.echo(b"keepalive", timeout=10)
+    return True
+
+
+def _client_closer(kind):
+    """
+    Get finalizer of client.
+
+    :param kind: client kind
+    :returns: callable(client)
+    """
+    if kind == "ftp":
+        return _close_ftp_session
+    if kind == "smtp":
+        return _close_smtp_session
+    return _close_connection
+
+
+def _close_ftp_session(client):
+    """
+    Politely closes FTP session.
+
+    :param client: ftplib.FTP
+    """
+    try:
+        client.quit()
+    except Exception:
+        client.close()
+
+
 def _extract_host_port(url):
     """
     Extracts host and port from (maybe) incomplete URL
@@ -405,14 +1659,156 @@ def _extract_host_port(url):
     :param url: URL string
     :returns: host, port
     """
-    if not re.match("(.*?:)?//", url):
-        url = "//" + url
-    parse_result = urlparse.urlparse(url)
-    host = parse_result.hostname
-    port = parse_result.port
-    if not all([host, port]):
-        raise ConnectionManagerError("Invalid url given: host and port are required")
-    return host, port
+    endpoint = _parse_endpoint(url, "host")
+    return endpoint.host, endpoint.port
+
+
+@lru_cache(maxsize=_ENDPOINT_CACHE_SIZE)
+def _parse_endpoint(url, kind):
+    """
+    Parses connection string. Results are cached, invalid strings are not.
+
+    :param url: connection string
+    :param kind: endpoint kind, see 'ConnectionManager.parse_endpoint'
+    :returns: Endpoint
+    """
+    if not isinstance(url, str):
+        raise ConnectionManagerError("Invalid url given: string is required")
+    try:
+        if kind == "smb":
+            parts = url.split("//", 1)[1].split('/', 2)
+            if len(parts) < 2 or not parts[0] or not parts[1]:
+                raise ConnectionManagerError("Invalid smb url given: host and share are required")
+            path = parts[1] + "/" + (parts[2] if len(parts) == 3 else "")
+            return Endpoint(kind, None, parts[0], None, path, "")
+        if kind == "url":
+            parse_result = urlparse.urlparse(url)
+            if not parse_result.scheme or not parse_result.hostname:
+                raise ConnectionManagerError("Invalid url given: scheme and host are required")
+        else:
+            parse_result = urlparse.urlparse(url if re.match("(.*?:)?//", url) else "//" + url)
+        try:
+            port = parse_result.port if "," not in parse_result.netloc else None
+        except ValueError:
+            raise ConnectionManagerError("Invalid url given: port is not a number")
+        endpoint = Endpoint(kind, parse_result.scheme or None, parse_result.hostname, port, parse_result.path,
+                            parse_result.query)
+        if kind == "psql":
+            hosts = [(endpoint.host, port)]
+            if "," in parse_result.netloc:
+                hosts = [_extract_host_port("//" + item) for item in parse_result.netloc.split(",")]
+            endpoint = Endpoint(kind, endpoint.scheme, hosts[0][0], hosts[0][1], endpoint.path.strip('/'),
+                                endpoint.options, hosts)
+            if not all([endpoint.path] + [host and host_port for host, host_port in hosts]):
+                raise ConnectionManagerError("Invalid psql url given: host, port and dbname are required")
+        elif kind == "host":
+            if not all([endpoint.host, port]):
+                raise ConnectionManagerError("Invalid url given: host and port are required")
+        elif kind != "url":
+            raise ConnectionManagerError("Unknown endpoint kind '%s'" % kind)
+        return endpoint
+    except (IndexError, ValueError) as error:
+        # malformed strings (no '//' in smb url, broken IPv6 literal) must not escape as unrelated exceptions
+        raise ConnectionManagerError("Invalid url given: '%s' (%s)" % (url, error))
+
+
+class Endpoint(object):
+    """
+    Parsed connection string. Endpoints are shared by the parsing cache, so they are read-only.
+    """
+    __slots__ = ("kind", "scheme", "host", "port", "path", "options", "hosts")
+
+    def __init__(self, kind, scheme, host, port, path, options, hosts=None):
+        """
+        Initialize.
+
+        :param kind: endpoint kind, see 'ConnectionManager.parse_endpoint'
+        :param scheme: URL scheme or None
+        :param host: host name, the first one for multi-host 'psql' URL
+        :param port: port or None, the first one for multi-host 'psql' URL
+        :param path: database name for 'psql', 'share/path' for 'smb', URL path otherwise
+        :param options: URL query string
+        :param hosts: tuple of all (host, port) pairs, (host, port) only by default
+        """
+        if hosts is None:
+            hosts = ((host, port),) if host else ()
+        for name, value in zip(Endpoint.__slots__, (kind, scheme, host, port, path, options, tuple(hosts))):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Endpoint is read-only")
+
+    def __eq__(self, other):
+        return isinstance(other, Endpoint) and all(
+            getattr(self, name) == getattr(other, name) for name in Endpoint.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in Endpoint.__slots__))
+
+    def __repr__(self):
+        return "Endpoint(%s)" % ", ".join("%s=%r" % (name, getattr(self, name)) for name in Endpoint.__slots__)
+
+
+class ClientEvent(object):
+    """
+    Timing of client factory call or its stage, passed to ConnectionManager observers
+    """
+    __slots__ = ("kind", "resource", "stage", "seconds", "error")
+
+    def __init__(self, kind, resource, stage, seconds, error=None):
+        """
+        Initialize.
+
+        :param kind: client kind, a part of 'get_<kind>_client' method name
+        :param resource: resource name
+        :param stage: 'credentials', 'parse', 'connect', 'login' or 'total' for the whole call
+        :param seconds: seconds spent
+        :param error: exception raised or None
+        """
+        self.kind = kind
+        self.resource = resource
+        self.stage = stage
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "ClientEvent(%r, %r, %r, seconds=%.6f, error=%r)" % (
+            self.kind, self.resource, self.stage, self.seconds, self.error)
+
+
+class WarmUpResult(object):
+    """
+    Result of resource warm-up
+    """
+    __slots__ = ("resource", "kind", "latency", "error")
+
+    def __init__(self, resource, kind, latency, error=None):
+        """
+        Initialize.
+
+        :param resource: resource name
+        :param kind: client kind
+        :param latency: seconds spent
+        :param error: exception raised during warm-up or None
+        """
+        self.resource = resource
+        self.kind = kind
+        self.latency = latency
+        self.error = error
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "WarmUpResult(%r, %r, latency=%.3f, error=%r)" % (self.resource, self.kind, self.latency, self.error)
 
 
 class ConnectionManagerError(Exception):
@@ -0,0 +1,405 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class _PooledConnection(object):
+    """
+    Pool bookkeeping record for a single connection
+    """
+    __slots__ = ("connection", "created", "last_used", "last_checked", "owner")
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.last_used = self.last_checked = time.monotonic()
+        # identifier of the thread which used connection last
+        self.owner = threading.get_ident()
+
+
+def _close_connection(connection):
+    """
+    Default connection finalizer: calls 'close' method if connection has one
+
+    :param connection: connection to close
+    """
+    close = getattr(connection, "close", None)
+    if close:
+        close()
+
+
+class ConnectionPool(object):
+    """
+    Thread-safe bounded pool of reusable connections.
+
+    Connections are created by factory on demand, checked for liveness on checkout,
+    closed after 'max_idle' seconds of inactivity and recycled after 'max_lifetime' seconds since creation.
+    """
+
+    def __init__(self, factory, min_size=0, max_size=10, max_idle=None, max_lifetime=None,
+                 check=None, reset=None, close=None, keepalive=None, keepalive_interval=None, limiter=None,
+                 affinity=False):
+        """
+        Initialize.
+
+        :param factory: callable without arguments which creates new connection
+        :param min_size: number of connections kept open even if they are idle
+        :param max_size: maximum number of connections (idle and in use)
+        :param max_idle: seconds after which idle connection is closed, None means forever
+        :param max_lifetime: seconds after which connection is recycled, None means forever
+        :param check: callable(connection) returning False (or raising) if connection is dead, called on checkout
+        :param reset: callable(connection) called on return to pool, connection is discarded if it raises
+        :param close: callable(connection) which closes connection, 'connection.close()' is used by default
+        :param keepalive: callable(connection) sent to idle connections by 'maintain', connection is discarded if it raises
+        :param keepalive_interval: seconds of idleness after which keepalive is sent, None disables keepalive
+        :param limiter: semaphore shared between pools, acquired for every open connection (for example, per host)
+        :param affinity: prefer idle connection used last by the current thread on checkout
+        """
+        if max_size < 1:
+            raise ConnectionPoolError("max_size must be positive")
+        if min_size < 0 or min_size > max_size:
+            raise ConnectionPoolError("min_size must be between 0 and max_size")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.__factory = factory
+        self.__check = check
+        self.__reset = reset
+        self.__close = close or _close_connection
+        self.__keepalive = keepalive
+        self.keepalive_interval = keepalive_interval
+        self.__limiter = limiter
+        self.affinity = affinity
+        self.__maintenance_stop = None
+        self.__condition = threading.Condition()
+        # idle connections ordered by return time, the most recently used one is at the right
+        self.__idle = deque()
+        self.__in_use = {}
+        # number of idle, checked out and being created connections
+        self.__size = 0
+        self.__closed = False
+
+    @property
+    def size(self):
+        """
+        Number of open connections (idle and in use)
+        """
+        return self.__size
+
+    @property
+    def idle(self):
+        """
+        Number of idle connections
+        """
+        return len(self.__idle)
+
+    @property
+    def in_use(self):
+        """
+        Number of checked out connections
+        """
+        return len(self.__in_use)
+
+    @property
+    def closed(self):
+        """
+        True if pool is closed
+        """
+        return self.__closed
+
+    def __is_lifetime_expired(self, entry, now):
+        return self.max_lifetime is not None and now - entry.created >= self.max_lifetime
+
+    def __is_idle_expired(self, entry, now):
+        return self.max_idle is not None and now - entry.last_used >= self.max_idle
+
+    def __is_alive(self, entry):
+        """
+        Runs liveness check on connection.
+
+        :param entry: pooled connection record
+        :returns: True if connection may be used
+        """
+        if not self.__check:
+            return True
+        try:
+            return bool(self.__check(entry.connection))
+        except Exception:
+            return False
+
+    def __discard(self, entries):
+        """
+        Closes connections and frees their slots.
+
+        :param entries: pooled connection records
+        """
+        if not entries:
+            return
+        with self.__condition:
+            self.__size -= len(entries)
+            self.__condition.notify(len(entries))
+        for entry in entries:
+            try:
+                self.__close(entry.connection)
+            except Exception:
+                # connection is dropped anyway
+                pass
+            finally:
+                if self.__limiter is not None:
+                    self.__limiter.release()
+
+    def __open(self, deadline=None):
+        """
+        Creates connection for a reserved slot. Slot is freed if connection can not be created.
+
+        :param deadline: monotonic time until which limiter is awaited, None means forever
+        :returns: pooled connection record
+        """
+        try:
+            if self.__limiter is not None:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                if not self.__limiter.acquire(timeout=remaining):
+                    raise ConnectionPoolError("Timed out waiting for connection limit")
+            try:
+                return _PooledConnection(self.__factory())
+            except Exception:
+                if self.__limiter is not None:
+                    self.__limiter.release()
+                raise
+        except Exception:
+            with self.__condition:
+                self.__size -= 1
+                self.__condition.notify()
+            raise
+
+    def __pop_expired(self, now):
+        """
+        Removes expired connections from the idle queue. Must be called under lock.
+
+        :param now: current monotonic time
+        :returns: list of removed records
+        """
+        # idleness never shrinks pool below min_size, lifetime limit is always respected
+        droppable = self.__size - self.min_size
+        expired = []
+        for entry in self.__idle:
+            if self.__is_lifetime_expired(entry, now):
+                expired.append(entry)
+            elif len(expired) < droppable and self.__is_idle_expired(entry, now):
+                expired.append(entry)
+        for entry in expired:
+            self.__idle.remove(entry)
+        return expired
+
+    def __pop_idle(self):
+        """
+        Removes connection to be checked out from the idle queue. Must be called under lock.
+
+        :returns: the most recently used record, or one used last by the current thread if affinity is on
+        """
+        if self.affinity:
+            owner = threading.get_ident()
+            for entry in reversed(self.__idle):
+                if entry.owner == owner:
+                    self.__idle.remove(entry)
+                    return entry
+        return self.__idle.pop()
+
+    def acquire(self, timeout=None):
+        """
+        Check out connection from the pool. New connection is created if there is no idle one and pool is not full.
+
+        :param timeout: seconds to wait for a free connection, None means forever
+        :returns: connection
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry = None
+            expired = None
+            with self.__condition:
+                while True:
+                    if self.__closed:
+                        raise ConnectionPoolError("Connection pool is closed")
+                    expired = self.__pop_expired(time.monotonic())
+                    if expired:
+                        break
+                    if self.__idle:
+                        entry = self.__pop_idle()
+                        break
+                    if self.__size < self.max_size:
+                        self.__size += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise ConnectionPoolError("Timed out waiting for a free connection")
+                    self.__condition.wait(remaining)
+            if expired:
+                self.__discard(expired)
+                continue
+            if entry is None:
+                entry = self.__open(deadline)
+            elif not self.__is_alive(entry):
+                self.__discard([entry])
+                continue
+            with self.__condition:
+                self.__in_use[id(entry.connection)] = entry
+            return entry.connection
+
+    def release(self, connection, discard=False):
+        """
+        Return connection to the pool.
+
+        :param connection: connection obtained by 'acquire'
+        :param discard: close connection instead of returning it to the idle queue
+        """
+        with self.__condition:
+            entry = self.__in_use.pop(id(connection), None)
+        if entry is None:
+            raise ConnectionPoolError("Connection does not belong to the pool")
+        if not discard and self.__reset:
+            try:
+                self.__reset(connection)
+            except Exception:
+                discard = True
+        now = time.monotonic()
+        if not discard and not self.__is_lifetime_expired(entry, now):
+            with self.__condition:
+                if not self.__closed:
+                    entry.last_used = now
+                    entry.owner = threading.get_ident()
+                    self.__idle.append(entry)
+                    self.__condition.notify()
+                    return
+        self.__discard([entry])
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager which checks out connection and returns it to the pool on exit.
+
+        :param timeout: seconds to wait for a free connection, None means forever
+        :returns: connection
+        """
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def fill(self):
+        """
+        Open connections until pool contains at least min_size ones.
+        """
+        while True:
+            with self.__condition:
+                if self.__closed or self.__size >= self.min_size:
+                    return
+                self.__size += 1
+            entry = self.__open()
+            with self.__condition:
+                self.__idle.appendleft(entry)
+                self.__condition.notify()
+
+    def evict(self):
+        """
+        Close idle connections which exceeded 'max_idle' or 'max_lifetime' limits.
+
+        :returns: number of closed connections
+        """
+        with self.__condition:
+            expired = self.__pop_expired(time.monotonic())
+        self.__discard(expired)
+        return len(expired)
+
+    def clear(self):
+        """
+        Close all idle connections, for example when they all became unusable after credentials change.
+        Checked out connections are not affected.
+
+        :returns: number of closed connections
+        """
+        with self.__condition:
+            idle = list(self.__idle)
+            self.__idle.clear()
+        self.__discard(idle)
+        return len(idle)
+
+    def maintain(self):
+        """
+        Close expired idle connections, send keepalive to idle connections and open connections up to min_size.
+        """
+        self.evict()
+        if self.__keepalive is not None and self.keepalive_interval is not None:
+            now = time.monotonic()
+            with self.__condition:
+                due = [entry for entry in self.__idle
+                       if now - max(entry.last_used, entry.last_checked) >= self.keepalive_interval]
+                for entry in due:
+                    self.__idle.remove(entry)
+            dead = []
+            for entry in due:
+                try:
+                    self.__keepalive(entry.connection)
+                    entry.last_checked = time.monotonic()
+                except Exception:
+                    dead.append(entry)
+            with self.__condition:
+                alive = [entry for entry in due if entry not in dead]
+                if self.__closed:
+                    dead.extend(alive)
+                elif alive:
+                    # keepalive does not count as usage, so idle queue stays ordered by last usage time
+                    self.__idle = deque(sorted(list(self.__idle) + alive, key=lambda entry: entry.last_used))
+                    self.__condition.notify(len(alive))
+            self.__discard(dead)
+        self.fill()
+
+    def start_maintenance(self, interval):
+        """
+        Start daemon thread which calls 'maintain' periodically until pool is closed.
+
+        :param interval: seconds between calls
+        """
+        with self.__condition:
+            if self.__maintenance_stop is not None:
+                return
+            stop = self.__maintenance_stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.maintain()
+                except Exception:
+                    # resource may be temporarily unavailable, next round will try again
+                    pass
+
+        thread = threading.Thread(target=run, name="ConnectionPool maintenance")
+        thread.daemon = True
+        thread.start()
+
+    def close(self):
+        """
+        Close the pool: idle connections are closed immediately, checked out ones are closed on return.
+        """
+        with self.__condition:
+            if self.__maintenance_stop is not None:
+                self.__maintenance_stop.set()
+            self.__closed = True
+            idle = list(self.__idle)
+            self.__idle.clear()
+            self.__condition.notify_all()
+        self.__discard(idle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ConnectionPoolError(Exception):
+    """
+    ConnectionPool exception
+    """
+    pass
@@ -0,0 +1,317 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from .CredentialManager import CredentialManagerError
+
+
+class CredentialBackend(ABC):
+    """
+    Source of credentials for CredentialManager.
+
+    Subclasses implement 'fetch', which returns several credentials of a resource at once,
+    so remote sources are asked once per resource instead of once per credential.
+    """
+
+    @abstractmethod
+    def fetch(self, resource, names):
+        """
+        Get values of resource credentials.
+
+        :param resource: resource name
+        :param names: list of credential names
+        :returns: dictionary of credential names and values, credentials which are not set are omitted
+        """
+
+    def get(self, full_name):
+        """
+        Get value of credential by full name. Credential name is the part after the last underscore.
+
+        :param full_name: credential full name, for example SVN_CLIENTS_URL
+        :returns: credential value or None
+        """
+        if "_" not in full_name:
+            return None
+        resource, name = full_name.rsplit("_", 1)
+        return self.fetch(resource, [name]).get(name)
+
+    def load(self):
+        """
+        Get all credentials at once, used in snapshot mode.
+
+        :returns: dictionary of credential full names and values
+        """
+        raise CredentialManagerError("%s can not load all credentials" % type(self).__name__)
+
+
+class EnvironmentBackend(CredentialBackend):
+    """
+    Credentials stored as environment variables, the default source of CredentialManager
+    """
+
+    def fetch(self, resource, names):
+        result = {}
+        for name in names:
+            value = os.getenv(resource + "_" + name)
+            if value is not None:
+                result[name] = value
+        return result
+
+    def get(self, full_name):
+        return os.getenv(full_name)
+
+    def load(self):
+        return dict(os.environ)
+
+
+class FileBackend(CredentialBackend):
+    """
+    Credentials stored in a file, re-read when the file is modified.
+
+    Supported formats:
+    - json: {"RESOURCE": {"URL": "..."}} or {"RESOURCE_URL": "..."}
+    - ini: section per resource with credential names as keys
+    - env: lines like 'RESOURCE_URL=...', 'export' prefix, comments and quoted values are allowed
+    """
+
+    def __init__(self, path, format=None):
+        """
+        Initialize.
+
+        :param path: file path
+        :param format: 'json', 'ini' or 'env', guessed from file extension if omitted
+        """
+        if format is None:
+            extension = os.path.splitext(path)[1].lower().lstrip(".")
+            format = {"json": "json", "ini": "ini", "cfg": "ini", "conf": "ini"}.get(extension, "env")
+        if format not in ("json", "ini", "env"):
+            raise CredentialManagerError("Unknown credentials file format '%s'" % format)
+        self.path = path
+        self.format = format
+        self.__credentials = {}
+        self.__mtime = None
+        self.__lock = threading.Lock()
+
+    def __parse_json(self, stream):
+        credentials = {}
+        for key, value in json.load(stream).items():
+            if isinstance(value, dict):
+                for name, credential in value.items():
+                    credentials[key + "_" + name] = credential
+            else:
+                credentials[key] = value
+        return credentials
+
+    def __parse_ini(self, stream):
+        from configparser import ConfigParser
+        parser = ConfigParser(interpolation=None)
+        # credential names are case sensitive
+        parser.optionxform = str
+        parser.read_file(stream)
+        return dict((section + "_" + name, value)
+                    for section in parser.sections() for name, value in parser.items(section))
+
+    def __parse_env(self, stream):
+        credentials = {}
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            if line.startswith("export "):
+                line = line[len("export "):]
+            key, value = line.split("=", 1)
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            credentials[key.strip()] = value
+        return credentials
+
+    def __get_credentials(self):
+        """
+        Get file contents, re-reading it if it was modified.
+
+        :returns: dictionary of credential full names and values
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            raise CredentialManagerError("Credentials file '%s' is not available" % self.path)
+        with self.__lock:
+            if mtime != self.__mtime:
+                parse = {"json": self.__parse_json, "ini": self.__parse_ini, "env": self.__parse_env}[self.format]
+                with open(self.path) as stream:
+                    self.__credentials = parse(stream)
+                self.__mtime = mtime
+            return self.__credentials
+
+    def fetch(self, resource, names):
+        credentials = self.__get_credentials()
+        return dict((name, credentials[resource + "_" + name]) for name in names
+                    if credentials.get(resource + "_" + name) is not None)
+
+    def get(self, full_name):
+        return self.__get_credentials().get(full_name)
+
+    def load(self):
+        return dict(self.__get_credentials())
+
+
+class HttpBackend(CredentialBackend):
+    """
+    Credentials stored in HTTP secret store: all credentials of a resource are read by single GET request.
+
+    Response must be JSON object of credential names and values. Vault-like responses,
+    where values are nested in 'data' (KV v1) or 'data.data' (KV v2), are accepted too.
+    """
+
+    def __init__(self, url, headers=None, timeout=10, resource_case=None):
+        """
+        Initialize.
+
+        :param url: URL template with '{resource}' placeholder, for example 'https://vault:8200/v1/secret/data/{resource}'
+        :param headers: dictionary of request headers, for example {'X-Vault-Token': '...'}
+        :param timeout: request timeout, seconds
+        :param resource_case: 'lower' or 'upper' to convert resource name in URL, kept as is if omitted
+        """
+        if "{resource}" not in url:
+            raise CredentialManagerError("URL template must contain '{resource}' placeholder")
+        self.url = url
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.resource_case = resource_case
+
+    def __request(self, resource):
+        """
+        Read credentials of resource.
+
+        :param resource: resource name
+        :returns: dictionary of credential names and values
+        """
+        from urllib.error import HTTPError, URLError
+        from urllib.parse import quote
+        from urllib.request import Request, urlopen
+        if self.resource_case == "lower":
+            resource = resource.lower()
+        elif self.resource_case == "upper":
+            resource = resource.upper()
+        request = Request(self.url.format(resource=quote(resource, safe="")), headers=self.headers)
+        try:
+            response = urlopen(request, timeout=self.timeout)
+            try:
+                document = json.loads(response.read().decode("utf-8"))
+            finally:
+                response.close()
+        except HTTPError as error:
+            if error.code == 404:
+                return {}
+            raise CredentialManagerError("Secret store request for '%s' failed: %s" % (resource, error))
+        except (URLError, OSError, ValueError) as error:
+            raise CredentialManagerError("Secret store request for '%s' failed: %s" % (resource, error))
+        # Vault KV v2 and v1 responses
+        for _ in range(2):
+            if isinstance(document, dict) and isinstance(document.get("data"), dict):
+                document = document["data"]
+        if not isinstance(document, dict):
+            raise CredentialManagerError("Secret store returned unexpected document for '%s'" % resource)
+        return document
+
+    def fetch(self, resource, names):
+        credentials = self.__request(resource)
+        return dict((name, credentials[name]) for name in names if credentials.get(name) is not None)
+
+
+class ChainBackend(CredentialBackend):
+    """
+    Layered backends: each credential is taken from the first backend which has it
+    """
+
+    def __init__(self, backends):
+        """
+        Initialize.
+
+        :param backends: list of CredentialBackend, the first one has the highest priority
+        """
+        self.backends = list(backends)
+
+    def fetch(self, resource, names):
+        result = {}
+        missing = list(names)
+        for backend in self.backends:
+            if not missing:
+                break
+            result.update(backend.fetch(resource, missing))
+            missing = [name for name in missing if name not in result]
+        return result
+
+    def get(self, full_name):
+        for backend in self.backends:
+            value = backend.get(full_name)
+            if value is not None:
+                return value
+        return None
+
+    def load(self):
+        result = {}
+        for backend in reversed(self.backends):
+            result.update(backend.load())
+        return result
+
+
+class CachingBackend(CredentialBackend):
+    """
+    TTL cache in front of another backend. Missing credentials are cached as well.
+    """
+
+    def __init__(self, backend, ttl=60, names=("URL", "USER", "PASSWORD")):
+        """
+        Initialize.
+
+        :param backend: CredentialBackend to be cached
+        :param ttl: seconds during which cached values are used, None means forever
+        :param names: credential names which are always fetched together, so one request fills the cache for them
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self.names = list(names)
+        self.hits = 0
+        self.misses = 0
+        # resource: (expiration time or None, set of fetched names, dictionary of values)
+        self.__entries = {}
+        self.__lock = threading.Lock()
+
+    def fetch(self, resource, names):
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(resource)
+            if entry is not None and entry[0] is not None and now >= entry[0]:
+                entry = None
+            if entry is not None and all(name in entry[1] for name in names):
+                self.hits += 1
+                return dict((name, entry[2][name]) for name in names if name in entry[2])
+            self.misses += 1
+        requested = [name for name in self.names if name not in names] + list(names)
+        values = self.backend.fetch(resource, requested)
+        with self.__lock:
+            if entry is None:
+                entry = (None if self.ttl is None else now + self.ttl, set(), {})
+            entry[1].update(requested)
+            entry[2].update(values)
+            self.__entries[resource] = entry
+        return dict((name, values[name]) for name in names if name in values)
+
+    def invalidate(self, resource=None):
+        """
+        Drop cached credentials.
+
+        :param resource: resource name, all resources if omitted
+        """
+        with self.__lock:
+            if resource is None:
+                self.__entries.clear()
+            else:
+                self.__entries.pop(resource, None)
+
+    def load(self):
+        return self.backend.load()
@@ -1,12 +1,19 @@
 import os
+import signal
+import threading
+import time
+from types import MappingProxyType
 
 
 class CredentialManager(object):
     """
     Class for managing credentials.
     
-    All credentials are stored as environment variables and may be overridden at instance level.
+    All credentials are stored as environment variables (or in a CredentialBackend) and may be overridden at instance level.
     Full credential name consists of resource name and credential name separated by underscore. For example: SVN_CLIENTS_URL - where SVN_CLIENTS is a resource name and URL is a credential name
+
+    In snapshot mode all credentials are read once into an immutable index, which is used for lookups until refreshed.
+    Overridden values take precedence over the snapshot.
     """
 
     @staticmethod
@@ -20,8 +27,132 @@ class CredentialManager(object):
         """
         return resource + "_" + name
 
-    def __init__(self):
+    def __init__(self, snapshot=False, snapshot_ttl=None, backend=None):
+        """
+        Initialize.
+
+        :param snapshot: read all credentials once and serve lookups from the snapshot
+        :param snapshot_ttl: seconds after which snapshot is re-read on next lookup, None means never
+        :param backend: CredentialBackend to read credentials from instead of environment variables
+        """
+        self.__backend = backend
         self.__forced_credentials = {}
+        self.__listeners = []
+        self.__snapshot = None
+        self.__snapshot_ttl = snapshot_ttl
+        self.__snapshot_expires = None
+        self.__snapshot_lock = threading.Lock()
+        if snapshot:
+            self.refresh_snapshot()
+
+    def _load_credentials(self):
+        """
+        Protected method for retrieval of all credentials at once, used in snapshot mode.
+        Note: Subclasses reading other sources should override it along with '_get_credential_value'.
+
+        :returns: dictionary of credential full names and values
+        """
+        if self.__backend is not None:
+            return self.__backend.load()
+        return dict(os.environ)
+
+    @property
+    def backend(self):
+        """
+        CredentialBackend used by this manager or None if environment variables are read directly
+        """
+        return self.__backend
+
+    @property
+    def snapshot(self):
+        """
+        Immutable mapping of credential full names and values, None if snapshot mode is disabled
+        """
+        return self.__snapshot
+
+    def refresh_snapshot(self):
+        """
+        Re-read all credentials into snapshot. Enables snapshot mode if it is disabled.
+        """
+        self.__refresh_snapshot(True)
+
+    def __refresh_snapshot(self, enable):
+        """
+        Re-read all credentials into snapshot.
+
+        :param enable: enable snapshot mode if it is disabled, otherwise only existing snapshot is replaced
+        """
+        snapshot = MappingProxyType(dict(self._load_credentials()))
+        with self.__snapshot_lock:
+            if enable or self.__snapshot is not None:
+                self.__snapshot = snapshot
+                self.__snapshot_expires = None if self.__snapshot_ttl is None \
+                    else time.monotonic() + self.__snapshot_ttl
+
+    def drop_snapshot(self):
+        """
+        Disable snapshot mode: credentials are read from the source on every lookup.
+        """
+        with self.__snapshot_lock:
+            self.__snapshot = None
+            self.__snapshot_expires = None
+
+    def refresh_snapshot_on_signal(self, signum=getattr(signal, "SIGHUP", None)):
+        """
+        Install signal handler which expires snapshot, so it is re-read on next lookup.
+        Must be called from the main thread.
+
+        :param signum: signal number, SIGHUP by default
+        """
+        if signum is None:
+            raise CredentialManagerError("signal number must be given on this platform")
+        signal.signal(signum, lambda received_signum, frame: self.__expire_snapshot())
+
+    def __expire_snapshot(self):
+        """
+        Make next lookup re-read snapshot, if snapshot mode is enabled.
+        Called from signal handler, so it neither reads credentials nor takes snapshot lock held by interrupted code.
+        """
+        if self.__snapshot is not None:
+            self.__snapshot_expires = 0
+
+    def __get_snapshot(self):
+        """
+        Get actual snapshot, re-reading it if it is expired.
+
+        :returns: snapshot mapping or None
+        """
+        expires = self.__snapshot_expires
+        if expires is not None and time.monotonic() >= expires:
+            # snapshot may be dropped meanwhile, expiration must not enable snapshot mode again
+            self.__refresh_snapshot(False)
+        return self.__snapshot
+
+    def add_listener(self, listener):
+        """
+        Register callback which is called when overriding value of credential is changed.
+
+        :param listener: callable(resource, name)
+        """
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Unregister callback registered by 'add_listener'.
+
+        :param listener: callable(resource, name)
+        """
+        self.__listeners.remove(listener)
+
+    def _notify_listeners(self, resource, name):
+        """
+        Protected method which informs listeners about credential change.
+
+        :param resource: resource name
+        :param name: credential name
+        """
+        for listener in list(self.__listeners):
+            listener(resource, name)
 
     def _get_credential_value(self, full_name):
         """
@@ -30,7 +161,11 @@ class CredentialManager(object):
         :param full_name: credential full name
         :returns: credential value
         """
-        return self.__forced_credentials.get(full_name, os.getenv(full_name))
+        if full_name in self.__forced_credentials:
+            return self.__forced_credentials[full_name]
+        if self.__backend is not None:
+            return self.__backend.get(full_name)
+        return os.getenv(full_name)
 
     def get_credential(self, resource, name):
         """
@@ -40,8 +175,22 @@ class CredentialManager(object):
         :param name: credential name
         :returns: credential value
         """
-        full_name = CredentialManager.__get_full_name(resource, name)
-        return self._get_credential_value(full_name)
+        return self.__lookup(CredentialManager.__get_full_name(resource, name), self.__get_snapshot())
+
+    def __lookup(self, full_name, snapshot):
+        """
+        Get credential value from overriding values, snapshot or credentials source.
+
+        :param full_name: credential full name
+        :param snapshot: snapshot mapping or None
+        :returns: credential value
+        """
+        if snapshot is None:
+            return self._get_credential_value(full_name)
+        forced_credentials = self.__forced_credentials
+        if full_name in forced_credentials:
+            return forced_credentials[full_name]
+        return snapshot.get(full_name)
 
     def get_credentials(self, resource, names):
         """
@@ -53,7 +202,20 @@ class CredentialManager(object):
         """
         if not isinstance(names, list):
             raise CredentialManagerError("names parameter must be instance of list")
-        return [self.get_credential(resource, name) for name in names]
+        if type(self).get_credential is not CredentialManager.get_credential:
+            # subclass lookup takes precedence over batched reading
+            return [self.get_credential(resource, name) for name in names]
+        snapshot = self.__get_snapshot()
+        full_names = [CredentialManager.__get_full_name(resource, name) for name in names]
+        if snapshot is None and self.__backend is not None and type(self)._get_credential_value is \
+                CredentialManager._get_credential_value:
+            # all credentials which are not overridden are fetched from backend at once
+            forced_credentials = self.__forced_credentials
+            missing = [name for name, full_name in zip(names, full_names) if full_name not in forced_credentials]
+            fetched = self.__backend.fetch(resource, missing) if missing else {}
+            return [forced_credentials[full_name] if full_name in forced_credentials else fetched.get(name)
+                    for name, full_name in zip(names, full_names)]
+        return [self.__lookup(full_name, snapshot) for full_name in full_names]
 
     def override_credential(self, resource, name, value):
         """
@@ -64,7 +226,10 @@ class CredentialManager(object):
         :param value: overriding value
         """
         full_name = CredentialManager.__get_full_name(resource, name)
+        changed = full_name not in self.__forced_credentials or self.__forced_credentials[full_name] != value
         self.__forced_credentials[full_name] = value
+        if changed:
+            self._notify_listeners(resource, name)
 
     def reset_credential(self, resource, name):
         """
@@ -74,7 +239,9 @@ class CredentialManager(object):
         :param name: credential name
         """
         full_name = CredentialManager.__get_full_name(resource, name)
-        self.__forced_credentials.pop(full_name, None)
+        if full_name in self.__forced_credentials:
+            del self.__forced_credentials[full_name]
+            self._notify_listeners(resource, name)
 
     def reset_credentials(self, resource, names):
         """
@@ -0,0 +1,361 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+def _is_session_error(error):
+    """
+    Tells if error means that FTP session is broken and must not be used any more.
+    Local file errors do not get here, so OSError comes from control or data socket.
+
+    :param error: exception raised during transfer
+    :returns: True if session must be discarded
+    """
+    from ftplib import error_proto, error_temp
+    return isinstance(error, (OSError, EOFError, error_temp, error_proto))
+
+
+class _LocalFileError(Exception):
+    """
+    Error of local file operation. It is not retried, since a new session does not help.
+    """
+
+    def __init__(self, error, broken):
+        """
+        Initialize.
+
+        :param error: original OSError
+        :param broken: error interrupted data transfer, so session has unread reply and must be discarded
+        """
+        super(_LocalFileError, self).__init__(error)
+        self.error = error
+        self.broken = broken
+
+
+@contextmanager
+def _local_file(broken=False):
+    """
+    Marks OSError raised in block as local file error.
+
+    :param broken: block runs during data transfer
+    """
+    try:
+        yield
+    except OSError as error:
+        raise _LocalFileError(error, broken)
+
+
+class _LocalReader(object):
+    """
+    File object wrapper for upload, read errors are marked as local ones.
+    """
+
+    def __init__(self, stream):
+        self.__stream = stream
+
+    def read(self, size=-1):
+        with _local_file(broken=True):
+            return self.__stream.read(size)
+
+
+def _remote_size(session, remote):
+    """
+    Get size of remote file.
+
+    :param session: ftplib.FTP
+    :param remote: remote path
+    :returns: size in bytes or None if file does not exist or server does not support SIZE
+    """
+    from ftplib import error_perm
+    session.voidcmd("TYPE I")
+    try:
+        return session.size(remote)
+    except error_perm:
+        return None
+
+
+class TransferResult(object):
+    """
+    Result of transferring single file
+    """
+    __slots__ = ("remote", "local", "offset", "bytes", "seconds", "error")
+
+    def __init__(self, remote, local):
+        """
+        Initialize.
+
+        :param remote: remote path
+        :param local: local path or None if downloaded data is passed to callback only
+        """
+        self.remote = remote
+        self.local = local
+        # position from which transfer was resumed
+        self.offset = 0
+        # bytes transferred over network, including ones sent by retries
+        self.bytes = 0
+        self.seconds = 0.0
+        self.error = None
+
+    @property
+    def success(self):
+        return self.error is None
+
+    @property
+    def throughput(self):
+        """
+        Bytes per second
+        """
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return "TransferResult(%r, %r, offset=%d, bytes=%d, seconds=%.3f, error=%r)" % (
+            self.remote, self.local, self.offset, self.bytes, self.seconds, self.error)
+
+
+class TransferReport(object):
+    """
+    Results and statistics of transferring several files
+    """
+
+    def __init__(self, results, seconds):
+        """
+        Initialize.
+
+        :param results: list of TransferResult in order of requested files
+        :param seconds: wall clock time of the whole transfer
+        """
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def bytes(self):
+        """
+        Bytes transferred over all sessions
+        """
+        return sum(result.bytes for result in self.results)
+
+    @property
+    def throughput(self):
+        """
+        Overall bytes per second
+        """
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    @property
+    def failed(self):
+        """
+        Results of files which were not transferred
+        """
+        return [result for result in self.results if not result.success]
+
+    @property
+    def success(self):
+        return not self.failed
+
+    def __repr__(self):
+        return "TransferReport(files=%d, failed=%d, bytes=%d, seconds=%.3f)" % (
+            len(self.results), len(self.failed), self.bytes, self.seconds)
+
+
+class FtpTransfer(object):
+    """
+    Transfers many files over several concurrent FTP sessions taken from a pool.
+
+    Data is streamed block by block, nothing is buffered in memory. Partially transferred files are resumed
+    with REST, which is also used to continue a file after its session was dropped.
+    """
+
+    def __init__(self, pool, blocksize=65536, retries=1):
+        """
+        Initialize.
+
+        :param pool: ConnectionPool of logged in ftplib.FTP sessions, see 'ConnectionManager.get_ftp_pool'
+        :param blocksize: size of block read from socket or local file
+        :param retries: number of times a file is continued over a new session if its session is broken
+        """
+        self.__pool = pool
+        self.blocksize = blocksize
+        self.retries = retries
+
+    @property
+    def pool(self):
+        """
+        Pool sessions are taken from
+        """
+        return self.__pool
+
+    def download(self, files, sessions=None, callback=None, resume=True):
+        """
+        Download files concurrently.
+
+        :param files: iterable of (remote, local) pairs; local may be None if data is consumed by callback only
+        :param sessions: number of sessions used at once, pool max_size by default
+        :param callback: callable(remote, block) called for every received block
+        :param resume: continue existing local files from their size instead of downloading them again
+        :returns: TransferReport
+        """
+        return self.__run(files, sessions, callback, resume, self.__download_one)
+
+    def upload(self, files, sessions=None, callback=None, resume=True):
+        """
+        Upload files concurrently. Remote directories must exist.
+
+        :param files: iterable of (remote, local) pairs
+        :param sessions: number of sessions used at once, pool max_size by default
+        :param callback: callable(remote, block) called for every sent block
+        :param resume: continue existing remote files from their size instead of uploading them again
+        :returns: TransferReport
+        """
+        return self.__run(files, sessions, callback, resume, self.__upload_one)
+
+    def __download_one(self, session, result, callback, resume):
+        """
+        Downloads single file.
+
+        :param session: ftplib.FTP
+        :param result: TransferResult to be updated
+        :param callback: callable(remote, block) or None
+        :param resume: continue from local file size (or from already received data if there is no local file)
+        :returns: position transfer was started from
+        """
+        offset = 0
+        if resume:
+            if result.local:
+                with _local_file():
+                    offset = os.path.getsize(result.local) if os.path.isfile(result.local) else 0
+            else:
+                offset = result.offset + result.bytes
+        if offset:
+            size = _remote_size(session, result.remote)
+            if size == offset:
+                return offset
+            if size is not None and size < offset:
+                # local file is not a part of remote one
+                offset = 0
+        stream = None
+        if result.local:
+            with _local_file():
+                directory = os.path.dirname(result.local)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                stream = open(result.local, "ab" if offset else "wb")
+                stream.truncate(offset)
+
+        def on_block(block):
+            if stream is not None:
+                with _local_file(broken=True):
+                    stream.write(block)
+            result.bytes += len(block)
+            if callback is not None:
+                callback(result.remote, block)
+
+        try:
+            session.retrbinary("RETR " + result.remote, on_block, self.blocksize, offset or None)
+        finally:
+            if stream is not None:
+                with _local_file():
+                    stream.close()
+        return offset
+
+    def __upload_one(self, session, result, callback, resume):
+        """
+        Uploads single file.
+
+        :param session: ftplib.FTP
+        :param result: TransferResult to be updated
+        :param callback: callable(remote, block) or None
+        :param resume: continue from remote file size
+        :returns: position transfer was started from
+        """
+        with _local_file():
+            size = os.path.getsize(result.local)
+        remote_size = _remote_size(session, result.remote) if resume else None
+        if remote_size == size:
+            return size
+        offset = remote_size if remote_size and remote_size < size else 0
+
+        def on_block(block):
+            result.bytes += len(block)
+            if callback is not None:
+                callback(result.remote, block)
+
+        with _local_file():
+            stream = open(result.local, "rb")
+        with stream:
+            stream.seek(offset)
+            session.storbinary("STOR " + result.remote, _LocalReader(stream), self.blocksize, on_block,
+                               offset or None)
+        return offset
+
+    def __transfer(self, session, result, callback, resume, transfer_one):
+        """
+        Transfers single file, resuming it over a new session if current one is broken.
+
+        :param session: checked out session or None if it must be checked out
+        :param result: TransferResult to be updated
+        :param callback: callable(remote, block) or None
+        :param resume: defines if first attempt continues existing file
+        :param transfer_one: method transferring file over session
+        :returns: session to be used further or None
+        """
+        start = time.monotonic()
+        for attempt in range(self.retries + 1):
+            try:
+                if session is None:
+                    session = self.__pool.acquire()
+                offset = transfer_one(session, result, callback, resume or attempt > 0)
+                if not attempt:
+                    result.offset = offset
+                result.error = None
+                break
+            except _LocalFileError as error:
+                result.error = error.error
+                if error.broken and session is not None:
+                    self.__pool.release(session, discard=True)
+                    session = None
+                break
+            except Exception as error:
+                result.error = error
+                if session is None or not _is_session_error(error):
+                    break
+                self.__pool.release(session, discard=True)
+                session = None
+        result.seconds = time.monotonic() - start
+        return session
+
+    def __run(self, files, sessions, callback, resume, transfer_one):
+        """
+        Transfers files by workers, each of them holds one session and takes files one by one.
+
+        :returns: TransferReport
+        """
+        start = time.monotonic()
+        results = [TransferResult(remote, local) for remote, local in files]
+        if not results:
+            return TransferReport(results, 0.0)
+        pending = iter(results)
+        pending_lock = threading.Lock()
+
+        def next_result():
+            with pending_lock:
+                return next(pending, None)
+
+        def worker():
+            session = None
+            try:
+                while True:
+                    result = next_result()
+                    if result is None:
+                        break
+                    session = self.__transfer(session, result, callback, resume, transfer_one)
+            finally:
+                if session is not None:
+                    self.__pool.release(session)
+
+        workers = min(sessions or self.__pool.max_size, len(results))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(worker) for _ in range(workers)]:
+                future.result()
+        return TransferReport(results, time.monotonic() - start)
@@ -0,0 +1,191 @@
+import threading
+
+# Upper bounds of latency histogram buckets, seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label(value):
+    """
+    Escapes label value for Prometheus text format.
+
+    :param value: label value
+    :returns: escaped string
+    """
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    """
+    Formats labels for Prometheus text format.
+
+    :param labels: list of (name, value) pairs
+    :returns: string like '{name="value"}'
+    """
+    return "{%s}" % ",".join("%s=\"%s\"" % (name, _escape_label(value)) for name, value in labels)
+
+
+class Histogram(object):
+    """
+    Latency histogram with fixed buckets
+    """
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize.
+
+        :param buckets: sorted upper bounds of buckets
+        """
+        self.buckets = buckets
+        # counts per bucket, not cumulative; the last one is for values above all bounds
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """
+        Add value to histogram.
+
+        :param value: seconds
+        """
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        """
+        Estimate percentile as upper bound of bucket containing it.
+
+        :param percent: percentile, from 0 to 100
+        :returns: seconds or None if histogram is empty
+        """
+        if not self.count:
+            return None
+        rank = percent / 100.0 * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+
+class MetricsCollector(object):
+    """
+    In-memory collector of ConnectionManager client events.
+
+    Use it as observer: 'connection_manager.add_observer(collector)'. Timings are kept in histograms
+    per client kind, resource and stage, failures are counted per exception type.
+    """
+
+    def __init__(self, connection_manager=None, buckets=DEFAULT_BUCKETS, prefix="oc_connections"):
+        """
+        Initialize.
+
+        :param connection_manager: ConnectionManager which pool sizes are exported as active clients, may be omitted
+        :param buckets: sorted upper bounds of histogram buckets, seconds
+        :param prefix: prefix of exported metric names
+        """
+        self.connection_manager = connection_manager
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self.__histograms = {}
+        self.__errors = {}
+        self.__lock = threading.Lock()
+
+    def __call__(self, event):
+        """
+        Record event.
+
+        :param event: ConnectionManager.ClientEvent
+        """
+        key = (event.kind, event.resource, event.stage)
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = Histogram(self.buckets)
+            histogram.observe(event.seconds)
+            if event.error is not None:
+                error_key = key + (type(event.error).__name__,)
+                self.__errors[error_key] = self.__errors.get(error_key, 0) + 1
+
+    def histogram(self, kind, resource, stage="total"):
+        """
+        Get histogram of stage timings.
+
+        :param kind: client kind
+        :param resource: resource name
+        :param stage: stage name
+        :returns: Histogram or None if there were no such events
+        """
+        return self.__histograms.get((kind, resource, stage))
+
+    def errors(self, kind=None, resource=None, stage="total"):
+        """
+        Count failures.
+
+        :param kind: client kind, all kinds if None
+        :param resource: resource name, all resources if None
+        :param stage: stage name, all stages if None
+        :returns: number of failed events
+        """
+        with self.__lock:
+            items = list(self.__errors.items())
+        return sum(count for (error_kind, error_resource, error_stage, _), count in items
+                   if kind in (None, error_kind) and resource in (None, error_resource)
+                   and stage in (None, error_stage))
+
+    def reset(self):
+        """
+        Drop all collected data.
+        """
+        with self.__lock:
+            self.__histograms.clear()
+            self.__errors.clear()
+
+    def to_prometheus(self):
+        """
+        Export collected data in Prometheus text exposition format.
+
+        :returns: string
+        """
+        with self.__lock:
+            histograms = sorted((key, histogram.counts[:], histogram.count, histogram.sum)
+                                for key, histogram in self.__histograms.items())
+            errors = sorted(self.__errors.items())
+        lines = []
+        name = self.prefix + "_client_seconds"
+        lines.append("# HELP %s Time spent by ConnectionManager client factory stages" % name)
+        lines.append("# TYPE %s histogram" % name)
+        for (kind, resource, stage), counts, count, total in histograms:
+            labels = [("kind", kind), ("resource", resource), ("stage", stage)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append("%s_bucket%s %d" % (name, _format_labels(labels + [("le", repr(float(bound)))]),
+                                                 cumulative))
+            lines.append("%s_bucket%s %d" % (name, _format_labels(labels + [("le", "+Inf")]), count))
+            lines.append("%s_sum%s %r" % (name, _format_labels(labels), total))
+            lines.append("%s_count%s %d" % (name, _format_labels(labels), count))
+        name = self.prefix + "_client_errors_total"
+        lines.append("# HELP %s Failed ConnectionManager client factory stages" % name)
+        lines.append("# TYPE %s counter" % name)
+        for (kind, resource, stage, error), count in errors:
+            lines.append("%s%s %d" % (name, _format_labels(
+                [("kind", kind), ("resource", resource), ("stage", stage), ("error", error)]), count))
+        if self.connection_manager is not None:
+            name = self.prefix + "_pool_clients"
+            lines.append("# HELP %s Clients kept by ConnectionManager pools" % name)
+            lines.append("# TYPE %s gauge" % name)
+            for (kind, resource), stats in sorted(self.connection_manager.get_pool_stats().items()):
+                for state in ("idle", "in_use"):
+                    lines.append("%s%s %d" % (name, _format_labels(
+                        [("kind", kind), ("resource", resource), ("state", state)]), stats[state]))
+        return "\n".join(lines) + "\n"
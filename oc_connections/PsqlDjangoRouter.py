@@ -0,0 +1,80 @@
+import itertools
+
+
+class PsqlDjangoRouter(object):
+    """
+    Django database router for DATABASES built by 'ConnectionManager.get_psql_django_configuration'.
+
+    Writes, relations and migrations go to the primary alias. Reads are spread over replica aliases
+    (the ones mirroring the primary in their TEST settings) by round-robin; an object loaded from
+    some alias is read from it again, so related objects are consistent.
+    Django accepts router instances, so it is put into settings as 'DATABASE_ROUTERS = [PsqlDjangoRouter(DATABASES)]'.
+    """
+
+    def __init__(self, databases, primary="default"):
+        """
+        Initialize.
+
+        :param databases: DATABASES dictionary
+        :param primary: alias of the primary database
+        """
+        if primary not in databases:
+            raise PsqlDjangoRouterError("There is no '%s' alias in databases" % primary)
+        self.primary = primary
+        self.replicas = sorted(alias for alias, settings in databases.items()
+                               if alias != primary and settings.get("TEST", {}).get("MIRROR") == primary)
+        self.__aliases = set(self.replicas + [primary])
+        self.__counter = itertools.count()
+
+    def db_for_read(self, model, **hints):
+        """
+        Choose alias for reading model.
+
+        :param model: model class
+        :param hints: Django hints, 'instance' is the object being read relative to
+        :returns: alias
+        """
+        instance = hints.get("instance")
+        if instance is not None and getattr(instance._state, "db", None) in self.__aliases:
+            return instance._state.db
+        if not self.replicas:
+            return self.primary
+        return self.replicas[next(self.__counter) % len(self.replicas)]
+
+    def db_for_write(self, model, **hints):
+        """
+        Choose alias for writing model.
+
+        :param model: model class
+        :param hints: Django hints
+        :returns: primary alias
+        """
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        Relations are allowed between objects of the primary database and its replicas.
+
+        :returns: True if both objects come from the same data, None if router has no opinion
+        """
+        if obj1._state.db in self.__aliases and obj2._state.db in self.__aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+        Migrations are applied to the primary database only, replicas receive them by replication.
+
+        :param db: alias
+        :returns: False for replicas, None if router has no opinion
+        """
+        if db in self.replicas:
+            return False
+        return None
+
+
+class PsqlDjangoRouterError(Exception):
+    """
+    PsqlDjangoRouter exception
+    """
+    pass
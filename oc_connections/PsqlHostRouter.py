@@ -0,0 +1,122 @@
+import itertools
+import threading
+import time
+
+
+class PsqlHostRouter(object):
+    """
+    Chooses PostgreSQL server of multi-host resource for new connection.
+
+    Writes go to the primary server; it is the first listed host until another one is found to be the primary
+    (for example, after replica promotion). Reads go to replicas, ordered by round-robin or by connect latency,
+    the primary serves reads only if no replica is available. Hosts which failed recently are tried last.
+    """
+    ROUND_ROBIN = "round_robin"
+    LATENCY = "latency"
+
+    def __init__(self, hosts, strategy=ROUND_ROBIN, failure_timeout=30, latency_weight=0.3):
+        """
+        Initialize.
+
+        :param hosts: list of (host, port) pairs in order of the URL
+        :param strategy: PsqlHostRouter.ROUND_ROBIN or PsqlHostRouter.LATENCY, order of replicas for reads
+        :param failure_timeout: seconds during which failed host is tried after the others
+        :param latency_weight: weight of the latest connect time in moving average latency
+        """
+        if not hosts:
+            raise PsqlHostRouterError("At least one host is required")
+        if strategy not in (PsqlHostRouter.ROUND_ROBIN, PsqlHostRouter.LATENCY):
+            raise PsqlHostRouterError("Unknown routing strategy '%s'" % strategy)
+        self.hosts = list(hosts)
+        self.strategy = strategy
+        self.failure_timeout = failure_timeout
+        self.latency_weight = latency_weight
+        self.__primary = self.hosts[0]
+        self.__replicas = set()
+        self.__latencies = {}
+        self.__failures = {}
+        self.__counter = itertools.count()
+        self.__lock = threading.Lock()
+
+    @property
+    def primary(self):
+        """
+        (host, port) of the server known as primary
+        """
+        return self.__primary
+
+    @property
+    def replicas(self):
+        """
+        List of (host, port) of servers known as replicas
+        """
+        return [host for host in self.hosts if host in self.__replicas]
+
+    def latency(self, host):
+        """
+        Get moving average connect time of host.
+
+        :param host: (host, port)
+        :returns: seconds or None if host was not connected yet
+        """
+        return self.__latencies.get(host)
+
+    def candidates(self, readonly=False):
+        """
+        Get hosts to be tried for new connection, in order of preference.
+
+        :param readonly: connection is used for reads only
+        :returns: list of (host, port)
+        """
+        now = time.monotonic()
+        with self.__lock:
+            primary = self.__primary
+            others = [host for host in self.hosts if host != primary]
+            if readonly:
+                if self.strategy == PsqlHostRouter.LATENCY:
+                    # hosts which were not measured yet are tried first, so every host gets measured
+                    others.sort(key=lambda host: self.__latencies.get(host, 0.0))
+                elif others:
+                    shift = next(self.__counter) % len(others)
+                    others = others[shift:] + others[:shift]
+                ordered = others + [primary]
+            else:
+                ordered = [primary] + others
+            failed = [host for host in ordered if now - self.__failures.get(host, -self.failure_timeout)
+                      < self.failure_timeout]
+        return [host for host in ordered if host not in failed] + failed
+
+    def record_success(self, host, seconds, primary):
+        """
+        Record successful connect.
+
+        :param host: (host, port)
+        :param seconds: connect time
+        :param primary: True if server accepts writes
+        """
+        with self.__lock:
+            self.__failures.pop(host, None)
+            latency = self.__latencies.get(host)
+            self.__latencies[host] = seconds if latency is None else \
+                latency + self.latency_weight * (seconds - latency)
+            if primary:
+                self.__primary = host
+                self.__replicas.discard(host)
+            else:
+                self.__replicas.add(host)
+
+    def record_failure(self, host):
+        """
+        Record failed connect, host is tried last during 'failure_timeout'.
+
+        :param host: (host, port)
+        """
+        with self.__lock:
+            self.__failures[host] = time.monotonic()
+
+
+class PsqlHostRouterError(Exception):
+    """
+    PsqlHostRouter exception
+    """
+    pass
@@ -0,0 +1,270 @@
+import io
+import itertools
+import json
+import threading
+import time
+from queue import Queue, Full, Empty
+
+from .PsqlStream import _quote_identifier
+
+# Characters escaped in text format of COPY
+_COPY_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+
+
+def _array_literal(values):
+    """
+    Format sequence as PostgreSQL array literal, the same ARRAY psycopg2 sends for lists.
+
+    :param values: list or tuple, nested sequences are sub-arrays
+    :returns: string, for example '{1,NULL,"a b"}'
+    """
+    items = []
+    for value in values:
+        if value is None:
+            items.append("NULL")
+        elif isinstance(value, (list, tuple)):
+            items.append(_array_literal(value))
+        elif isinstance(value, bool):
+            items.append("t" if value else "f")
+        elif isinstance(value, (int, float)):
+            items.append(str(value))
+        else:
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                value = "\\x" + bytes(value).hex()
+            elif isinstance(value, dict):
+                value = json.dumps(value)
+            items.append('"%s"' % str(value).replace("\\", "\\\\").replace('"', '\\"'))
+    return "{%s}" % ",".join(items)
+
+
+def _copy_value(value):
+    """
+    Format value for text format of COPY.
+
+    :param value: Python value
+    :returns: string
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea hex format, backslash is escaped by COPY
+        return "\\\\x" + bytes(value).hex()
+    if isinstance(value, (list, tuple)):
+        value = _array_literal(value)
+    elif isinstance(value, dict):
+        value = json.dumps(value)
+    return "".join(_COPY_ESCAPES.get(char, char) for char in str(value))
+
+
+class LoadResult(object):
+    """
+    Result of loading records into a table
+    """
+    __slots__ = ("table", "rows", "batches", "seconds", "error", "_lock")
+
+    def __init__(self, table):
+        """
+        Initialize.
+
+        :param table: table name
+        """
+        self.table = table
+        # rows and batches committed
+        self.rows = 0
+        self.batches = 0
+        self.seconds = 0.0
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def success(self):
+        return self.error is None
+
+    @property
+    def rows_per_second(self):
+        """
+        Committed rows per second
+        """
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __repr__(self):
+        return "LoadResult(%r, rows=%d, batches=%d, seconds=%.3f, error=%r)" % (
+            self.table, self.rows, self.batches, self.seconds, self.error)
+
+
+class PsqlLoader(object):
+    """
+    Loads large amounts of records into PostgreSQL table over pooled connections.
+
+    Records are split into batches, each batch is written by single COPY FROM STDIN or INSERT ... VALUES
+    statement and committed, so failed load leaves the batches committed before the failure.
+    With several workers batches are written concurrently over separate connections; records are read
+    only as fast as workers write them, so iterables of any size may be loaded.
+    """
+    COPY = "copy"
+    VALUES = "values"
+
+    def __init__(self, pool, table, columns=None, method=COPY, batch_size=10000, workers=1):
+        """
+        Initialize.
+
+        :param pool: ConnectionPool of psycopg2 connections, see 'ConnectionManager.get_psql_pool'
+        :param table: table name, may be schema-qualified
+        :param columns: list of column names; keys of the first record are used for dictionaries by default,
+            all table columns in their order are expected for tuples
+        :param method: PsqlLoader.COPY or PsqlLoader.VALUES ('INSERT ... VALUES' by psycopg2.extras.execute_values)
+        :param batch_size: number of records written by single statement
+        :param workers: number of concurrent connections
+        """
+        if method not in (PsqlLoader.COPY, PsqlLoader.VALUES):
+            raise PsqlLoaderError("Unknown load method '%s'" % method)
+        if batch_size < 1 or workers < 1:
+            raise PsqlLoaderError("batch_size and workers must be positive")
+        self.__pool = pool
+        self.table = table
+        self.columns = list(columns) if columns else None
+        self.method = method
+        self.batch_size = batch_size
+        self.workers = workers
+
+    @property
+    def pool(self):
+        """
+        Pool connections are taken from
+        """
+        return self.__pool
+
+    def __batches(self, records):
+        """
+        Split records into lists of tuples.
+
+        :param records: iterable of tuples or dictionaries
+        :returns: generator of (columns, list of tuples)
+        """
+        records = iter(records)
+        columns = self.columns
+        while True:
+            batch = list(itertools.islice(records, self.batch_size))
+            if not batch:
+                return
+            if isinstance(batch[0], dict):
+                if columns is None:
+                    columns = list(batch[0])
+                batch = [tuple(record[column] for column in columns) for record in batch]
+            yield columns, batch
+
+    def __write(self, connection, columns, batch):
+        """
+        Write batch and commit it.
+
+        :param connection: psycopg2 connection
+        :param columns: list of column names or None
+        :param batch: list of tuples
+        """
+        target = _quote_identifier(self.table)
+        if columns:
+            target += " (%s)" % ", ".join(_quote_identifier(column) for column in columns)
+        cursor = connection.cursor()
+        try:
+            if self.method == PsqlLoader.COPY:
+                data = io.StringIO("".join("\t".join(_copy_value(value) for value in row) + "\n" for row in batch))
+                cursor.copy_expert("COPY %s FROM STDIN WITH (FORMAT text)" % target, data)
+            else:
+                from psycopg2.extras import execute_values
+                execute_values(cursor, "INSERT INTO %s VALUES %%s" % target, batch, page_size=len(batch))
+        finally:
+            cursor.close()
+        connection.commit()
+
+    def load(self, records, callback=None):
+        """
+        Load records.
+
+        :param records: iterable of tuples or dictionaries, consumed lazily
+        :param callback: callable(LoadResult) called after every committed batch
+        :returns: LoadResult, loading stops on the first error which is stored in result
+        """
+        result = LoadResult(self.table)
+        start = time.monotonic()
+
+        def written(rows):
+            with result._lock:
+                result.rows += rows
+                result.batches += 1
+                result.seconds = time.monotonic() - start
+            if callback is not None:
+                callback(result)
+
+        try:
+            if self.workers == 1:
+                with self.__pool.connection() as connection:
+                    for columns, batch in self.__batches(records):
+                        self.__write(connection, columns, batch)
+                        written(len(batch))
+            else:
+                self.__load_concurrently(records, written)
+        except Exception as error:
+            result.error = error
+        result.seconds = time.monotonic() - start
+        return result
+
+    def __load_concurrently(self, records, written):
+        """
+        Load records by several workers, each using its own connection.
+
+        :param records: iterable of tuples or dictionaries
+        :param written: callable(rows) called after every committed batch
+        """
+        # batches are handed over through bounded queue, so records are not read far ahead of workers
+        batches = Queue(self.workers * 2)
+        stop = threading.Event()
+        errors = []
+
+        def worker():
+            try:
+                with self.__pool.connection() as connection:
+                    while not stop.is_set():
+                        try:
+                            item = batches.get(timeout=0.1)
+                        except Empty:
+                            continue
+                        if item is None:
+                            break
+                        self.__write(connection, *item)
+                        written(len(item[1]))
+            except Exception as error:
+                errors.append(error)
+                stop.set()
+
+        threads = [threading.Thread(target=worker, name="PsqlLoader") for _ in range(self.workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            for item in itertools.chain(self.__batches(records), [None] * len(threads)):
+                while not stop.is_set():
+                    try:
+                        batches.put(item, timeout=0.1)
+                        break
+                    except Full:
+                        pass
+                if stop.is_set():
+                    break
+        except Exception:
+            # records can not be read, workers drop the rest of queued batches
+            stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+
+
+class PsqlLoaderError(Exception):
+    """
+    PsqlLoader exception
+    """
+    pass
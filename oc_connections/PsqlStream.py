@@ -0,0 +1,199 @@
+import itertools
+import threading
+
+# COPY formats understood by PostgreSQL
+_COPY_FORMATS = ("text", "csv", "binary")
+
+# Server-side cursor names must be unique per connection
+_CURSOR_NUMBERS = itertools.count()
+_CURSOR_NUMBERS_LOCK = threading.Lock()
+
+
+def _cursor_name():
+    """
+    Get unique name of server-side cursor.
+
+    :returns: string
+    """
+    with _CURSOR_NUMBERS_LOCK:
+        return "oc_stream_%d" % next(_CURSOR_NUMBERS)
+
+
+def _quote_identifier(name):
+    """
+    Quote possibly schema-qualified table or column name.
+
+    :param name: name, for example 'schema.table'
+    :returns: quoted name
+    """
+    return ".".join('"%s"' % part.replace('"', '""') for part in name.split("."))
+
+
+def _copy_options(format, header):
+    """
+    Build WITH clause of COPY statement.
+
+    :param format: 'text', 'csv' or 'binary'
+    :param header: first line is header, 'csv' only
+    :returns: string
+    """
+    if format not in _COPY_FORMATS:
+        raise PsqlStreamError("Unknown COPY format '%s'" % format)
+    if header and format != "csv":
+        raise PsqlStreamError("Header is supported by 'csv' format only")
+    return "WITH (FORMAT %s%s)" % (format, ", HEADER true" if header else "")
+
+
+class PsqlStream(object):
+    """
+    Reads large PostgreSQL result sets without loading them into memory, over connections taken from a pool.
+
+    Queries are run by named (server-side) cursors, so rows are transferred by 'itersize' at a time.
+    A connection is held until generator is exhausted or closed; its transaction is rolled back on return to pool.
+    Bulk data is exported and imported by COPY, streamed to and from file objects.
+    """
+
+    def __init__(self, pool, itersize=2000):
+        """
+        Initialize.
+
+        :param pool: ConnectionPool of psycopg2 connections, see 'ConnectionManager.get_psql_pool'
+        :param itersize: number of rows fetched from server at once
+        """
+        if itersize < 1:
+            raise PsqlStreamError("itersize must be positive")
+        self.__pool = pool
+        self.itersize = itersize
+
+    @property
+    def pool(self):
+        """
+        Pool connections are taken from
+        """
+        return self.__pool
+
+    def __stream(self, query, params, itersize, fetch):
+        """
+        Run query by server-side cursor.
+
+        :param query: SQL query
+        :param params: query parameters or None
+        :param itersize: number of rows fetched from server at once
+        :param fetch: callable(cursor) returning generator of results
+        :returns: generator of fetch results
+        """
+        connection = self.__pool.acquire()
+        discard = False
+        try:
+            cursor = connection.cursor(name=_cursor_name())
+            try:
+                cursor.itersize = itersize or self.itersize
+                cursor.execute(query, params)
+                for item in fetch(cursor):
+                    yield item
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    # connection is broken, it must not be reused
+                    discard = True
+        finally:
+            self.__pool.release(connection, discard)
+
+    def rows(self, query, params=None, itersize=None):
+        """
+        Run query and yield its rows one by one.
+
+        :param query: SQL query
+        :param params: query parameters or None
+        :param itersize: number of rows fetched from server at once, 'itersize' of stream by default
+        :returns: generator of rows
+        """
+        return self.__stream(query, params, itersize, lambda cursor: cursor)
+
+    def batches(self, query, params=None, size=None):
+        """
+        Run query and yield its rows by lists of fixed size (the last one may be shorter).
+
+        :param query: SQL query
+        :param params: query parameters or None
+        :param size: number of rows in batch, 'itersize' of stream by default
+        :returns: generator of lists of rows
+        """
+        size = size or self.itersize
+
+        def fetch(cursor):
+            while True:
+                batch = cursor.fetchmany(size)
+                if not batch:
+                    break
+                yield batch
+
+        return self.__stream(query, params, size, fetch)
+
+    def copy_to(self, stream, query=None, params=None, format="csv", header=False, table=None):
+        """
+        Export query result or whole table to file object by COPY.
+
+        :param stream: file object opened for writing, binary for 'binary' format
+        :param query: SQL query, exported as 'COPY (query) TO STDOUT'
+        :param params: query parameters or None
+        :param format: 'text', 'csv' or 'binary'
+        :param header: write header line, 'csv' only
+        :param table: table name, may be schema-qualified; given instead of query
+        :returns: number of exported rows
+        """
+        if (query is None) == (table is None):
+            raise PsqlStreamError("Either query or table must be given")
+        if table is not None and params is not None:
+            raise PsqlStreamError("Parameters are supported for query only")
+        options = _copy_options(format, header)
+        with self.__pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                if table is not None:
+                    source = _quote_identifier(table)
+                else:
+                    if params is not None:
+                        query = cursor.mogrify(query, params)
+                        if isinstance(query, bytes):
+                            # connection encoding is PostgreSQL name ('UTF8', 'WIN1251'), not Python codec
+                            from psycopg2.extensions import encodings
+                            query = query.decode(encodings[connection.encoding])
+                    source = "(%s)" % query
+                cursor.copy_expert("COPY %s TO STDOUT %s" % (source, options), stream)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+    def copy_from(self, stream, table, columns=None, format="csv", header=False):
+        """
+        Import data from file object to table by COPY, in single transaction.
+
+        :param stream: file object opened for reading, binary for 'binary' format
+        :param table: table name, may be schema-qualified
+        :param columns: list of column names in order of data, all columns by default
+        :param format: 'text', 'csv' or 'binary'
+        :param header: skip header line, 'csv' only
+        :returns: number of imported rows
+        """
+        target = _quote_identifier(table)
+        if columns:
+            target += " (%s)" % ", ".join(_quote_identifier(column) for column in columns)
+        options = _copy_options(format, header)
+        with self.__pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.copy_expert("COPY %s FROM STDIN %s" % (target, options), stream)
+                rowcount = cursor.rowcount
+            finally:
+                cursor.close()
+            connection.commit()
+            return rowcount
+
+
+class PsqlStreamError(Exception):
+    """
+    PsqlStream exception
+    """
+    pass
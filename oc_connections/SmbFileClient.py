@@ -0,0 +1,297 @@
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .FtpTransfer import TransferResult
+
+
+def _is_session_error(error):
+    """
+    Tells if error means that SMB session is broken and must not be used any more.
+
+    :param error: exception raised by SMBConnection
+    :returns: True if session must be discarded
+    """
+    from smb.base import NotConnectedError, NotReadyError, ProtocolError, SMBTimeout
+    return isinstance(error, (NotConnectedError, NotReadyError, ProtocolError, SMBTimeout, OSError, EOFError))
+
+
+class _CountingReader(object):
+    """
+    File object wrapper which counts data read from it
+    """
+
+    def __init__(self, stream, result, callback):
+        self.__stream = stream
+        self.__result = result
+        self.__callback = callback
+
+    def read(self, size=-1):
+        block = self.__stream.read(size)
+        self.__result.bytes += len(block)
+        if block and self.__callback is not None:
+            self.__callback(self.__result.remote, block)
+        return block
+
+
+class SmbFileClient(object):
+    """
+    File access to a Samba share over sessions taken from a pool.
+
+    Files are read and written in chunks of fixed size, so memory use does not depend on file size.
+    Large files are downloaded by ranges over several concurrent sessions.
+    """
+
+    def __init__(self, pool, share, base_path="", chunk_size=1048576, retries=1):
+        """
+        Initialize.
+
+        :param pool: ConnectionPool of SMBConnection sessions, see 'ConnectionManager.get_smb_pool'
+        :param share: share name
+        :param base_path: directory in share paths are relative to
+        :param chunk_size: size of chunk read or written by single request
+        :param retries: number of times a chunk is requested over a new session if its session is broken
+        """
+        if chunk_size < 1:
+            raise SmbFileClientError("chunk_size must be positive")
+        self.__pool = pool
+        self.share = share
+        self.base_path = base_path.strip("/")
+        self.chunk_size = chunk_size
+        self.retries = retries
+
+    @property
+    def pool(self):
+        """
+        Pool sessions are taken from
+        """
+        return self.__pool
+
+    def __path(self, path):
+        """
+        Get path in share.
+
+        :param path: path relative to base path
+        :returns: path relative to share root
+        """
+        return "/".join(part for part in (self.base_path, path.strip("/")) if part)
+
+    def __call(self, holder, call):
+        """
+        Runs call over session, replacing session once if it turned out to be broken.
+
+        :param holder: list containing checked out session or None if it must be checked out;
+            session left in holder must be returned to the pool by caller
+        :param call: callable(session)
+        :returns: call result
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                if holder[0] is None:
+                    holder[0] = self.__pool.acquire()
+                return call(holder[0])
+            except Exception as error:
+                if holder[0] is None or not _is_session_error(error) or attempt == self.retries:
+                    raise
+                session, holder[0] = holder[0], None
+                self.__pool.release(session, discard=True)
+
+    def __release(self, holder):
+        """
+        Returns session of holder to the pool.
+
+        :param holder: list containing checked out session or None
+        """
+        if holder[0] is not None:
+            self.__pool.release(holder[0])
+            holder[0] = None
+
+    def __run(self, call):
+        """
+        Runs call over a session of the pool.
+
+        :param call: callable(session)
+        :returns: call result
+        """
+        holder = [None]
+        try:
+            return self.__call(holder, call)
+        finally:
+            self.__release(holder)
+
+    def listdir(self, path=""):
+        """
+        List directory.
+
+        :param path: directory path
+        :returns: list of names
+        """
+        entries = self.__run(lambda session: session.listPath(self.share, self.__path(path)))
+        return [entry.filename for entry in entries if entry.filename not in (".", "..")]
+
+    def getsize(self, path):
+        """
+        Get file size.
+
+        :param path: file path
+        :returns: size in bytes
+        """
+        return self.__run(lambda session: session.getAttributes(self.share, self.__path(path))).file_size
+
+    def __read_range(self, session, path, offset, length):
+        """
+        Reads part of file.
+
+        :param session: SMBConnection
+        :param path: path relative to share root
+        :param offset: position of the first byte
+        :param length: number of bytes
+        :returns: bytes
+        """
+        buffer = io.BytesIO()
+        session.retrieveFileFromOffset(self.share, path, buffer, offset, length)
+        return buffer.getvalue()
+
+    def read_chunks(self, path, offset=0, length=None):
+        """
+        Read file chunk by chunk over single session, the session is held until generator is exhausted or closed.
+
+        :param path: file path
+        :param offset: position to start from
+        :param length: number of bytes to read, till the end of file if omitted
+        :returns: generator of bytes
+        """
+        path = self.__path(path)
+        holder = [None]
+        try:
+            end = None if length is None else offset + length
+            while end is None or offset < end:
+                size = self.chunk_size if end is None else min(self.chunk_size, end - offset)
+                chunk = self.__call(holder, lambda session: self.__read_range(session, path, offset, size))
+                if not chunk:
+                    break
+                offset += len(chunk)
+                yield chunk
+        finally:
+            self.__release(holder)
+
+    def write_chunks(self, path, chunks, offset=0):
+        """
+        Write data chunk by chunk over single session.
+
+        :param path: file path
+        :param chunks: iterable of bytes
+        :param offset: position to start from, file is replaced if it is 0 and overwritten from offset otherwise
+        :returns: number of written bytes
+        """
+        path = self.__path(path)
+        holder = [None]
+        written = 0
+        try:
+            truncate = not offset
+            for chunk in chunks:
+                position = offset + written
+                self.__call(holder, lambda session: session.storeFileFromOffset(
+                    self.share, path, io.BytesIO(chunk), position, truncate))
+                truncate = False
+                written += len(chunk)
+            if truncate:
+                self.__call(holder, lambda session: session.storeFileFromOffset(
+                    self.share, path, io.BytesIO(b""), offset, True))
+        finally:
+            self.__release(holder)
+        return written
+
+    def download(self, path, local, sessions=None, callback=None):
+        """
+        Download file. File is split into chunks, which are read concurrently over several sessions
+        and written to their places in local file.
+
+        :param path: file path
+        :param local: local file path
+        :param sessions: number of sessions used at once, pool max_size by default
+        :param callback: callable(path, offset, chunk) called for every received chunk
+        :returns: TransferResult
+        """
+        result = TransferResult(path, local)
+        start = time.monotonic()
+        try:
+            remote = self.__path(path)
+            size = self.getsize(path)
+            directory = os.path.dirname(local)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(local, "wb") as stream:
+                stream.truncate(size)
+            pending = iter(range(0, size, self.chunk_size))
+            pending_lock = threading.Lock()
+
+            def next_offset():
+                with pending_lock:
+                    return next(pending, None)
+
+            def worker():
+                holder = [None]
+                try:
+                    with open(local, "r+b") as stream:
+                        while True:
+                            offset = next_offset()
+                            if offset is None:
+                                break
+                            length = min(self.chunk_size, size - offset)
+                            chunk = self.__call(holder, lambda session: self.__read_range(
+                                session, remote, offset, length))
+                            if len(chunk) != length:
+                                raise SmbFileClientError("File '%s' was changed during download" % path)
+                            stream.seek(offset)
+                            stream.write(chunk)
+                            with pending_lock:
+                                result.bytes += length
+                            if callback is not None:
+                                callback(path, offset, chunk)
+                finally:
+                    self.__release(holder)
+
+            chunks = (size + self.chunk_size - 1) // self.chunk_size
+            workers = max(1, min(sessions or self.__pool.max_size, chunks))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(worker) for _ in range(workers)]:
+                    future.result()
+        except Exception as error:
+            result.error = error
+        result.seconds = time.monotonic() - start
+        return result
+
+    def upload(self, local, path, callback=None):
+        """
+        Upload file. Data is streamed from local file, nothing is buffered in memory.
+
+        :param local: local file path
+        :param path: file path
+        :param callback: callable(path, block) called for every sent block
+        :returns: TransferResult
+        """
+        result = TransferResult(path, local)
+        start = time.monotonic()
+        remote = self.__path(path)
+
+        def store(session):
+            result.bytes = 0
+            with open(local, "rb") as stream:
+                session.storeFileFromOffset(self.share, remote, _CountingReader(stream, result, callback), 0, True)
+
+        try:
+            self.__run(store)
+        except Exception as error:
+            result.error = error
+        result.seconds = time.monotonic() - start
+        return result
+
+
+class SmbFileClientError(Exception):
+    """
+    SmbFileClient exception
+    """
+    pass
@@ -0,0 +1,158 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .ConnectionPool import ConnectionPool
+
+
+def _check_smtp_session(session):
+    """
+    Liveness check for pooled SMTP session.
+
+    :param session: smtplib.SMTP
+    :returns: True if server answered NOOP
+    """
+    return session.noop()[0] == 250
+
+
+def _close_smtp_session(session):
+    """
+    Politely closes SMTP session.
+
+    :param session: smtplib.SMTP
+    """
+    try:
+        session.quit()
+    except Exception:
+        session.close()
+
+
+class SendResult(object):
+    """
+    Result of sending single message
+    """
+    __slots__ = ("message", "refused", "error")
+
+    def __init__(self, message, refused=None, error=None):
+        """
+        Initialize.
+
+        :param message: message which was sent
+        :param refused: dictionary of refused recipients as returned by 'smtplib.SMTP.send_message'
+        :param error: exception raised while sending or None
+        """
+        self.message = message
+        self.refused = refused or {}
+        self.error = error
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "SendResult(refused=%r, error=%r)" % (self.refused, self.error)
+
+
+class SmtpSessionPool(ConnectionPool):
+    """
+    Pool of authenticated SMTP sessions.
+
+    Sessions are checked with NOOP on checkout. Message sent over a session which turned out to be disconnected
+    is re-sent once over a new session.
+    """
+
+    def __init__(self, factory, min_size=0, max_size=4, max_idle=60, max_lifetime=None):
+        """
+        Initialize.
+
+        :param factory: callable without arguments which creates logged in smtplib.SMTP
+        :param min_size: number of sessions kept open even if they are idle
+        :param max_size: maximum number of sessions
+        :param max_idle: seconds after which idle session is closed, None means forever
+        :param max_lifetime: seconds after which session is reopened, None means forever
+        """
+        super(SmtpSessionPool, self).__init__(factory, min_size=min_size, max_size=max_size, max_idle=max_idle,
+                                              max_lifetime=max_lifetime, check=_check_smtp_session,
+                                              close=_close_smtp_session)
+
+    def __send_one(self, session, message, from_addr, to_addrs):
+        """
+        Sends message, replacing session once if it turned out to be disconnected.
+
+        :param session: checked out session or None if it must be checked out
+        :param message: email.message.Message
+        :param from_addr: envelope sender, taken from message headers if None
+        :param to_addrs: envelope recipients, taken from message headers if None
+        :returns: session to be used further (None if there is no one), SendResult
+        """
+        from smtplib import SMTPServerDisconnected
+        try:
+            if session is None:
+                session = self.acquire()
+            try:
+                refused = session.send_message(message, from_addr, to_addrs)
+            except SMTPServerDisconnected:
+                self.release(session, discard=True)
+                session = None
+                session = self.acquire()
+                refused = session.send_message(message, from_addr, to_addrs)
+            return session, SendResult(message, refused)
+        except SMTPServerDisconnected as error:
+            if session is not None:
+                self.release(session, discard=True)
+            return None, SendResult(message, error=error)
+        except Exception as error:
+            return session, SendResult(message, error=error)
+
+    def send(self, message, from_addr=None, to_addrs=None):
+        """
+        Send single message.
+
+        :param message: email.message.Message
+        :param from_addr: envelope sender, taken from message headers if None
+        :param to_addrs: envelope recipients, taken from message headers if None
+        :returns: dictionary of refused recipients
+        """
+        session, result = self.__send_one(None, message, from_addr, to_addrs)
+        if session is not None:
+            self.release(session)
+        if result.error is not None:
+            raise result.error
+        return result.refused
+
+    def send_many(self, messages, sessions=None):
+        """
+        Send many messages over few sessions: each session sends messages one by one until all are sent.
+
+        :param messages: iterable of email.message.Message or (message, from_addr, to_addrs) tuples
+        :param sessions: number of sessions used at once, max_size by default
+        :returns: list of SendResult in order of messages
+        """
+        items = [item if isinstance(item, tuple) else (item, None, None) for item in messages]
+        results = [None] * len(items)
+        if not items:
+            return results
+        pending = iter(range(len(items)))
+        pending_lock = threading.Lock()
+
+        def next_index():
+            with pending_lock:
+                return next(pending, None)
+
+        def worker():
+            session = None
+            try:
+                while True:
+                    index = next_index()
+                    if index is None:
+                        break
+                    message, from_addr, to_addrs = items[index]
+                    session, results[index] = self.__send_one(session, message, from_addr, to_addrs)
+            finally:
+                if session is not None:
+                    self.release(session)
+
+        workers = min(sessions or self.max_size, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(worker) for _ in range(workers)]:
+                future.result()
+        return results
@@ -0,0 +1,157 @@
+import threading
+import time
+from queue import Queue, Full
+
+
+class BatchResult(object):
+    """
+    Result of single operation of a batch
+    """
+    __slots__ = ("path", "value", "error", "seconds")
+
+    def __init__(self, path, value=None, error=None, seconds=0.0):
+        """
+        Initialize.
+
+        :param path: path the operation was called for
+        :param value: value returned by the operation
+        :param error: exception raised by the operation or None
+        :param seconds: time spent by the operation, including client checkout
+        """
+        self.path = path
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def success(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "BatchResult(%r, error=%r, seconds=%.3f)" % (self.path, self.error, self.seconds)
+
+
+class SvnBatch(object):
+    """
+    Runs the same SvnFS operation for many paths concurrently over clients of SvnClientPool.
+
+    Results are yielded in order of completion as soon as they are ready, so long scans may be processed on the fly.
+    Failed operation does not stop the batch: its exception is reported in BatchResult.
+    """
+
+    def __init__(self, pool, workers=None):
+        """
+        Initialize.
+
+        :param pool: SvnClientPool of SvnFS clients (see 'ConnectionManager.get_svn_fs_pool')
+        :param workers: number of concurrent operations, pool max_size by default
+        """
+        self.pool = pool
+        self.workers = workers or pool.max_size
+        if self.workers < 1:
+            raise SvnBatchError("workers must be positive")
+
+    def run(self, operation, paths, *args, **kwargs):
+        """
+        Run operation for every path.
+
+        :param operation: name of SvnFS method (for example, 'listdir') or callable(fs, path, *args, **kwargs)
+        :param paths: iterable of paths relative to resource URL, consumed lazily
+        :param args: additional operation parameters
+        :param kwargs: additional operation parameters
+        :returns: generator of BatchResult in order of completion
+        """
+        if callable(operation):
+            call = lambda fs, path: operation(fs, path, *args, **kwargs)
+        else:
+            call = lambda fs, path: getattr(fs, operation)(path, *args, **kwargs)
+        pending = iter(paths)
+        pending_lock = threading.Lock()
+        # results are handed over through bounded queue, so workers do not run far ahead of consumer
+        results = Queue(self.workers * 2)
+        stop = threading.Event()
+        done = object()
+
+        def next_path():
+            with pending_lock:
+                return next(pending, done)
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return
+                except Full:
+                    pass
+
+        def worker():
+            try:
+                while not stop.is_set():
+                    try:
+                        path = next_path()
+                    except Exception as error:
+                        # paths iterable failed, the rest of batch can not be read
+                        put(BatchResult(None, error=error))
+                        break
+                    if path is done:
+                        break
+                    start = time.monotonic()
+                    try:
+                        with self.pool.connection() as fs:
+                            value = call(fs, path)
+                        put(BatchResult(path, value, seconds=time.monotonic() - start))
+                    except Exception as error:
+                        put(BatchResult(path, error=error, seconds=time.monotonic() - start))
+            finally:
+                put(done)
+
+        threads = [threading.Thread(target=worker, name="SvnBatch") for _ in range(self.workers)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            running = len(threads)
+            while running:
+                item = results.get()
+                if item is done:
+                    running -= 1
+                else:
+                    yield item
+        finally:
+            # consumer may stop iterating early, operations being run are finished in background
+            stop.set()
+
+    def listdir(self, paths):
+        """
+        List directories.
+
+        :param paths: iterable of directory paths
+        :returns: generator of BatchResult with lists of names
+        """
+        return self.run("listdir", paths)
+
+    def info(self, paths, namespaces=("details",)):
+        """
+        Get information about resources.
+
+        :param paths: iterable of paths
+        :param namespaces: info namespaces
+        :returns: generator of BatchResult with fs.info.Info
+        """
+        return self.run("getinfo", paths, namespaces=list(namespaces))
+
+    def cat(self, paths):
+        """
+        Read files.
+
+        :param paths: iterable of file paths
+        :returns: generator of BatchResult with file contents as bytes
+        """
+        return self.run("readbytes", paths)
+
+
+class SvnBatchError(Exception):
+    """
+    SvnBatch exception
+    """
+    pass
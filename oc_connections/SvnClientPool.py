@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+
+from .ConnectionPool import ConnectionPool, _close_connection
+
+# Subversion error codes of failed authentication or authorization:
+# SVN_ERR_RA_NOT_AUTHORIZED, SVN_ERR_RA_DAV_FORBIDDEN, SVN_ERR_AUTHN_CREDS_UNAVAILABLE, SVN_ERR_AUTHN_FAILED
+_SVN_AUTH_ERROR_CODES = (170001, 175013, 215000, 215004)
+
+
+def _svn_fs_client(fs):
+    """
+    Get pysvn client of SvnFS, which wraps read-only FS keeping the client.
+
+    :param fs: oc_pyfs.SvnFS.SvnFS
+    :returns: pysvn.Client
+    """
+    return fs.delegate_fs().svn
+
+
+def _reset_svn_client(client):
+    """
+    Allows one more login attempt to pysvn client returned to the pool.
+
+    :param client: pysvn.Client
+    """
+    reset = getattr(getattr(client, "callback_get_login", None), "reset", None)
+    if reset is not None:
+        reset()
+
+
+def _is_svn_auth_error(error):
+    """
+    Checks if exception was caused by rejected credentials.
+
+    :param error: exception raised by pysvn client or SvnFS
+    :returns: True for authentication and authorization failures
+    """
+    args = getattr(error, "args", ())
+    # pysvn.ClientError with exception_style 1 has list of (message, code) pairs as the second argument
+    if len(args) > 1 and isinstance(args[1], list):
+        for entry in args[1]:
+            if isinstance(entry, tuple) and len(entry) > 1 and entry[1] in _SVN_AUTH_ERROR_CODES:
+                return True
+    message = str(args[0] if args else error).lower()
+    return "authoriz" in message or "authenticat" in message
+
+
+class SvnClientPool(ConnectionPool):
+    """
+    Pool of configured pysvn clients (or SvnFS objects built on them).
+
+    pysvn clients are not thread-safe, so a client is used by one thread between checkout and return.
+    Client which failed with authentication error is discarded together with idle clients,
+    so clients created after credentials change log in with new credentials.
+    """
+
+    def __init__(self, factory, min_size=0, max_size=4, max_idle=600, max_lifetime=None, thread_affinity=False,
+                 svn_client=None):
+        """
+        Initialize.
+
+        :param factory: callable without arguments which creates configured pysvn.Client or SvnFS
+        :param min_size: number of clients kept even if they are idle
+        :param max_size: maximum number of clients
+        :param max_idle: seconds after which idle client is dropped, None means forever
+        :param max_lifetime: seconds after which client is recreated, None means forever
+        :param thread_affinity: prefer client used last by the current thread on checkout
+        :param svn_client: callable(pooled object) returning its pysvn.Client, for pools of objects wrapping clients
+        """
+        if svn_client is None:
+            reset = _reset_svn_client
+        else:
+            reset = lambda connection: _reset_svn_client(svn_client(connection))
+        super(SvnClientPool, self).__init__(factory, min_size=min_size, max_size=max_size, max_idle=max_idle,
+                                            max_lifetime=max_lifetime, reset=reset,
+                                            close=_close_connection, affinity=thread_affinity)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Context manager which checks out client and returns it to the pool on exit.
+        Client is discarded if authentication error is raised inside the block.
+
+        :param timeout: seconds to wait for a free client, None means forever
+        :returns: pysvn.Client or SvnFS
+        """
+        client = self.acquire(timeout)
+        discard = False
+        try:
+            yield client
+        except Exception as error:
+            discard = _is_svn_auth_error(error)
+            raise
+        finally:
+            self.release(client, discard)
+            if discard:
+                # the rest of clients logs in with the same credentials
+                self.clear()
@@ -0,0 +1,209 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from oc_connections.ArtifactCache import ArtifactCache, ArtifactCacheError, CachedNexusClient
+
+
+class MockResponse(object):
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_content(self, size):
+        for position in range(0, len(self.content), 2):
+            yield self.content[position:position + 2]
+
+    def close(self):
+        self.closed = True
+
+
+class MockNexusAPI(object):
+    root = "http://nexus/nexus"
+    codepage = "utf-8"
+    codepage_errors = "replace"
+
+    def __init__(self, artifacts):
+        self.artifacts = artifacts
+        self.requests = []
+        self.down = False
+        self.delay = 0
+        self.lock = threading.Lock()
+
+    def cat(self, gav, repo=None, response=False, stream=False, headers=None, **kwargs):
+        with self.lock:
+            self.requests.append((gav, repo, headers))
+        time.sleep(self.delay)
+        if self.down:
+            raise IOError("Connection refused")
+        content = self.artifacts[gav]
+        etag = '"{SHA1{%s}}"' % hashlib.sha1(content).hexdigest()
+        if headers and headers.get("If-None-Match") == etag:
+            return MockResponse(304)
+        return MockResponse(200, content, {"ETag": etag, "Last-Modified": "Mon, 12 Oct 2026 10:00:00 GMT"})
+
+    def ls(self, gav):
+        return [gav]
+
+
+class ArtifactCacheTestSuite(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = MockNexusAPI({"g:a:1": b"artifact-1", "g:b:1": b"artifact-1", "g:c:1": b"artifact-3",
+                                    "g:d:1": b"artifact-4"})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, cache, gav, repo=None):
+        with cache.open(self.client, gav, repo) as stream:
+            return stream.read()
+
+    def test_hit(self):
+        cache = ArtifactCache(self.directory)
+        self.assertEqual(b"artifact-1", self.read(cache, "g:a:1"))
+        self.assertEqual(b"artifact-1", self.read(cache, "g:a:1"))
+        self.assertEqual(1, len(self.client.requests))
+        self.assertEqual({"hits": 1, "misses": 1, "revalidations": 0, "evictions": 0}, cache.stats)
+        # another instance (another process) shares the cache
+        self.assertEqual(b"artifact-1", self.read(ArtifactCache(self.directory), "g:a:1"))
+        self.assertEqual(1, len(self.client.requests))
+        # another repository is another artifact
+        self.read(cache, "g:a:1", "releases")
+        self.assertEqual(("g:a:1", "releases", None), self.client.requests[-1])
+
+    def test_content_addressed(self):
+        cache = ArtifactCache(self.directory)
+        self.read(cache, "g:a:1")
+        self.read(cache, "g:b:1")
+        self.assertEqual(2, len(self.client.requests))
+        self.assertEqual(len(b"artifact-1"), cache.size)
+
+    def test_revalidation(self):
+        cache = ArtifactCache(self.directory, revalidate_after=0)
+        self.read(cache, "g:a:1")
+        self.assertEqual(b"artifact-1", self.read(cache, "g:a:1"))
+        etag = '"{SHA1{%s}}"' % hashlib.sha1(b"artifact-1").hexdigest()
+        self.assertEqual({"If-None-Match": etag, "If-Modified-Since": "Mon, 12 Oct 2026 10:00:00 GMT"},
+                         self.client.requests[-1][2])
+        # artifact was changed on server
+        self.client.artifacts["g:a:1"] = b"artifact-1-changed"
+        self.assertEqual(b"artifact-1-changed", self.read(cache, "g:a:1"))
+        self.assertEqual(2, cache.stats["revalidations"])
+        # server is not available
+        self.client.down = True
+        self.assertEqual(b"artifact-1-changed", self.read(cache, "g:a:1"))
+        with self.assertRaises(IOError):
+            self.read(ArtifactCache(self.directory, revalidate_after=0, stale_if_error=False), "g:a:1")
+        with self.assertRaises(IOError):
+            self.read(cache, "g:c:1")
+
+    def test_stale_is_revalidated(self):
+        cache = ArtifactCache(self.directory, revalidate_after=60)
+        self.read(cache, "g:a:1")
+        record_path = os.path.join(self.directory, "index", ArtifactCache.key(self.client.root, "g:a:1") + ".json")
+        # record is outdated and server is not available
+        with open(record_path) as stream:
+            record = json.load(stream)
+        record["validated"] -= 3600
+        with open(record_path, "w") as stream:
+            json.dump(record, stream)
+        self.client.down = True
+        self.assertEqual(b"artifact-1", self.read(cache, "g:a:1"))
+        # stale artifact does not look fresh, so it is revalidated as soon as server is back
+        self.client.down = False
+        self.assertEqual(b"artifact-1", self.read(cache, "g:a:1"))
+        self.assertEqual(3, len(self.client.requests))
+        self.assertEqual(2, cache.stats["revalidations"])
+        self.assertEqual(b"artifact-1", self.read(cache, "g:a:1"))
+        self.assertEqual(3, len(self.client.requests))
+
+    def test_checksum_mismatch(self):
+        cache = ArtifactCache(self.directory)
+        original = self.client.cat
+
+        def corrupted(*args, **kwargs):
+            response = original(*args, **kwargs)
+            response.content = b"corrupted"
+            return response
+
+        self.client.cat = corrupted
+        with self.assertRaises(ArtifactCacheError):
+            self.read(cache, "g:a:1")
+        self.assertEqual(0, cache.size)
+        self.assertEqual([], os.listdir(os.path.join(self.directory, "tmp")))
+
+    def test_lru_eviction(self):
+        cache = ArtifactCache(self.directory, max_size=25)
+        self.read(cache, "g:a:1")
+        time.sleep(0.01)
+        self.read(cache, "g:c:1")
+        time.sleep(0.01)
+        # the first artifact is used again, so the second one is the least recently used
+        self.read(cache, "g:a:1")
+        time.sleep(0.01)
+        self.read(cache, "g:d:1")
+        self.assertEqual(1, cache.stats["evictions"])
+        self.assertEqual(20, cache.size)
+        requests = len(self.client.requests)
+        self.read(cache, "g:a:1")
+        self.assertEqual(requests, len(self.client.requests))
+        self.assertEqual(b"artifact-3", self.read(cache, "g:c:1"))
+        self.assertEqual(requests + 1, len(self.client.requests))
+
+    def test_concurrent_download(self):
+        self.client.delay = 0.05
+        results = []
+
+        def read():
+            results.append(self.read(ArtifactCache(self.directory), "g:a:1"))
+
+        threads = [threading.Thread(target=read) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([b"artifact-1"] * 6, results)
+        self.assertEqual(1, len(self.client.requests))
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ArtifactCacheError):
+            ArtifactCache(self.directory, max_size=0)
+
+
+class CachedNexusClientTestSuite(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.api = MockNexusAPI({"g:a:1": "артефакт".encode("utf-8")})
+        self.client = CachedNexusClient(self.api, ArtifactCache(self.directory))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cat(self):
+        self.assertEqual("артефакт", self.client.cat("g:a:1"))
+        self.assertEqual("артефакт".encode("utf-8"), self.client.cat("g:a:1", binary=True))
+        target = io.BytesIO()
+        self.assertIsNone(self.client.cat("g:a:1", stream=True, write_to=target))
+        self.assertEqual("артефакт".encode("utf-8"), target.getvalue())
+        path = os.path.join(self.directory, "artifact")
+        self.client.cat("g:a:1", write_to=path)
+        with open(path, "rb") as stream:
+            self.assertEqual("артефакт".encode("utf-8"), stream.read())
+        self.assertEqual(1, len(self.api.requests))
+        # response is not cached
+        self.assertEqual(200, self.client.cat("g:a:1", response=True).status_code)
+        self.assertEqual(2, len(self.api.requests))
+
+    def test_other_methods(self):
+        self.assertEqual(["g:a:1"], self.client.ls("g:a:1"))
+        self.assertEqual("http://nexus/nexus", self.client.root)
@@ -0,0 +1,150 @@
+import asyncio
+import sys
+import threading
+import time
+import types
+from unittest import TestCase
+from unittest.mock import patch
+from oc_connections.CredentialManager import CredentialManager
+from oc_connections.ConnectionManager import ConnectionManagerError
+from oc_connections.AsyncConnectionManager import AsyncConnectionManager
+
+
+class MockFTP(object):
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def connect(self, host, port, **kwargs):
+        with MockFTP.lock:
+            MockFTP.running += 1
+            MockFTP.max_running = max(MockFTP.max_running, MockFTP.running)
+        time.sleep(0.05)
+        with MockFTP.lock:
+            MockFTP.running -= 1
+        self.host = host
+        self.port = port
+
+    def login(self, user, password):
+        self.user = user
+
+
+class MockAsyncSMTP(object):
+    def __init__(self, hostname, port, **kwargs):
+        self.hostname = hostname
+        self.port = port
+        self.connected = False
+        self.user = None
+
+    async def connect(self):
+        self.connected = True
+
+    async def login(self, user, password):
+        self.user = user
+
+
+class MockAsyncPgConnection(object):
+    @classmethod
+    async def connect(cls, **kwargs):
+        connection = cls()
+        connection.kwargs = kwargs
+        return connection
+
+
+class AsyncConnectionManagerTestSuite(TestCase):
+
+    def setUp(self):
+        self.cred_mgr = CredentialManager()
+        self.cred_mgr.override_credential("TEST_FTP", "URL", "127.0.0.1:21")
+        self.cred_mgr.override_credential("TEST_FTP", "USER", "test_ftp")
+        self.cred_mgr.override_credential("TEST_FTP", "PASSWORD", "test_ftp")
+        self.cred_mgr.override_credential("TEST_SMTP", "URL", "127.0.0.1:25")
+        self.cred_mgr.override_credential("TEST_PSQL", "URL", "127.0.0.1:5432/postgres?search_path=dl_schema")
+        self.cred_mgr.override_credential("TEST_PSQL", "USER", "test_user")
+        self.cred_mgr.override_credential("TEST_PSQL", "PASSWORD", "test_password")
+
+    @patch('oc_connections.ConnectionManager.FTP', new=MockFTP)
+    def test_blocking_connects_in_bounded_pool(self):
+        async def main():
+            ticks = []
+
+            async def ticker():
+                for _ in range(5):
+                    ticks.append(time.monotonic())
+                    await asyncio.sleep(0.01)
+
+            async with AsyncConnectionManager(self.cred_mgr, max_workers=2, native=False) as manager:
+                results = await asyncio.gather(ticker(), *[manager.get_ftp_client("TEST_FTP") for _ in range(6)])
+            return ticks, results[1:]
+
+        MockFTP.max_running = 0
+        ticks, clients = asyncio.run(main())
+        self.assertEqual(6, len(clients))
+        self.assertEqual("test_ftp", clients[0].user)
+        self.assertEqual(2, MockFTP.max_running)
+        # event loop kept running while connects were blocked in threads
+        self.assertEqual(5, len(ticks))
+
+    def test_native_smtp(self):
+        aiosmtplib = types.ModuleType("aiosmtplib")
+        aiosmtplib.SMTP = MockAsyncSMTP
+        with patch.dict(sys.modules, {"aiosmtplib": aiosmtplib}):
+            manager = AsyncConnectionManager(self.cred_mgr)
+            client = asyncio.run(manager.get_smtp_client("TEST_SMTP"))
+            self.assertIsInstance(client, MockAsyncSMTP)
+            self.assertTrue(client.connected)
+            self.assertIsNone(client.user)
+            self.assertEqual(("127.0.0.1", 25), (client.hostname, client.port))
+
+            self.cred_mgr.override_credential("TEST_SMTP", "USER", "test_smtp_user")
+            with self.assertRaises(ConnectionManagerError):
+                asyncio.run(manager.get_smtp_client("TEST_SMTP"))
+            self.cred_mgr.override_credential("TEST_SMTP", "PASSWORD", "test_smtp_password")
+            client = asyncio.run(manager.get_smtp_client("TEST_SMTP"))
+            self.assertEqual("test_smtp_user", client.user)
+            manager.close()
+
+    def test_native_psql(self):
+        psycopg = types.ModuleType("psycopg")
+        psycopg.AsyncConnection = MockAsyncPgConnection
+        with patch.dict(sys.modules, {"psycopg": psycopg}):
+            manager = AsyncConnectionManager(self.cred_mgr)
+            client = asyncio.run(manager.get_psql_client("TEST_PSQL"))
+            manager.close()
+        self.assertEqual({
+            "user": "test_user",
+            "password": "test_password",
+            "host": "127.0.0.1",
+            "port": 5432,
+            "dbname": "postgres",
+            "options": "-c search_path=dl_schema"}, client.kwargs)
+
+    def test_blocking_work_is_off_loop(self):
+        class RecordingCredentialManager(CredentialManager):
+            threads = set()
+
+            def get_credentials(self, resource, names):
+                RecordingCredentialManager.threads.add(threading.current_thread())
+                return super(RecordingCredentialManager, self).get_credentials(resource, names)
+
+        cred_mgr = RecordingCredentialManager()
+        cred_mgr.override_credential("TEST_SMTP", "URL", "127.0.0.1:25")
+        aiosmtplib = types.ModuleType("aiosmtplib")
+        aiosmtplib.SMTP = MockAsyncSMTP
+        with patch.dict(sys.modules, {"aiosmtplib": aiosmtplib}):
+            manager = AsyncConnectionManager(cred_mgr)
+        # native libraries are resolved once on creation, not on every call
+        with patch("oc_connections.AsyncConnectionManager.import_module") as imports:
+            self.assertIsInstance(asyncio.run(manager.get_smtp_client("TEST_SMTP")), MockAsyncSMTP)
+        self.assertEqual(0, imports.call_count)
+        # credentials are read in the thread pool
+        self.assertNotIn(threading.current_thread(), RecordingCredentialManager.threads)
+        self.assertEqual(1, len(RecordingCredentialManager.threads))
+        manager.close()
+
+    def test_missing_credentials(self):
+        self.cred_mgr.reset_credential("TEST_FTP", "USER")
+        manager = AsyncConnectionManager(self.cred_mgr, native=False)
+        with self.assertRaises(ConnectionManagerError):
+            asyncio.run(manager.get_ftp_client("TEST_FTP"))
+        manager.close()
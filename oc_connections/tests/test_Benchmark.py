@@ -0,0 +1,30 @@
+from unittest import TestCase
+from oc_connections.Benchmark import BenchmarkResult, measure, run, format_results
+
+
+class BenchmarkTestSuite(TestCase):
+
+    def test_percentiles(self):
+        result = BenchmarkResult("test", [0.004, 0.001, 0.003, 0.002, 0.005], 0.5)
+        self.assertEqual(0.001, result.percentile(0))
+        self.assertEqual(0.003, result.percentile(50))
+        self.assertEqual(0.005, result.percentile(100))
+        self.assertEqual(10, result.calls_per_second)
+        self.assertEqual(0.0, BenchmarkResult("empty", [], 0).percentile(50))
+
+    def test_measure(self):
+        released = []
+        result = measure("list", lambda: [0] * 1000, iterations=5, memory_samples=3, release=released.append)
+        self.assertEqual(5, len(result.latencies))
+        # warm-up call, measured calls and memory samples
+        self.assertEqual(9, len(released))
+        self.assertGreater(result.memory_per_call, 1000)
+
+    def test_run(self):
+        results = run(iterations=2, memory_samples=1)
+        names = [result.name for result in results]
+        self.assertIn("get_smtp_client", names)
+        self.assertIn("get_ftp_client", names)
+        self.assertIn("get_mvn_client+request", names)
+        self.assertNotIn("get_psql_client", names)
+        self.assertEqual(len(results) + 1, len(format_results(results).splitlines()))
@@ -0,0 +1,78 @@
+import time
+from unittest import TestCase
+from oc_connections.CircuitBreaker import CircuitBreaker, CircuitBreakerError, CircuitOpenError, HealthChecker
+
+
+class MockConnectionManager(object):
+    def __init__(self):
+        self.broken = set()
+        self.probes = []
+
+    def probe(self, resource, kind, timeout=5):
+        self.probes.append((resource, kind, timeout))
+        if resource in self.broken:
+            raise IOError("%s is down" % resource)
+        return 0.0
+
+
+class CircuitBreakerTestSuite(TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.before_call()
+        breaker.record_failure(IOError("refused"))
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        breaker.before_call()
+        breaker.record_failure(IOError("refused"))
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+
+    def test_half_open(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05, half_open_max_calls=1)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertEqual(CircuitBreaker.HALF_OPEN, breaker.state)
+        breaker.before_call()
+        # only one trial call at once
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(CircuitBreaker.OPEN, breaker.state)
+        time.sleep(0.06)
+        breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        breaker.before_call()
+
+    def test_cancel_frees_trial_call(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.cancel()
+        breaker.before_call()
+        breaker.reset()
+        self.assertEqual(0, breaker.failures)
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(CircuitBreakerError):
+            CircuitBreaker(failure_threshold=0)
+
+    def test_health_checker(self):
+        manager = MockConnectionManager()
+        manager.broken.add("MVN")
+        checker = HealthChecker(manager, {"MVN": "mvn", "PSQL": "psql"}, interval=0.01, timeout=1)
+        results = checker.check()
+        self.assertIsInstance(results["MVN"], IOError)
+        self.assertIsNone(results["PSQL"])
+        with checker:
+            time.sleep(0.1)
+        self.assertGreater(len(manager.probes), 4)
+        self.assertEqual(("MVN", "mvn", 1), manager.probes[0])
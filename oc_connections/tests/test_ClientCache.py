@@ -0,0 +1,61 @@
+import time
+from unittest import TestCase
+from oc_connections.ClientCache import ClientCache, ClientCacheError
+
+
+class ClientCacheTestSuite(TestCase):
+
+    def setUp(self):
+        self.created = []
+
+    def create(self):
+        client = object()
+        self.created.append(client)
+        return client
+
+    def test_hit_and_miss(self):
+        cache = ClientCache()
+        first = cache.get("mvn", "MVN", {"readonly": True}, self.create)
+        self.assertIs(first, cache.get("mvn", "MVN", {"readonly": True}, self.create))
+        self.assertIsNot(first, cache.get("mvn", "MVN", {"readonly": False}, self.create))
+        self.assertIsNot(first, cache.get("jenkins", "MVN", {"readonly": True}, self.create))
+        self.assertEqual({"hits": 1, "misses": 3, "size": 3}, cache.stats)
+
+    def test_unhashable_kwargs_not_cached(self):
+        cache = ClientCache()
+        first = cache.get("mvn", "MVN", {"work_fs": []}, self.create)
+        self.assertIsNot(first, cache.get("mvn", "MVN", {"work_fs": []}, self.create))
+        self.assertEqual(0, len(cache))
+
+    def test_ttl(self):
+        cache = ClientCache(ttl=0.05)
+        first = cache.get("mvn", "MVN", {}, self.create)
+        time.sleep(0.1)
+        self.assertIsNot(first, cache.get("mvn", "MVN", {}, self.create))
+        self.assertEqual(1, len(cache))
+
+    def test_lru_bound(self):
+        cache = ClientCache(max_size=2)
+        first = cache.get("mvn", "A", {}, self.create)
+        cache.get("mvn", "B", {}, self.create)
+        # touch A, so B is the least recently used one
+        cache.get("mvn", "A", {}, self.create)
+        cache.get("mvn", "C", {}, self.create)
+        self.assertEqual(2, len(cache))
+        self.assertIs(first, cache.get("mvn", "A", {}, self.create))
+        cache.get("mvn", "B", {}, self.create)
+        self.assertEqual(4, len(self.created))
+
+    def test_invalidate(self):
+        cache = ClientCache()
+        cache.get("mvn", "A", {}, self.create)
+        cache.get("svn", "A", {}, self.create)
+        cache.get("mvn", "B", {}, self.create)
+        self.assertEqual(2, cache.invalidate("A"))
+        self.assertEqual(1, len(cache))
+        cache.clear()
+        self.assertEqual({"hits": 0, "misses": 0, "size": 0}, cache.stats)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ClientCacheError):
+            ClientCache(max_size=0)
@@ -0,0 +1,86 @@
+import time
+import warnings
+from unittest import TestCase
+from oc_connections.ClientRegistry import ClientRegistry, _is_client_closed
+
+
+class MockClient(object):
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class MockSocketClient(object):
+    def __init__(self):
+        self.sock = object()
+
+    def quit(self):
+        self.sock = None
+
+
+class ClientRegistryTestSuite(TestCase):
+
+    def setUp(self):
+        self.registry = ClientRegistry()
+
+    def test_track_and_close(self):
+        client = MockClient()
+        record = self.registry.track("psql", "PSQL", client)
+        self.assertIs(record, self.registry.track("psql", "PSQL", client))
+        self.assertEqual(1, len(self.registry))
+        self.assertTrue(self.registry.close(client))
+        self.assertTrue(client.closed)
+        self.assertFalse(self.registry.close(client))
+        self.assertEqual(0, len(self.registry))
+
+    def test_close_all(self):
+        clients = [MockClient() for _ in range(3)]
+        for client in clients:
+            self.registry.track("psql", "PSQL", client)
+        socket_client = MockSocketClient()
+        self.registry.track("ftp", "FTP", socket_client, lambda client: client.quit())
+        self.assertEqual(4, self.registry.close_all())
+        self.assertTrue(all(client.closed for client in clients))
+        self.assertIsNone(socket_client.sock)
+        self.assertEqual([], self.registry.clients())
+
+    def test_closed_by_owner_are_dropped(self):
+        client = MockClient()
+        socket_client = MockSocketClient()
+        self.registry.track("psql", "PSQL", client)
+        self.registry.track("smtp", "SMTP", socket_client)
+        client.close()
+        socket_client.quit()
+        self.assertEqual([], self.registry.clients())
+
+    def test_closed_are_pruned_as_registry_grows(self):
+        clients = [MockClient() for _ in range(200)]
+        for client in clients:
+            self.registry.track("psql", "PSQL", client)
+            client.close()
+        # pruning is amortized, so the registry stays bounded without scanning it on every call
+        self.assertLess(len(self.registry), 100)
+        self.assertEqual([], self.registry.clients())
+
+    def test_leaks_are_reported_with_stack(self):
+        client = MockClient()
+        self.registry.track("psql", "PSQL", client)
+        self.assertEqual([], self.registry.clients(older_than=60))
+        time.sleep(0.02)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            leaks = self.registry.check_leaks(older_than=0.01)
+        self.assertEqual([client], [record.client for record in leaks])
+        self.assertEqual(1, len(caught))
+        self.assertIs(ResourceWarning, caught[0].category)
+        # acquisition stack points to the caller, not to the registry
+        self.assertIn("test_leaks_are_reported_with_stack", str(caught[0].message))
+        self.assertNotIn("in track", str(caught[0].message))
+        self.assertLessEqual(str(caught[0].message).count("File "), 10)
+
+    def test_is_client_closed(self):
+        self.assertFalse(_is_client_closed(object()))
+        self.assertTrue(_is_client_closed(type("Connection", (object,), {"closed": 1})()))
+        self.assertTrue(_is_client_closed(type("FS", (object,), {"isclosed": lambda self: True})()))
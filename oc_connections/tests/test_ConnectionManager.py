@@ -2,13 +2,29 @@ from smtplib import SMTPException
 from unittest import TestCase
 from psycopg2 import OperationalError
 from oc_connections.CredentialManager import CredentialManager
+from oc_connections.ClientCache import ClientCache
+from oc_connections.SmtpSessionPool import SmtpSessionPool
+from oc_connections.FtpTransfer import FtpTransfer
+from oc_connections.PsqlStream import PsqlStream
+from oc_connections.PsqlLoader import PsqlLoader
+from oc_connections.ArtifactCache import ArtifactCache, CachedNexusClient
+from oc_connections.Benchmark import StandInServer
+from oc_connections.ConnectionPool import ConnectionPoolError
 from oc_connections.ConnectionManager import ConnectionManagerError
+from oc_connections.Metrics import MetricsCollector
+from oc_connections.CircuitBreaker import CircuitBreaker, CircuitOpenError
 import oc_connections.ConnectionManager
 
 from sys import version_info
+import shutil
+import subprocess
+import tempfile
+import sys
+import json
+import time
 
 if version_info.major == 3:
-    from unittest.mock import patch;
+    from unittest.mock import patch, MagicMock;
     from smtplib import SMTPException;
 
     class MockSMTP( object ):
@@ -31,6 +47,7 @@ if version_info.major == 3:
     class MockSvnFs( object ):
         def __init__( self, url, client, *args, **kwargs ):
             self.url = url;
+            self.svn = client;
 
         def listdir( self, url ):
             return ['apps', 'module1', 'doc', 'module2', 'src'];
@@ -49,6 +66,80 @@ if version_info.major == 3:
             no.dict_parms[ 'options' ] = options;
             return no;
 
+    class MockPgCursor( object ):
+        def __init__( self, connection ):
+            self.connection = connection;
+
+        def execute( self, query ):
+            self.connection.execute( query );
+
+        def close( self ):
+            pass;
+
+    class MockPgPoolClient( object ):
+        connections = [];
+
+        def __init__( self ):
+            self.closed = 0;
+            self.autocommit = False;
+            self.rollbacks = 0;
+            self.transaction_status = 0;
+
+        @classmethod
+        def connect( cls, **kwargs ):
+            no = cls();
+            no.kwargs = kwargs;
+            cls.connections.append( no );
+            return no;
+
+        def cursor( self ):
+            return MockPgCursor( self );
+
+        def execute( self, query ):
+            self.transaction_status = 2;
+
+        def get_transaction_status( self ):
+            return self.transaction_status;
+
+        def rollback( self ):
+            self.rollbacks += 1;
+            self.transaction_status = 0;
+
+        def close( self ):
+            self.closed = 1;
+
+    class MockPgClusterCursor( MockPgCursor ):
+        def fetchone( self ):
+            return ( self.connection.host in MockPgClusterClient.replicas, );
+
+    class MockPgClusterClient( MockPgPoolClient ):
+        connections = [];
+        down = set();
+        replicas = set();
+
+        @classmethod
+        def connect( cls, host, port, **kwargs ):
+            if host in cls.down:
+                raise OperationalError( "could not connect to server %s" % host );
+            no = super( MockPgClusterClient, cls ).connect( host = host, port = port, **kwargs );
+            no.host = host;
+            return no;
+
+        def cursor( self ):
+            return MockPgClusterCursor( self );
+
+    class MockSlowFTP( object ):
+        closed = [];
+
+        def connect( self, host, port, **kwargs ):
+            time.sleep( 0.3 );
+
+        def login( self, user, password ):
+            pass;
+
+        def close( self ):
+            self.closed.append( self );
+
     class MockFTP( object ):
         dict_parms = dict();
 
@@ -64,6 +155,24 @@ if version_info.major == 3:
             return [ "ftp.txt" ];
 
 
+    class MockPooledFTP( object ):
+        def __init__( self ):
+            self.commands = [];
+            self.quit_called = False;
+
+        def connect( self, host, port, **kwargs ):
+            self.host = host;
+
+        def login( self, user, password ):
+            self.user = user;
+
+        def voidcmd( self, command ):
+            self.commands.append( command );
+            return "200 OK";
+
+        def quit( self ):
+            self.quit_called = True;
+
     class MockNexusFS( object ):
         def __init__( self, api, work_fs, **kwargs ):
             self.api = api;
@@ -73,10 +182,36 @@ if version_info.major == 3:
         def __init__( self, **kwargs ):
             self.kwargs = kwargs;
 
+    class MockBrokenFTP( object ):
+        connects = 0;
+
+        def connect( self, host, port, **kwargs ):
+            MockBrokenFTP.connects += 1;
+            raise IOError( "Connection refused" );
+
     class MockFTPFS( object ):
         def __init__( self, **kwargs ):
             self.kwargs = kwargs;
 
+    class MockSMBConnection( object ):
+        def __init__( self, user, password, my_name, remote_name, domain = "", **kwargs ):
+            self.user = user;
+            self.domain = domain;
+            self.echoes = 0;
+            self.closed = False;
+
+        def connect( self, host, port = 139, **kwargs ):
+            self.host = host;
+            self.port = port;
+            return self.user != "XXX";
+
+        def echo( self, data, timeout = 10 ):
+            self.echoes += 1;
+            return data;
+
+        def close( self ):
+            self.closed = True;
+
 class ConnectionManagerTestSuite(TestCase):
     if version_info.major == 3:
         def assertItemsEqual(self, expected_seq, actual_seq, msg=None):
@@ -86,6 +221,27 @@ class ConnectionManagerTestSuite(TestCase):
         self.cred_mgr = CredentialManager()
         self.conn_mgr = oc_connections.ConnectionManager.ConnectionManager(self.cred_mgr)
 
+    # Import group
+    def test_import_is_lazy(self):
+        # backend libraries must not be imported until corresponding client is requested
+        budget = 0.5
+        heavy_modules = ["psycopg2", "pysvn", "ftplib", "smtplib", "smb", "fs", "oc_cdtapi", "oc_pyfs"]
+        script = "\n".join([
+            "import json, sys, time",
+            "start = time.perf_counter()",
+            "import oc_connections.ConnectionManager",
+            "elapsed = time.perf_counter() - start",
+            "print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))"])
+        result = json.loads(subprocess.check_output([sys.executable, "-c", script]).decode("utf-8"))
+        self.assertEqual([], [name for name in heavy_modules if name in result["modules"]])
+        self.assertLess(result["elapsed"], budget)
+
+    def test_lazy_attribute(self):
+        import ftplib
+        self.assertIs(ftplib.FTP, oc_connections.ConnectionManager.FTP)
+        with self.assertRaises(AttributeError):
+            oc_connections.ConnectionManager.NoSuchBackend
+
     # PSQL group
     if version_info.major == 3:
         @patch( 'oc_connections.ConnectionManager.psycopg2', new = MockPgClient )
@@ -139,6 +295,107 @@ class ConnectionManagerTestSuite(TestCase):
             self.assertIsInstance( client, MockPgClient );
             self.assertEqual(expected_params, client.dict_parms)
 
+        @patch( 'oc_connections.ConnectionManager.psycopg2', new = MockPgPoolClient )
+        def test_psql_pool(self):
+            MockPgPoolClient.connections = [];
+            self.cred_mgr.override_credential("TEST_PSQL", "URL", "127.0.0.1:5432/postgres?search_path=dl_schema")
+            self.cred_mgr.override_credential("TEST_PSQL", "USER", "test_user")
+            self.cred_mgr.override_credential("TEST_PSQL", "PASSWORD", "test_user")
+            pool = self.conn_mgr.get_psql_pool("TEST_PSQL", max_size=2);
+            self.assertIs( pool, self.conn_mgr.get_psql_pool("TEST_PSQL") );
+            with pool.connection() as connection:
+                self.assertEqual( connection.kwargs[ 'options' ], '-c search_path=dl_schema' );
+                self.assertEqual( connection.kwargs[ 'dbname' ], 'postgres' );
+                connection.execute( "SELECT 1" );
+            # unfinished transaction is rolled back on return
+            self.assertEqual( connection.get_transaction_status(), 0 );
+            with pool.connection() as same_connection:
+                self.assertIs( connection, same_connection );
+            # dead connection is replaced on checkout
+            connection.closed = 1;
+            with pool.connection() as new_connection:
+                self.assertIsNot( connection, new_connection );
+            self.assertEqual( 2, len( MockPgPoolClient.connections ) );
+            self.conn_mgr.close_pools();
+            self.assertTrue( new_connection.closed );
+            self.assertIsNot( pool, self.conn_mgr.get_psql_pool("TEST_PSQL") );
+
+        @patch( 'oc_connections.ConnectionManager.psycopg2', new = MockPgClusterClient )
+        def test_psql_multi_host(self):
+            MockPgClusterClient.connections = [];
+            MockPgClusterClient.down = set();
+            MockPgClusterClient.replicas = { "replica1", "replica2" };
+            self.cred_mgr.override_credential("TEST_PSQL", "URL", "primary:5432,replica1:5432,replica2:5433/postgres")
+            self.cred_mgr.override_credential("TEST_PSQL", "USER", "test_user")
+            self.cred_mgr.override_credential("TEST_PSQL", "PASSWORD", "test_user")
+            self.assertEqual( "primary", self.conn_mgr.get_psql_client("TEST_PSQL").host );
+            # reads are spread over replicas
+            hosts = { self.conn_mgr.get_psql_client("TEST_PSQL", readonly=True).host for _ in range(4) };
+            self.assertEqual( { "replica1", "replica2" }, hosts );
+            self.assertEqual( 5, MockPgClusterClient.connections[ -1 ].kwargs[ "connect_timeout" ] );
+            # replica is used for writes after failover
+            MockPgClusterClient.down = { "primary" };
+            MockPgClusterClient.replicas = { "replica1" };
+            self.assertEqual( "replica2", self.conn_mgr.get_psql_client("TEST_PSQL").host );
+            router = self.conn_mgr.get_psql_router("TEST_PSQL");
+            self.assertEqual( ( "replica2", 5433 ), router.primary );
+            self.assertEqual( [ ( "replica1", 5432 ) ], router.replicas );
+            # demoted primary is not used for writes
+            MockPgClusterClient.down = set();
+            MockPgClusterClient.replicas = { "primary", "replica1", "replica2" };
+            with self.assertRaises( ConnectionManagerError ):
+                self.conn_mgr.get_psql_client("TEST_PSQL");
+            # the only server being down
+            MockPgClusterClient.down = { "primary", "replica1", "replica2" };
+            with self.assertRaises( OperationalError ):
+                self.conn_mgr.get_psql_client("TEST_PSQL", readonly=True);
+
+        @patch( 'oc_connections.ConnectionManager.psycopg2', new = MockPgClusterClient )
+        def test_psql_multi_host_pools(self):
+            MockPgClusterClient.connections = [];
+            MockPgClusterClient.down = set();
+            MockPgClusterClient.replicas = { "replica" };
+            self.cred_mgr.override_credential("TEST_PSQL", "URL", "primary:5432,replica:5432/postgres")
+            self.cred_mgr.override_credential("TEST_PSQL", "USER", "test_user")
+            self.cred_mgr.override_credential("TEST_PSQL", "PASSWORD", "test_user")
+            pool = self.conn_mgr.get_psql_pool("TEST_PSQL");
+            readonly_pool = self.conn_mgr.get_psql_pool("TEST_PSQL", readonly=True);
+            self.assertIsNot( pool, readonly_pool );
+            with readonly_pool.connection() as connection:
+                self.assertEqual( "replica", connection.host );
+            with pool.connection() as connection:
+                self.assertEqual( "primary", connection.host );
+            # primary was demoted while connection was idle, new one goes to promoted replica
+            MockPgClusterClient.replicas = { "primary" };
+            with pool.connection() as new_connection:
+                self.assertEqual( "replica", new_connection.host );
+            self.assertTrue( connection.closed );
+            self.conn_mgr.close_pools();
+
+        @patch( 'oc_connections.ConnectionManager.psycopg2', new = MockPgPoolClient )
+        def test_psql_stream(self):
+            self.cred_mgr.override_credential("TEST_PSQL", "URL", "127.0.0.1:5432/postgres")
+            self.cred_mgr.override_credential("TEST_PSQL", "USER", "test_user")
+            self.cred_mgr.override_credential("TEST_PSQL", "PASSWORD", "test_user")
+            stream = self.conn_mgr.get_psql_stream("TEST_PSQL", itersize=100, readonly=True);
+            self.assertIsInstance( stream, PsqlStream );
+            self.assertEqual( 100, stream.itersize );
+            self.assertIs( stream.pool, self.conn_mgr.get_psql_pool("TEST_PSQL", readonly=True) );
+            self.assertIsNot( stream.pool, self.conn_mgr.get_psql_pool("TEST_PSQL") );
+            self.conn_mgr.close_pools();
+
+        @patch( 'oc_connections.ConnectionManager.psycopg2', new = MockPgPoolClient )
+        def test_psql_loader(self):
+            self.cred_mgr.override_credential("TEST_PSQL", "URL", "127.0.0.1:5432/postgres")
+            self.cred_mgr.override_credential("TEST_PSQL", "USER", "test_user")
+            self.cred_mgr.override_credential("TEST_PSQL", "PASSWORD", "test_user")
+            loader = self.conn_mgr.get_psql_loader("TEST_PSQL", "items", columns=["id"], batch_size=500, workers=16);
+            self.assertIsInstance( loader, PsqlLoader );
+            self.assertEqual( ( "items", [ "id" ], 500, 16 ), ( loader.table, loader.columns, loader.batch_size, loader.workers ) );
+            self.assertIs( loader.pool, self.conn_mgr.get_psql_pool("TEST_PSQL") );
+            self.assertEqual( 16, loader.pool.max_size );
+            self.conn_mgr.close_pools();
+
     def test_postgres_fail_no_username(self):
         self.cred_mgr.override_credential("TEST_PSQL", "URL", "127.0.0.1:5432/postgres")
         self.cred_mgr.reset_credential("TEST_PSQL", "USER")
@@ -183,6 +440,34 @@ class ConnectionManagerTestSuite(TestCase):
             self.assertIsInstance( client, MockSvnFs );
             self.assertItemsEqual(["apps", "module1", "doc", "module2", "src"], client.listdir('/'))
 
+    if version_info.major == 3:
+        def test_svn_pool(self):
+            self.cred_mgr.override_credential("TEST_SVN", "URL", "127.0.0.1")
+            self.cred_mgr.override_credential("TEST_SVN", "USER", "user")
+            self.cred_mgr.override_credential("TEST_SVN", "PASSWORD", "password")
+            conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr, client_cache = ClientCache() );
+            # pysvn may be not installed, so it is replaced in module globals where lazy import keeps it
+            pysvn = MagicMock();
+            pysvn.Client.side_effect = lambda: MagicMock();
+            with patch.dict( vars( oc_connections.ConnectionManager ), { "pysvn": pysvn, "SvnFS": MockSvnFs } ):
+                pool = conn_mgr.get_svn_pool("TEST_SVN", max_size=2)
+                self.assertIs( pool, conn_mgr.get_svn_pool("TEST_SVN") );
+                with pool.connection() as first, pool.connection() as second:
+                    # pooled clients are not shared through cache
+                    self.assertIsNot( first, second );
+                    self.assertEqual( (True, "user", "password", False), first.callback_get_login(None, None, None) );
+                    self.assertFalse( first.callback_get_login(None, None, None)[0] );
+                with pool.connection() as client:
+                    self.assertIn( client, [ first, second ] );
+                    # login attempt is given back on return to the pool
+                    self.assertTrue( client.callback_get_login(None, None, None)[0] );
+                with conn_mgr.get_svn_fs_pool("TEST_SVN").connection() as fs:
+                    self.assertIsInstance( fs, MockSvnFs );
+                results = list( conn_mgr.get_svn_batch("TEST_SVN").listdir( [ "/", "/apps" ] ) );
+                self.assertEqual( 2, len( results ) );
+                self.assertTrue( all( result.value == fs.listdir('/') for result in results ) );
+                conn_mgr.close_pools();
+
     def test_svn_no_user(self):
         self.cred_mgr.reset_credential("TEST_SVN", "USER")
         self.cred_mgr.override_credential("TEST_SVN", "PASSWORD", "guest")
@@ -226,6 +511,300 @@ class ConnectionManagerTestSuite(TestCase):
         self.assertIsNone(client.web.auth);
 
 
+    if version_info.major == 3:
+        @patch( 'oc_connections.ConnectionManager.Jenkins' )
+        @patch( 'oc_connections.ConnectionManager.NexusAPI', new = MockNexusAPI )
+        def test_client_cache( self, jenkins_mock ):
+            cache = ClientCache();
+            conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr, client_cache = cache );
+            self.assertIs( cache, conn_mgr.client_cache );
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", "http://127.0.0.1:8081/nexus/" );
+            self.cred_mgr.override_credential( "TEST_MVN", "USER", "test-user" );
+            self.cred_mgr.override_credential( "TEST_MVN", "PASSWORD", "test-user" );
+            self.cred_mgr.override_credential( "TEST_JENKINS", "URL", "http://127.0.0.1:8080/" );
+            self.cred_mgr.override_credential( "TEST_JENKINS", "USER", "user" );
+            self.cred_mgr.override_credential( "TEST_JENKINS", "PASSWORD", "password" );
+            client = conn_mgr.get_mvn_client( "TEST_MVN" );
+            self.assertIs( client, conn_mgr.get_mvn_client( "TEST_MVN" ) );
+            self.assertIsNot( client, conn_mgr.get_mvn_client( "TEST_MVN", readonly = True ) );
+            jenkins = conn_mgr.get_jenkins_client( "TEST_JENKINS" );
+            self.assertIs( jenkins, conn_mgr.get_jenkins_client( "TEST_JENKINS" ) );
+            self.assertEqual( 1, jenkins_mock.call_count );
+
+            # credential change drops clients of the resource only
+            self.cred_mgr.override_credential( "TEST_MVN", "PASSWORD", "new-password" );
+            new_client = conn_mgr.get_mvn_client( "TEST_MVN" );
+            self.assertIsNot( client, new_client );
+            self.assertEqual( "new-password", new_client.kwargs[ "auth" ] );
+            self.assertIs( jenkins, conn_mgr.get_jenkins_client( "TEST_JENKINS" ) );
+            self.assertEqual( {"hits": 3, "misses": 4, "size": 2}, cache.stats );
+
+        @patch( 'oc_connections.ConnectionManager.NexusAPI', new = MockNexusAPI )
+        def test_client_cache_disabled( self ):
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", "http://127.0.0.1:8081/nexus/" );
+            self.assertIsNone( self.conn_mgr.client_cache );
+            self.assertIsNot( self.conn_mgr.get_mvn_client( "TEST_MVN" ), self.conn_mgr.get_mvn_client( "TEST_MVN" ) );
+
+    # Instrumentation group
+    if version_info.major == 3:
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockFTP )
+        def test_observers( self ):
+            events = [];
+            collector = MetricsCollector( self.conn_mgr );
+            self.conn_mgr.add_observer( events.append );
+            self.conn_mgr.add_observer( collector );
+            self.cred_mgr.override_credential( "TEST_FTP", "URL", "127.0.0.1:21" );
+            self.cred_mgr.override_credential( "TEST_FTP", "USER", "test_ftp" );
+            self.cred_mgr.override_credential( "TEST_FTP", "PASSWORD", "test_ftp" );
+            self.conn_mgr.get_ftp_client( "TEST_FTP" );
+            self.assertEqual( [ "credentials", "parse", "connect", "login", "total" ], [ event.stage for event in events ] );
+            self.assertTrue( all( event.kind == "ftp" and event.resource == "TEST_FTP" for event in events ) );
+            self.assertTrue( all( event.success for event in events ) );
+
+            # failed stage and the whole call are reported
+            del events[:];
+            self.cred_mgr.override_credential( "TEST_FTP", "URL", "127.0.0.1" );
+            with self.assertRaises( ConnectionManagerError ):
+                self.conn_mgr.get_ftp_client( "TEST_FTP" );
+            self.assertEqual( [ "credentials", "parse", "total" ], [ event.stage for event in events ] );
+            self.assertIsInstance( events[ -1 ].error, ConnectionManagerError );
+            self.assertEqual( 2, collector.histogram( "ftp", "TEST_FTP" ).count );
+            self.assertEqual( 1, collector.errors( "ftp", "TEST_FTP" ) );
+
+            self.conn_mgr.remove_observer( events.append );
+            self.conn_mgr.remove_observer( collector );
+            del events[:];
+            with self.assertRaises( ConnectionManagerError ):
+                self.conn_mgr.get_ftp_client( "TEST_FTP" );
+            self.assertEqual( [], events );
+
+        @patch( 'oc_connections.ConnectionManager.NexusAPI', new = MockNexusAPI )
+        @patch( 'oc_connections.ConnectionManager.NexusFS', new = MockNexusFS )
+        def test_observers_nested_calls( self ):
+            events = [];
+            self.conn_mgr.add_observer( events.append );
+            self.conn_mgr.add_observer( lambda event: 1 / 0 );
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", "http://127.0.0.1:8081/nexus/" );
+            self.conn_mgr.get_mvn_fs_client( "TEST_MVN" );
+            self.assertEqual( [ ( "mvn", "credentials" ), ( "mvn", "connect" ), ( "mvn", "total" ),
+                               ( "mvn_fs", "connect" ), ( "mvn_fs", "total" ) ],
+                             [ ( event.kind, event.stage ) for event in events ] );
+
+        @patch( 'oc_connections.ConnectionManager.psycopg2', new = MockPgPoolClient )
+        def test_pool_stats( self ):
+            self.cred_mgr.override_credential( "TEST_PSQL", "URL", "127.0.0.1:5432/postgres" );
+            self.cred_mgr.override_credential( "TEST_PSQL", "USER", "test_user" );
+            self.cred_mgr.override_credential( "TEST_PSQL", "PASSWORD", "test_user" );
+            pool = self.conn_mgr.get_psql_pool( "TEST_PSQL" );
+            with pool.connection():
+                self.assertEqual( { ( "psql", "TEST_PSQL" ): { "size": 1, "idle": 0, "in_use": 1 } },
+                                  self.conn_mgr.get_pool_stats() );
+            self.conn_mgr.close_pools();
+
+    # Circuit breaker group
+    if version_info.major == 3:
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockBrokenFTP )
+        def test_circuit_breaker( self ):
+            MockBrokenFTP.connects = 0;
+            conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr,
+                circuit_breaker = { "failure_threshold": 2, "reset_timeout": 60 } );
+            self.cred_mgr.override_credential( "TEST_FTP", "URL", "127.0.0.1:21" );
+            self.cred_mgr.override_credential( "TEST_FTP", "USER", "test_ftp" );
+            self.cred_mgr.override_credential( "TEST_FTP", "PASSWORD", "test_ftp" );
+            for _ in range( 2 ):
+                with self.assertRaises( IOError ):
+                    conn_mgr.get_ftp_client( "TEST_FTP" );
+            with self.assertRaises( CircuitOpenError ):
+                conn_mgr.get_ftp_client( "TEST_FTP" );
+            self.assertEqual( 2, MockBrokenFTP.connects );
+            self.assertEqual( CircuitBreaker.OPEN, conn_mgr.get_circuit_breaker( "TEST_FTP" ).state );
+            # probe bypasses open circuit
+            with self.assertRaises( IOError ):
+                conn_mgr.probe( "TEST_FTP", "ftp" );
+            self.assertEqual( 3, MockBrokenFTP.connects );
+
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockPooledFTP )
+        def test_circuit_breaker_closed_by_probe( self ):
+            self.cred_mgr.override_credential( "TEST_FTP", "URL", "127.0.0.1:21" );
+            self.cred_mgr.override_credential( "TEST_FTP", "USER", "test_ftp" );
+            self.cred_mgr.override_credential( "TEST_FTP", "PASSWORD", "test_ftp" );
+            self.assertIsNone( self.conn_mgr.get_circuit_breaker( "TEST_FTP" ) );
+            breaker = self.conn_mgr.set_circuit_breaker( "TEST_FTP", failure_threshold = 1, reset_timeout = 60 );
+            breaker.record_failure( IOError( "Connection refused" ) );
+            with self.assertRaises( CircuitOpenError ):
+                self.conn_mgr.get_ftp_client( "TEST_FTP" );
+            self.conn_mgr.probe( "TEST_FTP", "ftp" );
+            self.assertEqual( CircuitBreaker.CLOSED, breaker.state );
+            self.assertIsInstance( self.conn_mgr.get_ftp_client( "TEST_FTP" ), MockPooledFTP );
+
+        def test_circuit_breaker_of_http_resource( self ):
+            with StandInServer() as server:
+                url = "http://%s/" % server.address;
+            # server is stopped, its port refuses connections
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", url );
+            self.cred_mgr.reset_credential( "TEST_MVN", "USER" );
+            breaker = self.conn_mgr.set_circuit_breaker( "TEST_MVN", failure_threshold = 1, reset_timeout = 60 );
+            # client creation does not touch the server, so nothing is recorded
+            for _ in range( 3 ):
+                self.conn_mgr.get_mvn_client( "TEST_MVN" );
+            self.assertEqual( ( CircuitBreaker.CLOSED, 0 ), ( breaker.state, breaker.failures ) );
+            with self.assertRaises( Exception ):
+                self.conn_mgr.probe( "TEST_MVN", "mvn", timeout = 1 );
+            self.assertEqual( CircuitBreaker.OPEN, breaker.state );
+            with self.assertRaises( CircuitOpenError ):
+                self.conn_mgr.get_mvn_client( "TEST_MVN" );
+
+        def test_probe_of_lazy_clients( self ):
+            # clients which do not connect on creation are checked by a request to the unreachable server
+            with StandInServer() as server:
+                url = "http://%s/" % server.address;
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", url );
+            self.cred_mgr.reset_credential( "TEST_MVN", "USER" );
+            self.cred_mgr.override_credential( "TEST_FTP", "URL", "127.0.0.1:1" );
+            self.cred_mgr.override_credential( "TEST_FTP", "USER", "test_ftp" );
+            self.cred_mgr.override_credential( "TEST_FTP", "PASSWORD", "test_ftp" );
+            self.cred_mgr.override_credential( "TEST_SVN", "URL", "svn://127.0.0.1:1/repo" );
+            self.cred_mgr.override_credential( "TEST_SVN", "USER", "user" );
+            self.cred_mgr.override_credential( "TEST_SVN", "PASSWORD", "password" );
+            self.cred_mgr.override_credential( "TEST_SMB", "URL", "smb://127.0.0.1/share/dir" );
+            self.cred_mgr.override_credential( "TEST_SMB", "USER", "domain/user" );
+            self.cred_mgr.override_credential( "TEST_SMB", "PASSWORD", "password" );
+            pysvn = MagicMock();
+            pysvn.Client.return_value.info2.side_effect = IOError( "Connection refused" );
+            with patch.dict( vars( oc_connections.ConnectionManager ), { "pysvn": pysvn, "SvnFS": MockSvnFs } ):
+                for resource, kind in [ ( "TEST_MVN", "mvn_fs" ), ( "TEST_FTP", "ftp_fs" ),
+                                        ( "TEST_SVN", "svn" ), ( "TEST_SVN", "svn_fs" ), ( "TEST_SMB", "smb_fs" ) ]:
+                    conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr );
+                    breaker = conn_mgr.set_circuit_breaker( resource, failure_threshold = 1, reset_timeout = 60 );
+                    with self.assertRaises( Exception ):
+                        conn_mgr.probe( resource, kind, timeout = 1 );
+                    self.assertEqual( CircuitBreaker.OPEN, breaker.state, kind );
+            pysvn.Client.return_value.info2.assert_called_with( "svn://127.0.0.1:1/repo", recurse = False );
+
+        def test_probe_of_unknown_kind( self ):
+            class ExtendedConnectionManager( oc_connections.ConnectionManager.ConnectionManager ):
+                def get_custom_client( self, resource ):
+                    return object();
+
+            conn_mgr = ExtendedConnectionManager( self.cred_mgr );
+            breaker = conn_mgr.set_circuit_breaker( "TEST_FTP", failure_threshold = 1 );
+            with self.assertRaises( ConnectionManagerError ):
+                conn_mgr.probe( "TEST_FTP", "custom" );
+            self.assertEqual( CircuitBreaker.CLOSED, breaker.state );
+
+        def test_circuit_breaker_ignores_configuration_errors( self ):
+            breaker = self.conn_mgr.set_circuit_breaker( "TEST_FTP", failure_threshold = 1 );
+            self.cred_mgr.reset_credential( "TEST_FTP", "URL" );
+            with self.assertRaises( ConnectionManagerError ):
+                self.conn_mgr.get_ftp_client( "TEST_FTP" );
+            self.assertEqual( CircuitBreaker.CLOSED, breaker.state );
+            with self.assertRaises( ConnectionManagerError ):
+                self.conn_mgr.probe( "TEST_FTP", "nothing" );
+
+    # Shared HTTP connections group
+    if version_info.major == 3:
+        def test_shared_http_connections( self ):
+            with StandInServer() as server:
+                url = "http://%s/" % server.address;
+                for resource in [ "TEST_MVN", "TEST_JENKINS", "TEST_MVN_2" ]:
+                    self.cred_mgr.override_credential( resource, "URL", url );
+                    self.cred_mgr.override_credential( resource, "USER", "test-user" );
+                    self.cred_mgr.override_credential( resource, "PASSWORD", "test-password" );
+                self.conn_mgr.set_http_policy( "TEST_MVN_2", pool_maxsize = 2, max_retries = 5, keep_alive = False );
+                mvn_client = self.conn_mgr.get_mvn_client( "TEST_MVN" );
+                jenkins_client = self.conn_mgr.get_jenkins_client( "TEST_JENKINS" );
+                other_client = self.conn_mgr.get_mvn_client( "TEST_MVN_2" );
+                adapter = mvn_client.web.get_adapter( url );
+                self.assertIs( adapter, jenkins_client.web.get_adapter( url ) );
+                self.assertIs( adapter, self.conn_mgr.get_mvn_client( "TEST_MVN" ).web.get_adapter( url ) );
+                # credentials are kept per client
+                self.assertEqual( ( "test-user", "test-password" ), jenkins_client.web.auth );
+
+                other_adapter = other_client.web.get_adapter( url );
+                self.assertIsNot( adapter, other_adapter );
+                self.assertEqual( 5, other_adapter.max_retries.total );
+                self.assertEqual( "close", other_client.web.headers[ "Connection" ] );
+
+                # keep-alive connection is reused by another client
+                self.assertEqual( 200, mvn_client.web.get( url ).status_code );
+                self.assertEqual( 200, jenkins_client.web.get( url ).status_code );
+                pools = [ adapter.poolmanager.pools[ key ] for key in adapter.poolmanager.pools.keys() ];
+                self.assertEqual( 1, sum( pool.num_connections for pool in pools ) );
+                self.conn_mgr.close_pools();
+
+        def test_http_policy( self ):
+            self.assertEqual( 2, self.conn_mgr.get_http_policy( "TEST_MVN" )[ "max_retries" ] );
+            self.conn_mgr.set_http_policy( "TEST_MVN", backoff_factor = 0.5 );
+            self.assertEqual( 0.5, self.conn_mgr.get_http_policy( "TEST_MVN" )[ "backoff_factor" ] );
+            with self.assertRaises( ConnectionManagerError ):
+                self.conn_mgr.set_http_policy( "TEST_MVN", pool_size = 2 );
+            # lists, as urllib3 documents them, are accepted
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", "http://127.0.0.1:8081/nexus/" );
+            self.cred_mgr.reset_credential( "TEST_MVN", "USER" );
+            self.conn_mgr.set_http_policy( "TEST_MVN", status_forcelist = [ 500, 502 ], allowed_methods = [ "GET" ] );
+            self.assertEqual( ( 500, 502 ), self.conn_mgr.get_http_policy( "TEST_MVN" )[ "status_forcelist" ] );
+            retry = self.conn_mgr.get_mvn_client( "TEST_MVN" ).web.get_adapter( "http://127.0.0.1:8081/" ).max_retries;
+            self.assertEqual( ( [ 500, 502 ], [ "GET" ] ), ( list( retry.status_forcelist ), list( retry.allowed_methods ) ) );
+
+        def test_http_connections_not_shared( self ):
+            conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr, share_http_connections = False );
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", "http://127.0.0.1:8081/nexus/" );
+            self.assertIsNot( conn_mgr.get_mvn_client( "TEST_MVN" ).web.get_adapter( "http://127.0.0.1:8081/" ),
+                              conn_mgr.get_mvn_client( "TEST_MVN" ).web.get_adapter( "http://127.0.0.1:8081/" ) );
+
+    # Warm-up group
+    if version_info.major == 3:
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockSlowFTP )
+        @patch( 'oc_connections.ConnectionManager.NexusAPI', new = MockNexusAPI )
+        @patch( 'oc_connections.ConnectionManager.psycopg2', new = MockPgPoolClient )
+        def test_warm_up( self ):
+            MockPgPoolClient.connections = [];
+            MockSlowFTP.closed = [];
+            conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr, client_cache = ClientCache() );
+            self.cred_mgr.override_credential( "TEST_PSQL", "URL", "127.0.0.1:5432/postgres" );
+            self.cred_mgr.override_credential( "TEST_PSQL", "USER", "test_user" );
+            self.cred_mgr.override_credential( "TEST_PSQL", "PASSWORD", "test_user" );
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", "http://127.0.0.1:8081/nexus/" );
+            self.cred_mgr.override_credential( "TEST_FTP", "URL", "127.0.0.1:21" );
+            self.cred_mgr.override_credential( "TEST_FTP", "USER", "test_ftp" );
+            self.cred_mgr.override_credential( "TEST_FTP", "PASSWORD", "test_ftp" );
+            self.cred_mgr.reset_credential( "TEST_JENKINS", "URL" );
+            pool = conn_mgr.get_psql_pool( "TEST_PSQL", min_size = 2 );
+
+            results = conn_mgr.warm_up( [ ( "TEST_PSQL", "psql" ), ( "TEST_MVN", "mvn" ), ( "TEST_JENKINS", "jenkins" ),
+                                          ( "TEST_MVN", "unknown" ), ( "TEST_FTP", "ftp" ) ],
+                                        timeout = { "TEST_FTP": 0.05 } );
+            self.assertEqual( [ "TEST_PSQL", "TEST_MVN", "TEST_JENKINS", "TEST_MVN", "TEST_FTP" ],
+                              [ result.resource for result in results ] );
+            self.assertEqual( [ True, True, False, False, False ], [ result.success for result in results ] );
+            self.assertIsInstance( results[ 2 ].error, ConnectionManagerError );
+            self.assertIsInstance( results[ 3 ].error, ConnectionManagerError );
+            self.assertIn( "timed out", str( results[ 4 ].error ) );
+            # pool is filled and cache is populated
+            self.assertEqual( 2, pool.idle );
+            self.assertEqual( 2, len( MockPgPoolClient.connections ) );
+            self.assertEqual( 1, conn_mgr.client_cache.stats[ "size" ] );
+            # uncached client is closed after warm-up
+            time.sleep( 0.4 );
+            self.assertEqual( 1, len( MockSlowFTP.closed ) );
+            self.assertEqual( [], conn_mgr.warm_up( {} ) );
+
+        @patch( 'oc_connections.ConnectionManager._WARM_UP_TIMEOUT', new = 0.05 )
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockSlowFTP )
+        @patch( 'oc_connections.ConnectionManager.NexusAPI', new = MockNexusAPI )
+        def test_warm_up_partial_timeouts( self ):
+            conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr );
+            self.cred_mgr.override_credential( "TEST_MVN", "URL", "http://127.0.0.1:8081/nexus/" );
+            self.cred_mgr.override_credential( "TEST_FTP", "URL", "127.0.0.1:21" );
+            self.cred_mgr.override_credential( "TEST_FTP", "USER", "test_ftp" );
+            self.cred_mgr.override_credential( "TEST_FTP", "PASSWORD", "test_ftp" );
+
+            # resource missing from timeouts is waited for default timeout, not forever
+            results = conn_mgr.warm_up( { "TEST_MVN": "mvn", "TEST_FTP": "ftp" }, timeout = { "TEST_MVN": 1 } );
+            self.assertEqual( [ True, False ], [ result.success for result in results ] );
+            self.assertIn( "timed out", str( results[ 1 ].error ) );
+            self.assertLess( results[ 1 ].latency, 0.3 );
+
     #FTP group
     if version_info.major == 3:
         @patch( 'oc_connections.ConnectionManager.FTP', new = MockFTP )
@@ -244,6 +823,43 @@ class ConnectionManagerTestSuite(TestCase):
             self.assertEqual( client.dict_parms, expected_parms );
             self.assertIn( "ftp.txt", client.nlst() )
 
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockPooledFTP )
+        def test_ftp_pool(self):
+            for resource in [ "TEST_FTP", "TEST_FTP_2" ]:
+                self.cred_mgr.override_credential(resource, "URL", "ftp://127.0.0.1:21")
+                self.cred_mgr.override_credential(resource, "USER", "test_ftp")
+                self.cred_mgr.override_credential(resource, "PASSWORD", "test_ftp")
+            pool = self.conn_mgr.get_ftp_pool("TEST_FTP", max_size=2, keepalive=None, max_sessions_per_host=2)
+            self.assertIs( pool, self.conn_mgr.get_ftp_pool("TEST_FTP") );
+            client = pool.acquire();
+            self.assertIsInstance( client, MockPooledFTP );
+            self.assertEqual( client.user, "test_ftp" );
+            pool.release( client );
+            self.assertIs( client, pool.acquire() );
+            self.assertEqual( [ "NOOP" ], client.commands );
+
+            # host limit is shared by pools of resources pointing to the same host
+            other_pool = self.conn_mgr.get_ftp_pool("TEST_FTP_2", max_size=2, keepalive=None, max_sessions_per_host=2)
+            other_client = other_pool.acquire();
+            with self.assertRaises( ConnectionPoolError ):
+                other_pool.acquire( timeout = 0.05 );
+            pool.release( client );
+            self.conn_mgr.close_pools();
+            self.assertTrue( client.quit_called );
+            other_pool.release( other_client );
+            self.assertTrue( other_client.quit_called );
+
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockPooledFTP )
+        def test_ftp_transfer(self):
+            self.cred_mgr.override_credential("TEST_FTP", "URL", "ftp://127.0.0.1:21")
+            self.cred_mgr.override_credential("TEST_FTP", "USER", "test_ftp")
+            self.cred_mgr.override_credential("TEST_FTP", "PASSWORD", "test_ftp")
+            transfer = self.conn_mgr.get_ftp_transfer("TEST_FTP", sessions=3, keepalive=None)
+            self.assertIsInstance( transfer, FtpTransfer );
+            self.assertIs( transfer.pool, self.conn_mgr.get_ftp_pool("TEST_FTP") );
+            self.assertEqual( 3, transfer.pool.max_size );
+            self.conn_mgr.close_pools();
+
     def test_ftp_no_url(self):
         self.cred_mgr.reset_credential("TEST_FTP", "URL")
         self.cred_mgr.override_credential("TEST_FTP", "USER", "test_ftp")
@@ -291,6 +907,20 @@ class ConnectionManagerTestSuite(TestCase):
             self.assertEqual( client.host, "127.0.0.1" );
             self.assertEqual( client.port, 25 );
 
+        @patch( 'oc_connections.ConnectionManager.SMTP', new = MockSMTP )
+        def test_smtp_pool(self):
+            self.cred_mgr.override_credential("TEST_SMTP", "URL", "127.0.0.1:25")
+            self.cred_mgr.override_credential("TEST_SMTP", "USER", "test_smtp_user")
+            self.cred_mgr.override_credential("TEST_SMTP", "PASSWORD", "test_smtp_password")
+            pool = self.conn_mgr.get_smtp_pool("TEST_SMTP", max_size=2)
+            self.assertIsInstance( pool, SmtpSessionPool );
+            self.assertIs( pool, self.conn_mgr.get_smtp_pool("TEST_SMTP") );
+            self.assertEqual( 2, pool.max_size );
+            client = pool.acquire();
+            self.assertIsInstance( client, MockSMTP );
+            self.assertEqual( client.user, "test_smtp_user" );
+            pool.release( client, discard = True );
+
         @patch( 'oc_connections.ConnectionManager.SMTP', new = MockSMTP )
         def test_smtp_fail_user(self):
             self.cred_mgr.override_credential("TEST_SMTP", "URL", "127.0.0.1:25")
@@ -328,34 +958,176 @@ class ConnectionManagerTestSuite(TestCase):
         with self.assertRaises(ConnectionManagerError):
             self.conn_mgr.get_jenkins_client("TEST_JENKINS")
 
-    if version_info.major == 2:
-        def test_parse_smb_url( self ):
-            self.assertEqual( self.conn_mgr.parse_smb_url( "smb://localhost/labuda/K/Ret/In"), ( "localhost", "labuda", "K/Ret/In" ) );
-
-            #invalid URL
-            with self.assertRaises( IndexError ):
-                self.conn_mgr.parse_smb_url( "localhost/labuda/bab" );
+    # Lifecycle group
+    if version_info.major == 3:
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockPooledFTP )
+        def test_client_context(self):
+            self.cred_mgr.override_credential("FTP", "URL", "ftp://127.0.0.1:21")
+            self.cred_mgr.override_credential("FTP", "USER", "test_ftp")
+            self.cred_mgr.override_credential("FTP", "PASSWORD", "test_ftp")
+            with self.conn_mgr.client("FTP") as client:
+                self.assertIsInstance( client, MockPooledFTP );
+                self.assertEqual( [ client ], [ record.client for record in self.conn_mgr.get_open_clients() ] );
+            self.assertTrue( client.quit_called );
+            self.assertEqual( [], self.conn_mgr.get_open_clients() );
+            with self.assertRaises( ConnectionManagerError ):
+                self.conn_mgr.open_client("TEST_FTP");
+            leaked = self.conn_mgr.open_client("FTP", "ftp");
+            self.assertEqual( 1, self.conn_mgr.close_all() );
+            self.assertTrue( leaked.quit_called );
 
+        @patch( 'oc_connections.ConnectionManager.FTP', new = MockPooledFTP )
+        def test_track_clients(self):
+            self.cred_mgr.override_credential("TEST_FTP", "URL", "ftp://127.0.0.1:21")
+            self.cred_mgr.override_credential("TEST_FTP", "USER", "test_ftp")
+            self.cred_mgr.override_credential("TEST_FTP", "PASSWORD", "test_ftp")
+            conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr, track_clients = True );
+            client = conn_mgr.get_ftp_client("TEST_FTP");
+            pool = conn_mgr.get_ftp_pool("TEST_FTP", keepalive=None);
+            with pool.connection() as pooled_client:
+                pass
+            records = conn_mgr.get_open_clients();
+            # pooled clients are owned by pools
+            self.assertEqual( [ client ], [ record.client for record in records ] );
+            self.assertEqual( ( "ftp", "TEST_FTP" ), ( records[0].kind, records[0].resource ) );
+            self.assertTrue( any( "test_track_clients" in frame for frame in records[0].stack ) );
+            # HTTP API clients have nothing to close, registry does not grow with them
+            self.cred_mgr.override_credential("TEST_JENKINS", "URL", "http://127.0.0.1:8080/")
+            self.cred_mgr.override_credential("TEST_JENKINS", "USER", "user")
+            self.cred_mgr.override_credential("TEST_JENKINS", "PASSWORD", "password")
+            for _ in range(3):
+                conn_mgr.get_jenkins_client("TEST_JENKINS");
+            self.assertEqual( 1, len( conn_mgr.get_open_clients() ) );
+            conn_mgr.close_all();
+            self.assertTrue( client.quit_called );
+            self.assertTrue( pooled_client.quit_called );
+            # untracked manager does not register clients
+            self.conn_mgr.get_ftp_client("TEST_FTP");
+            self.assertEqual( [], self.conn_mgr.get_open_clients() );
+
+    # SMB group
+    if version_info.major == 3:
+        @patch( 'oc_connections.ConnectionManager.SMBConnection', new = MockSMBConnection )
+        def test_smb_client(self):
+            self.cred_mgr.override_credential("TEST_SMB", "URL", "smb://127.0.0.1/share/dir")
+            self.cred_mgr.override_credential("TEST_SMB", "USER", "domain/user")
+            self.cred_mgr.override_credential("TEST_SMB", "PASSWORD", "password")
+            client = self.conn_mgr.get_smb_client("TEST_SMB")
+            self.assertIsInstance( client, MockSMBConnection );
+            self.assertEqual( ( "domain", "user", "127.0.0.1", 445 ), ( client.domain, client.user, client.host, client.port ) );
+            self.cred_mgr.override_credential("TEST_SMB", "USER", "domain/XXX")
             with self.assertRaises( ConnectionManagerError ):
-                self.conn_mgr.parse_smb_url( "smb://localhost" );
+                self.conn_mgr.get_smb_client("TEST_SMB")
+
+        @patch( 'oc_connections.ConnectionManager.SMBConnection', new = MockSMBConnection )
+        def test_smb_pool(self):
+            for resource, share in [ ( "TEST_SMB", "share" ), ( "TEST_SMB_2", "other" ) ]:
+                self.cred_mgr.override_credential(resource, "URL", "smb://127.0.0.1/%s/dir" % share)
+                self.cred_mgr.override_credential(resource, "USER", "domain/user")
+                self.cred_mgr.override_credential(resource, "PASSWORD", "password")
+            pool = self.conn_mgr.get_smb_pool("TEST_SMB", max_size=2, keepalive=None, max_sessions_per_host=1)
+            # session is not bound to share
+            self.assertIs( pool, self.conn_mgr.get_smb_pool("TEST_SMB_2") );
+            with pool.connection() as client:
+                pass
+            with pool.connection() as same_client:
+                self.assertIs( client, same_client );
+                self.assertEqual( 1, client.echoes );
+                with self.assertRaises( ConnectionPoolError ):
+                    pool.acquire( timeout = 0.05 );
+            self.assertIn( ( "smb", "domain/user@127.0.0.1" ), self.conn_mgr.get_pool_stats() );
+            self.conn_mgr.close_pools();
+            self.assertTrue( client.closed );
 
+    if version_info.major == 3:
+        @patch( 'oc_connections.ConnectionManager.SMBConnection', new = MockSMBConnection )
+        def test_smb_fs_client(self):
+            self.cred_mgr.override_credential("TEST_SMB", "URL", "smb://127.0.0.1/share/dir/sub")
+            self.cred_mgr.override_credential("TEST_SMB", "USER", "domain/user")
+            self.cred_mgr.override_credential("TEST_SMB", "PASSWORD", "password")
+            client = self.conn_mgr.get_smb_fs_client("TEST_SMB", sessions=3, chunk_size=4096)
+            self.assertEqual( ( "share", "dir/sub", 4096 ), ( client.share, client.base_path, client.chunk_size ) );
+            self.assertEqual( 3, client.pool.max_size );
+            self.assertIs( client.pool, self.conn_mgr.get_smb_pool("TEST_SMB") );
+            self.conn_mgr.close_pools();
+
+    def test_parse_smb_url( self ):
+        self.assertEqual( self.conn_mgr.parse_smb_url( "smb://localhost/labuda/K/Ret/In"), ( "localhost", "labuda", "K/Ret/In" ) );
+
+        #invalid URL
+        with self.assertRaises( ConnectionManagerError ):
+            self.conn_mgr.parse_smb_url( "localhost/labuda/bab" );
 
-        def test_parse_smb_user( self ):
-            self.assertEqual( self.conn_mgr.parse_smb_user( "T/K" ), ( "T", "K" ) );
+        with self.assertRaises( ConnectionManagerError ):
+            self.conn_mgr.parse_smb_url( "smb://localhost" );
 
-            # no domain given
-            with self.assertRaises( ConnectionManagerError ):
-                self.conn_mgr.parse_smb_user( "thebug" );
 
-            # explicit domain
-            self.assertEqual( self.conn_mgr.parse_smb_user( "T/K/P" ), ( "T", "K/P" ) );
+    def test_parse_smb_user( self ):
+        self.assertEqual( self.conn_mgr.parse_smb_user( "T/K" ), ( "T", "K" ) );
+
+        # no domain given
+        with self.assertRaises( ConnectionManagerError ):
+            self.conn_mgr.parse_smb_user( "thebug" );
+
+        # explicit domain
+        self.assertEqual( self.conn_mgr.parse_smb_user( "T/K/P" ), ( "T", "K/P" ) );
 
     def test_parse_psql_url( self ):
         self.assertEqual( self.conn_mgr.parse_psql_url( "localhost:5432/postgres?search_path=dl_schema" ), ('localhost', 5432, 'postgres', 'search_path=dl_schema') );
         self.assertEqual( self.conn_mgr.parse_psql_url( "localhost:5432/postgres" ), ('localhost', 5432, 'postgres', '') );
         with self.assertRaises( ConnectionManagerError ):
             self.conn_mgr.parse_psql_url( "localhost/postgres" );
-
+        self.assertEqual( self.conn_mgr.parse_psql_url( "h1:5432,h2:5433/postgres" ), ('h1,h2', '5432,5433', 'postgres', '') );
+        self.assertEqual( ( ( "h1", 5432 ), ( "h2", 5433 ) ), self.conn_mgr.parse_endpoint( "h1:5432,h2:5433/postgres", "psql" ).hosts );
+        with self.assertRaises( ConnectionManagerError ):
+            self.conn_mgr.parse_psql_url( "h1:5432,h2/postgres" );
+
+
+    def test_parse_endpoint( self ):
+        endpoint = self.conn_mgr.parse_endpoint( "postgresql://localhost:5432/postgres?search_path=s", "psql" );
+        self.assertEqual( ( "psql", "postgresql", "localhost", 5432, "postgres", "search_path=s" ),
+                          ( endpoint.kind, endpoint.scheme, endpoint.host, endpoint.port, endpoint.path, endpoint.options ) );
+        # parsed endpoints are cached and read-only
+        self.assertIs( endpoint, self.conn_mgr.parse_endpoint( "postgresql://localhost:5432/postgres?search_path=s", "psql" ) );
+        with self.assertRaises( AttributeError ):
+            endpoint.host = "other";
+        self.assertEqual( ( "localhost", 21 ), ( self.conn_mgr.parse_endpoint( "localhost:21", "host" ).host,
+                                                 self.conn_mgr.parse_endpoint( "localhost:21", "host" ).port ) );
+        self.assertEqual( "localhost", self.conn_mgr.parse_endpoint( "https://localhost/nexus" ).host );
+        self.assertEqual( "share/dir/file", self.conn_mgr.parse_endpoint( "smb://host/share/dir/file", "smb" ).path );
+        for url, kind in [ ( "localhost/postgres", "psql" ), ( "localhost", "host" ), ( "localhost:port", "host" ),
+                           ( "/nexus", "url" ), ( "smb://host", "smb" ), ( "localhost:21", "ldap" ), ( None, "url" ),
+                           ( "host/share", "smb" ), ( "http://[::1/x", "url" ), ( "[::1:5432/db", "psql" ) ]:
+            with self.assertRaises( ConnectionManagerError ):
+                self.conn_mgr.parse_endpoint( url, kind );
+
+    def test_parse_endpoints( self ):
+        endpoints = self.conn_mgr.parse_endpoints( [ "localhost:21", "localhost", "localhost:21", "[::1:21" ], "host" );
+        self.assertEqual( 21, endpoints[ 0 ].port );
+        self.assertIsInstance( endpoints[ 1 ], ConnectionManagerError );
+        self.assertIs( endpoints[ 0 ], endpoints[ 2 ] );
+        # malformed string is reported with the others instead of aborting the batch
+        self.assertIsInstance( endpoints[ 3 ], ConnectionManagerError );
+        self.assertIn( "[::1:21", str( endpoints[ 3 ] ) );
+        endpoints = self.conn_mgr.parse_endpoints( [ "host/share", "smb://host/share" ], "smb" );
+        self.assertIn( "host/share", str( endpoints[ 0 ] ) );
+        self.assertEqual( "host", endpoints[ 1 ].host );
+
+    def test_get_endpoints( self ):
+        self.cred_mgr.override_credential( "TEST_PSQL", "URL", "localhost:5432/postgres" );
+        self.cred_mgr.override_credential( "TEST_FTP", "URL", "ftp://localhost" );
+        self.cred_mgr.override_credential( "TEST_MVN", "URL", "http://localhost:8081/nexus" );
+        self.cred_mgr.reset_credential( "TEST_JENKINS", "URL" );
+        self.cred_mgr.override_credential( "TEST_SMTP", "URL", "[::1:25" );
+        endpoints = self.conn_mgr.get_endpoints( { "TEST_PSQL": "psql", "TEST_FTP": "ftp", "TEST_MVN": "mvn",
+                                                   "TEST_JENKINS": "jenkins", "TEST_OTHER": "other",
+                                                   "TEST_SMTP": "smtp" } );
+        self.assertEqual( "postgres", endpoints[ "TEST_PSQL" ].path );
+        self.assertEqual( 8081, endpoints[ "TEST_MVN" ].port );
+        self.assertIsInstance( endpoints[ "TEST_FTP" ], ConnectionManagerError );
+        self.assertIsInstance( endpoints[ "TEST_JENKINS" ], ConnectionManagerError );
+        self.assertIsInstance( endpoints[ "TEST_OTHER" ], ConnectionManagerError );
+        self.assertIsInstance( endpoints[ "TEST_SMTP" ], ConnectionManagerError );
 
     def test_get_url( self ):
         new_url = "fff://Create/In";
@@ -413,6 +1185,33 @@ class ConnectionManagerTestSuite(TestCase):
         with self.assertRaises( ConnectionManagerError ):
             self.conn_mgr.get_psql_django_configuration( "TEST" );
 
+    def test_get_psql_django_config_replicas( self ):
+        for resource, url in [ ( "TEST", "h1:5432,h2:5432/db?search_path=s" ), ( "TEST_RO", "h3:5432/db?search_path=s" ) ]:
+            self.cred_mgr.override_credential( resource, "URL", url );
+            self.cred_mgr.override_credential( resource, "USER", "user" );
+            self.cred_mgr.override_credential( resource, "PASSWORD", "password" );
+        databases = self.conn_mgr.get_psql_django_configuration( "TEST", replicas = [ "TEST_RO" ], conn_max_age = 600,
+                                                                 health_checks = True );
+        self.assertEqual( [ "default", "replica_1" ], sorted( databases ) );
+        self.assertEqual( ( "h1,h2", "5432,5432", 600, True, "read-write" ),
+                          ( databases[ "default" ][ "HOST" ], databases[ "default" ][ "PORT" ],
+                            databases[ "default" ][ "CONN_MAX_AGE" ], databases[ "default" ][ "CONN_HEALTH_CHECKS" ],
+                            databases[ "default" ][ "OPTIONS" ][ "target_session_attrs" ] ) );
+        self.assertEqual( "h3", databases[ "replica_1" ][ "HOST" ] );
+        self.assertEqual( { "MIRROR": "default" }, databases[ "replica_1" ][ "TEST" ] );
+        self.assertNotIn( "TEST", databases[ "default" ] );
+
+        # pooled connections
+        databases = self.conn_mgr.get_psql_django_configuration( "TEST_RO", replicas = { "reports": "TEST_RO" },
+                                                                 pool = { "max_size": 4 } );
+        self.assertEqual( "django.db.backends.postgresql", databases[ "reports" ][ "ENGINE" ] );
+        self.assertEqual( { "max_size": 4 }, databases[ "default" ][ "OPTIONS" ][ "pool" ] );
+        self.assertNotIn( "CONN_MAX_AGE", databases[ "default" ] );
+        with self.assertRaises( ConnectionManagerError ):
+            self.conn_mgr.get_psql_django_configuration( "TEST", pool = True, conn_max_age = 60 );
+        with self.assertRaises( ConnectionManagerError ):
+            self.conn_mgr.get_psql_django_configuration( "TEST", replicas = { "default": "TEST_RO" } );
+
 
     if version_info.major == 3:
         @patch( 'oc_connections.ConnectionManager.NexusFS', new = MockNexusFS )
@@ -440,6 +1239,27 @@ class ConnectionManagerTestSuite(TestCase):
             self.assertEqual( client.api.kwargs[ 'root' ], url );
             self.assertTrue( client.api.kwargs[ 'anonymous' ] );
 
+        @patch( 'oc_connections.ConnectionManager.NexusFS', new = MockNexusFS )
+        @patch( 'oc_connections.ConnectionManager.NexusAPI', new = MockNexusAPI )
+        def test_artifact_cache( self ):
+            self.cred_mgr.override_credential( "TEST", "URL", "http://localhost:777/nexus" );
+            self.cred_mgr.reset_credential( "TEST", "USER" );
+            self.cred_mgr.reset_credential( "TEST", "PASSWORD" );
+            directory = tempfile.mkdtemp();
+            try:
+                cache = ArtifactCache( directory );
+                conn_mgr = oc_connections.ConnectionManager.ConnectionManager( self.cred_mgr, artifact_cache = cache );
+                self.assertIs( cache, conn_mgr.artifact_cache );
+                client = conn_mgr.get_mvn_client( "TEST" );
+                self.assertIsInstance( client, CachedNexusClient );
+                self.assertIsInstance( client.client, MockNexusAPI );
+                self.assertIs( cache, client.cache );
+                # NexusFS downloads through the cache too
+                self.assertIsInstance( conn_mgr.get_mvn_fs_client( "TEST" ).api, CachedNexusClient );
+                self.assertIsInstance( self.conn_mgr.get_mvn_client( "TEST" ), MockNexusAPI );
+            finally:
+                shutil.rmtree( directory );
+
         @patch( 'oc_connections.ConnectionManager.FTP', new = MockFTP )
         @patch( 'oc_connections.ConnectionManager.FTPFS', new = MockFTPFS )
         def test_get_ftp_fs_client( self ):
@@ -0,0 +1,246 @@
+import threading
+import time
+from unittest import TestCase
+from oc_connections.ConnectionPool import ConnectionPool, ConnectionPoolError
+
+
+class MockConnection(object):
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.alive = True
+        self.resets = 0
+        self.pings = 0
+
+    def close(self):
+        self.closed = True
+
+    def ping(self):
+        if not self.alive:
+            raise IOError("connection is broken")
+        self.pings += 1
+
+
+class ConnectionPoolTestSuite(TestCase):
+
+    def setUp(self):
+        self.created = []
+
+    def factory(self):
+        connection = MockConnection(len(self.created))
+        self.created.append(connection)
+        return connection
+
+    def test_connection_reused(self):
+        pool = ConnectionPool(self.factory, max_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(first, second)
+        self.assertEqual(1, len(self.created))
+        self.assertEqual(1, pool.size)
+        self.assertEqual(1, pool.idle)
+        self.assertEqual(0, pool.in_use)
+
+    def test_bounded_size(self):
+        pool = ConnectionPool(self.factory, max_size=2)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertIsNot(first, second)
+        with self.assertRaises(ConnectionPoolError):
+            pool.acquire(timeout=0.05)
+
+        # waiting caller gets released connection
+        result = []
+        thread = threading.Thread(target=lambda: result.append(pool.acquire(timeout=5)))
+        thread.start()
+        pool.release(first)
+        thread.join()
+        self.assertEqual([first], result)
+        self.assertEqual(2, len(self.created))
+
+    def test_liveness_check(self):
+        pool = ConnectionPool(self.factory, check=lambda connection: connection.alive)
+        with pool.connection() as connection:
+            connection.alive = False
+        with pool.connection() as new_connection:
+            self.assertIsNot(connection, new_connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(1, pool.size)
+
+    def test_failed_check_raising(self):
+        def check(connection):
+            raise IOError("connection is broken")
+        pool = ConnectionPool(self.factory, check=check)
+        with pool.connection():
+            pass
+        with pool.connection():
+            pass
+        self.assertEqual(2, len(self.created))
+        self.assertTrue(self.created[0].closed)
+
+    def test_reset_failure_discards(self):
+        def reset(connection):
+            raise IOError("rollback failed")
+        pool = ConnectionPool(self.factory, reset=reset)
+        with pool.connection() as connection:
+            pass
+        self.assertTrue(connection.closed)
+        self.assertEqual(0, pool.size)
+
+    def test_idle_eviction(self):
+        pool = ConnectionPool(self.factory, max_size=3, max_idle=0.05)
+        connections = [pool.acquire() for _ in range(3)]
+        for connection in connections:
+            pool.release(connection)
+        self.assertEqual(0, pool.evict())
+        time.sleep(0.1)
+        self.assertEqual(3, pool.evict())
+        self.assertEqual(0, pool.size)
+        self.assertTrue(all(connection.closed for connection in connections))
+
+    def test_idle_eviction_keeps_min_size(self):
+        pool = ConnectionPool(self.factory, min_size=2, max_size=3, max_idle=0.05)
+        pool.fill()
+        self.assertEqual(2, pool.idle)
+        time.sleep(0.1)
+        self.assertEqual(0, pool.evict())
+        self.assertEqual(2, pool.size)
+
+    def test_max_lifetime(self):
+        pool = ConnectionPool(self.factory, max_lifetime=0.05)
+        with pool.connection() as connection:
+            pass
+        time.sleep(0.1)
+        with pool.connection() as new_connection:
+            self.assertIsNot(connection, new_connection)
+        self.assertTrue(connection.closed)
+
+    def test_factory_failure_frees_slot(self):
+        def factory():
+            raise IOError("connect failed")
+        pool = ConnectionPool(factory, max_size=1)
+        with self.assertRaises(IOError):
+            pool.acquire()
+        self.assertEqual(0, pool.size)
+
+    def test_foreign_connection(self):
+        pool = ConnectionPool(self.factory)
+        with self.assertRaises(ConnectionPoolError):
+            pool.release(MockConnection(100))
+
+    def test_close(self):
+        pool = ConnectionPool(self.factory)
+        idle = pool.acquire()
+        busy = pool.acquire()
+        pool.release(idle)
+        pool.close()
+        self.assertTrue(idle.closed)
+        self.assertFalse(busy.closed)
+        pool.release(busy)
+        self.assertTrue(busy.closed)
+        self.assertEqual(0, pool.size)
+        with self.assertRaises(ConnectionPoolError):
+            pool.acquire()
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ConnectionPoolError):
+            ConnectionPool(self.factory, max_size=0)
+        with self.assertRaises(ConnectionPoolError):
+            ConnectionPool(self.factory, min_size=3, max_size=2)
+
+    def test_keepalive(self):
+        pool = ConnectionPool(self.factory, keepalive=lambda connection: connection.ping(), keepalive_interval=0.05)
+        first = pool.acquire()
+        second = pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        pool.maintain()
+        self.assertEqual(0, first.pings)
+        time.sleep(0.1)
+        second.alive = False
+        pool.maintain()
+        self.assertEqual(1, first.pings)
+        self.assertTrue(second.closed)
+        self.assertEqual(1, pool.idle)
+        # keepalive does not count as usage
+        pool.max_idle = 0.05
+        pool.maintain()
+        self.assertEqual(0, pool.size)
+
+    def test_no_keepalive_after_use(self):
+        pool = ConnectionPool(self.factory, keepalive=lambda connection: connection.ping(), keepalive_interval=0.05)
+        connection = pool.acquire()
+        time.sleep(0.1)
+        # connection was just used, so it does not need keepalive
+        pool.release(connection)
+        pool.maintain()
+        self.assertEqual(0, connection.pings)
+        time.sleep(0.1)
+        pool.maintain()
+        self.assertEqual(1, connection.pings)
+
+    def test_maintenance_thread(self):
+        pool = ConnectionPool(self.factory, min_size=1, keepalive=lambda connection: connection.ping(),
+                              keepalive_interval=0.01)
+        pool.start_maintenance(0.02)
+        time.sleep(0.2)
+        pool.close()
+        self.assertEqual(1, len(self.created))
+        self.assertGreater(self.created[0].pings, 0)
+        self.assertTrue(self.created[0].closed)
+
+    def test_shared_limiter(self):
+        limiter = threading.BoundedSemaphore(2)
+        first_pool = ConnectionPool(self.factory, max_size=2, limiter=limiter)
+        second_pool = ConnectionPool(self.factory, max_size=2, limiter=limiter)
+        first = first_pool.acquire()
+        second = second_pool.acquire()
+        with self.assertRaises(ConnectionPoolError):
+            first_pool.acquire(timeout=0.05)
+        self.assertEqual(1, first_pool.size)
+        first_pool.release(first, discard=True)
+        third = second_pool.acquire(timeout=0.05)
+        self.assertIsNot(second, third)
+        second_pool.close()
+        second_pool.release(second)
+        second_pool.release(third)
+        # all slots are given back to the limiter
+        self.assertTrue(limiter.acquire(blocking=False))
+        self.assertTrue(limiter.acquire(blocking=False))
+
+    def test_thread_affinity(self):
+        pool = ConnectionPool(self.factory, max_size=2, affinity=True)
+        connections = []
+        returned = threading.Event()
+        next_round = threading.Event()
+
+        def use():
+            for _ in range(2):
+                with pool.connection() as connection:
+                    connections.append(connection)
+                returned.set()
+                next_round.wait(5)
+
+        first = pool.acquire()
+        thread = threading.Thread(target=use)
+        thread.start()
+        returned.wait(5)
+        pool.release(first)
+        # the most recently returned connection is first, but the thread gets its own one
+        next_round.set()
+        thread.join()
+        self.assertIs(connections[0], connections[1])
+        with pool.connection() as connection:
+            self.assertIs(first, connection)
+
+    def test_clear(self):
+        pool = ConnectionPool(self.factory, max_size=2)
+        first = pool.acquire()
+        with pool.connection():
+            pass
+        self.assertEqual(1, pool.clear())
+        self.assertTrue(self.created[1].closed)
+        self.assertEqual(1, pool.size)
+        pool.release(first)
+        self.assertFalse(first.closed)
@@ -0,0 +1,158 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import TestCase
+from oc_connections.CredentialManager import CredentialManager, CredentialManagerError
+from oc_connections.CredentialBackends import CachingBackend, ChainBackend, CredentialBackend, EnvironmentBackend, \
+    FileBackend, HttpBackend
+
+
+class MockSecretStoreHandler(BaseHTTPRequestHandler):
+    secrets = {
+        "/v1/secret/data/TEST_MVN": {"data": {"data": {"URL": "http://nexus", "USER": "nexus-user",
+                                                       "PASSWORD": "nexus-password"}}},
+        "/plain/TEST_MVN": {"URL": "http://nexus"},
+    }
+    requests = []
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get("X-Vault-Token")))
+        if self.path not in self.secrets:
+            self.send_error(404)
+            return
+        body = json.dumps(self.secrets[self.path]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingBackend(EnvironmentBackend):
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, resource, names):
+        self.calls.append((resource, list(names)))
+        return super(CountingBackend, self).fetch(resource, names)
+
+
+class CredentialBackendsTestSuite(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as stream:
+            stream.write(content)
+        return path
+
+    def test_json_file(self):
+        path = self.write("credentials.json", json.dumps({
+            "TEST_SVN": {"URL": "svn://svn", "USER": "svn-user"}, "TEST_FTP_URL": "ftp://ftp:21"}))
+        cred_mgr = CredentialManager(backend=FileBackend(path))
+        self.assertEqual(["svn://svn", "svn-user", None],
+                         cred_mgr.get_credentials("TEST_SVN", ["URL", "USER", "PASSWORD"]))
+        self.assertEqual("ftp://ftp:21", cred_mgr.get_credential("TEST_FTP", "URL"))
+        cred_mgr.override_credential("TEST_SVN", "USER", "other-user")
+        self.assertEqual(["svn://svn", "other-user"], cred_mgr.get_credentials("TEST_SVN", ["URL", "USER"]))
+
+    def test_ini_file(self):
+        path = self.write("credentials.ini", "[TEST_SMTP]\nURL = smtp:25\nPASSWORD = secret%value\n")
+        backend = FileBackend(path)
+        self.assertEqual({"URL": "smtp:25", "PASSWORD": "secret%value"},
+                         backend.fetch("TEST_SMTP", ["URL", "USER", "PASSWORD"]))
+        self.assertEqual("smtp:25", backend.get("TEST_SMTP_URL"))
+
+    def test_env_file(self):
+        path = self.write(".env", "# comment\nexport TEST_FTP_URL=ftp:21\nTEST_FTP_USER='ftp user'\n\nbroken\n")
+        backend = FileBackend(path)
+        self.assertEqual({"URL": "ftp:21", "USER": "ftp user"}, backend.fetch("TEST_FTP", ["URL", "USER"]))
+        # modified file is re-read
+        with open(path, "w") as stream:
+            stream.write("TEST_FTP_URL=ftp:2121\n")
+        os.utime(path, (0, 0))
+        self.assertEqual({"URL": "ftp:2121"}, backend.fetch("TEST_FTP", ["URL", "USER"]))
+        cred_mgr = CredentialManager(snapshot=True, backend=backend)
+        self.assertEqual("ftp:2121", cred_mgr.snapshot["TEST_FTP_URL"])
+
+    def test_incomplete_backend(self):
+        class IncompleteBackend(CredentialBackend):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteBackend()
+
+    def test_file_errors(self):
+        with self.assertRaises(CredentialManagerError):
+            FileBackend("credentials.yaml", format="yaml")
+        with self.assertRaises(CredentialManagerError):
+            FileBackend(os.path.join(self.directory, "missing.json")).fetch("TEST", ["URL"])
+
+    def test_http_backend(self):
+        server = HTTPServer(("127.0.0.1", 0), MockSecretStoreHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            root = "http://127.0.0.1:%d" % server.server_address[1]
+            MockSecretStoreHandler.requests = []
+            backend = HttpBackend(root + "/v1/secret/data/{resource}", headers={"X-Vault-Token": "token"})
+            cred_mgr = CredentialManager(backend=backend)
+            self.assertEqual(["http://nexus", "nexus-user", "nexus-password"],
+                             cred_mgr.get_credentials("TEST_MVN", ["URL", "USER", "PASSWORD"]))
+            self.assertEqual([("/v1/secret/data/TEST_MVN", "token")], MockSecretStoreHandler.requests)
+            self.assertEqual([None, None], cred_mgr.get_credentials("MISSING", ["URL", "USER"]))
+            self.assertEqual({"URL": "http://nexus"},
+                             HttpBackend(root + "/plain/{resource}").fetch("TEST_MVN", ["URL", "USER"]))
+            with self.assertRaises(CredentialManagerError):
+                HttpBackend(root + "/plain")
+            with self.assertRaises(CredentialManagerError):
+                backend.load()
+        finally:
+            server.shutdown()
+            server.server_close()
+        with self.assertRaises(CredentialManagerError):
+            backend.fetch("TEST_MVN", ["URL"])
+
+    def test_chain(self):
+        path = self.write("credentials.json", json.dumps({"TEST_CHAIN": {"URL": "file-url"}}))
+        os.environ["TEST_CHAIN_URL"] = "env-url"
+        os.environ["TEST_CHAIN_USER"] = "env-user"
+        backend = ChainBackend([FileBackend(path), EnvironmentBackend()])
+        self.assertEqual({"URL": "file-url", "USER": "env-user"}, backend.fetch("TEST_CHAIN", ["URL", "USER"]))
+        self.assertEqual("env-user", backend.get("TEST_CHAIN_USER"))
+        self.assertEqual("file-url", backend.load()["TEST_CHAIN_URL"])
+
+    def test_cache(self):
+        os.environ["TEST_CACHE_URL"] = "url"
+        counting = CountingBackend()
+        backend = CachingBackend(counting, ttl=None)
+        cred_mgr = CredentialManager(backend=backend)
+        self.assertEqual(["url", None, None], cred_mgr.get_credentials("TEST_CACHE", ["URL", "USER", "PASSWORD"]))
+        self.assertEqual("url", cred_mgr.get_credential("TEST_CACHE", "URL"))
+        self.assertIsNone(cred_mgr.get_credential("TEST_CACHE", "PASSWORD"))
+        self.assertEqual(1, len(counting.calls))
+        cred_mgr.get_credential("TEST_CACHE", "TOKEN")
+        self.assertEqual(("TEST_CACHE", ["URL", "USER", "PASSWORD", "TOKEN"]), counting.calls[-1])
+        backend.invalidate("TEST_CACHE")
+        cred_mgr.get_credential("TEST_CACHE", "URL")
+        self.assertEqual(3, len(counting.calls))
+        self.assertEqual(3, backend.misses)
+
+    def test_cache_ttl(self):
+        counting = CountingBackend()
+        backend = CachingBackend(counting, ttl=0)
+        backend.fetch("TEST_CACHE", ["URL"])
+        backend.fetch("TEST_CACHE", ["URL"])
+        self.assertEqual(2, len(counting.calls))
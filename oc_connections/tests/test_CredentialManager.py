@@ -1,7 +1,9 @@
 
 import os
+import signal
+import time
 from oc_connections.CredentialManager import CredentialManager
-from unittest import TestCase
+from unittest import TestCase, skipUnless
 from sys import version_info
 
 
@@ -62,3 +64,117 @@ class CredentialManagerTestSuite(TestCase):
     def test_missing_credential(self):
         value=self.cred_mgr.get_credential("foo", "bar")
         self.assertIsNone(value)
+
+    def test_listeners(self):
+        changes = []
+        listener = lambda resource, name: changes.append((resource, name))
+        self.cred_mgr.add_listener(listener)
+        self.cred_mgr.override_credential("full", "name", "value")
+        # same value is not a change
+        self.cred_mgr.override_credential("full", "name", "value")
+        self.cred_mgr.reset_credential("full", "name")
+        # nothing to reset
+        self.cred_mgr.reset_credential("full", "name")
+        self.assertEqual([("full", "name"), ("full", "name")], changes)
+        self.cred_mgr.remove_listener(listener)
+        self.cred_mgr.override_credential("full", "name", "value")
+        self.assertEqual(2, len(changes))
+
+    def test_snapshot(self):
+        os.environ["full_name"] = "value"
+        os.environ.pop("full_name_3", None)
+        cred_mgr = CredentialManager(snapshot=True)
+        os.environ["full_name"] = "new_value"
+        os.environ["full_name_3"] = "value_3"
+        self.assertEqual("value", cred_mgr.get_credential("full", "name"))
+        self.assertEqual(["value", None], cred_mgr.get_credentials("full", ["name", "name_3"]))
+        self.assertEqual("value", cred_mgr.snapshot["full_name"])
+        with self.assertRaises(TypeError):
+            cred_mgr.snapshot["full_name"] = "changed"
+        cred_mgr.refresh_snapshot()
+        self.assertEqual(["new_value", "value_3"], cred_mgr.get_credentials("full", ["name", "name_3"]))
+        cred_mgr.drop_snapshot()
+        self.assertIsNone(cred_mgr.snapshot)
+        os.environ["full_name"] = "value"
+        self.assertEqual("value", cred_mgr.get_credential("full", "name"))
+
+    def test_snapshot_overridden_credential(self):
+        os.environ["full_name"] = "value"
+        cred_mgr = CredentialManager(snapshot=True)
+        cred_mgr.override_credential("full", "name", "overriding_value")
+        self.assertEqual("overriding_value", cred_mgr.get_credential("full", "name"))
+        cred_mgr.reset_credential("full", "name")
+        self.assertEqual("value", cred_mgr.get_credential("full", "name"))
+
+    def test_snapshot_ttl(self):
+        os.environ["full_name"] = "value"
+        cred_mgr = CredentialManager(snapshot=True, snapshot_ttl=0.05)
+        os.environ["full_name"] = "new_value"
+        self.assertEqual("value", cred_mgr.get_credential("full", "name"))
+        time.sleep(0.1)
+        self.assertEqual("new_value", cred_mgr.get_credential("full", "name"))
+
+    def test_snapshot_subclass_source(self):
+        class DictCredentialManager(CredentialManager):
+            loads = 0
+
+            def _load_credentials(self):
+                DictCredentialManager.loads += 1
+                return {"full_name": "dict_value"}
+
+        cred_mgr = DictCredentialManager(snapshot=True)
+        self.assertEqual(["dict_value", None], cred_mgr.get_credentials("full", ["name", "name_2"]))
+        self.assertEqual("dict_value", cred_mgr.get_credential("full", "name"))
+        self.assertEqual(1, DictCredentialManager.loads)
+
+    def test_subclass_lookup(self):
+        class SingleCredentialManager(CredentialManager):
+            def get_credential(self, resource, name):
+                return {"user": "u", "password": "x"}.get(name)
+
+        class ListCredentialManager(CredentialManager):
+            def get_credentials(self, resource, names):
+                return [self.get_credential(resource, name) for name in names]
+
+        self.assertEqual(["u", "x"], SingleCredentialManager().get_credentials("full", ["user", "password"]))
+        os.environ["full_name"] = "value"
+        self.assertEqual(["value"], ListCredentialManager().get_credentials("full", ["name"]))
+        self.assertEqual("value", ListCredentialManager().get_credential("full", "name"))
+
+    @skipUnless(hasattr(signal, "SIGHUP"), "SIGHUP is not supported")
+    def test_snapshot_refresh_on_signal(self):
+        os.environ["full_name"] = "value"
+        cred_mgr = CredentialManager(snapshot=True)
+        previous_handler = signal.getsignal(signal.SIGHUP)
+        try:
+            cred_mgr.refresh_snapshot_on_signal()
+            os.environ["full_name"] = "new_value"
+            snapshot = cred_mgr.snapshot
+            os.kill(os.getpid(), signal.SIGHUP)
+            # handler does not read credentials, the next lookup does
+            self.assertIs(snapshot, cred_mgr.snapshot)
+            self.assertEqual("new_value", cred_mgr.get_credential("full", "name"))
+        finally:
+            signal.signal(signal.SIGHUP, previous_handler)
+
+    @skipUnless(hasattr(signal, "SIGHUP"), "SIGHUP is not supported")
+    def test_signal_without_snapshot(self):
+        os.environ.pop("full_name", None)
+        cred_mgr = CredentialManager()
+        previous_handler = signal.getsignal(signal.SIGHUP)
+        try:
+            cred_mgr.refresh_snapshot_on_signal()
+            os.kill(os.getpid(), signal.SIGHUP)
+            self.assertIsNone(cred_mgr.get_credential("full", "name"))
+            # snapshot mode is not enabled by signal
+            self.assertIsNone(cred_mgr.snapshot)
+            os.environ["full_name"] = "value"
+            self.assertEqual("value", cred_mgr.get_credential("full", "name"))
+            cred_mgr.refresh_snapshot()
+            cred_mgr.drop_snapshot()
+            os.kill(os.getpid(), signal.SIGHUP)
+            os.environ["full_name"] = "new_value"
+            self.assertEqual("new_value", cred_mgr.get_credential("full", "name"))
+            self.assertIsNone(cred_mgr.snapshot)
+        finally:
+            signal.signal(signal.SIGHUP, previous_handler)
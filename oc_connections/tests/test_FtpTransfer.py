@@ -0,0 +1,203 @@
+import os
+import shutil
+import tempfile
+import threading
+from ftplib import error_perm
+from unittest import TestCase
+from oc_connections.ConnectionPool import ConnectionPool
+from oc_connections.FtpTransfer import FtpTransfer
+
+
+class MockFTPServer(object):
+    def __init__(self):
+        self.files = {}
+        self.lock = threading.Lock()
+        # number of bytes after which the next session drops connection, None means never
+        self.drop_after = None
+
+
+class MockFTPSession(object):
+    def __init__(self, server):
+        self.server = server
+        self.rests = []
+        self.closed = False
+        with server.lock:
+            self.drop_after = server.drop_after
+            server.drop_after = None
+
+    def voidcmd(self, command):
+        return "200 OK"
+
+    def size(self, remote):
+        with self.server.lock:
+            if remote not in self.server.files:
+                raise error_perm("550 No such file")
+            return len(self.server.files[remote])
+
+    def __drop(self, sent):
+        if self.drop_after is not None and sent >= self.drop_after:
+            self.drop_after = None
+            raise EOFError("connection dropped")
+
+    def retrbinary(self, command, callback, blocksize=8192, rest=None):
+        remote = command.split(" ", 1)[1]
+        self.rests.append(rest)
+        with self.server.lock:
+            if remote not in self.server.files:
+                raise error_perm("550 No such file")
+            data = self.server.files[remote][rest or 0:]
+        sent = 0
+        for position in range(0, len(data), blocksize):
+            self.__drop(sent)
+            block = data[position:position + blocksize]
+            callback(block)
+            sent += len(block)
+
+    def storbinary(self, command, stream, blocksize=8192, callback=None, rest=None):
+        remote = command.split(" ", 1)[1]
+        self.rests.append(rest)
+        with self.server.lock:
+            data = self.server.files.get(remote, b"")[:rest or 0]
+        sent = 0
+        while True:
+            self.__drop(sent)
+            block = stream.read(blocksize)
+            if not block:
+                break
+            data += block
+            with self.server.lock:
+                self.server.files[remote] = data
+            sent += len(block)
+            if callback:
+                callback(block)
+
+    def close(self):
+        self.closed = True
+
+
+class FtpTransferTestSuite(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = MockFTPServer()
+        self.sessions = []
+        self.pool = ConnectionPool(self.factory, max_size=3)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+    def factory(self):
+        session = MockFTPSession(self.server)
+        self.sessions.append(session)
+        return session
+
+    def local(self, name):
+        return os.path.join(self.directory, name)
+
+    def read(self, name):
+        with open(self.local(name), "rb") as stream:
+            return stream.read()
+
+    def test_download(self):
+        for number in range(10):
+            self.server.files["/data/file%d" % number] = os.urandom(1000 + number)
+        blocks = []
+        transfer = FtpTransfer(self.pool, blocksize=100)
+        report = transfer.download([("/data/file%d" % number, self.local("sub/file%d" % number))
+                                    for number in range(10)], callback=lambda remote, block: blocks.append(block))
+        self.assertTrue(report.success)
+        self.assertEqual(sum(1000 + number for number in range(10)), report.bytes)
+        self.assertEqual(report.bytes, sum(len(block) for block in blocks))
+        self.assertTrue(all(len(block) <= 100 for block in blocks))
+        for number in range(10):
+            self.assertEqual(self.server.files["/data/file%d" % number], self.read("sub/file%d" % number))
+        self.assertLessEqual(len(self.sessions), 3)
+        self.assertEqual(0, self.pool.in_use)
+
+    def test_download_resume(self):
+        self.server.files["/file"] = os.urandom(1000)
+        with open(self.local("file"), "wb") as stream:
+            stream.write(self.server.files["/file"][:400])
+        report = FtpTransfer(self.pool).download([("/file", self.local("file"))])
+        self.assertEqual(400, report.results[0].offset)
+        self.assertEqual(600, report.bytes)
+        self.assertEqual([400], self.sessions[0].rests)
+        self.assertEqual(self.server.files["/file"], self.read("file"))
+        # complete file is not downloaded again
+        report = FtpTransfer(self.pool).download([("/file", self.local("file"))])
+        self.assertEqual(0, report.bytes)
+
+    def test_download_without_resume(self):
+        self.server.files["/file"] = b"new content"
+        with open(self.local("file"), "wb") as stream:
+            stream.write(b"old")
+        report = FtpTransfer(self.pool).download([("/file", self.local("file"))], resume=False)
+        self.assertEqual(0, report.results[0].offset)
+        self.assertEqual(b"new content", self.read("file"))
+
+    def test_download_continued_after_disconnect(self):
+        self.server.files["/file"] = os.urandom(1000)
+        self.server.drop_after = 300
+        report = FtpTransfer(self.pool, blocksize=100).download([("/file", self.local("file"))], sessions=1)
+        self.assertTrue(report.success)
+        self.assertEqual(2, len(self.sessions))
+        self.assertTrue(self.sessions[0].closed)
+        self.assertEqual([300], self.sessions[1].rests)
+        self.assertEqual(self.server.files["/file"], self.read("file"))
+
+    def test_download_to_callback_only(self):
+        self.server.files["/file"] = os.urandom(1000)
+        self.server.drop_after = 500
+        blocks = []
+        report = FtpTransfer(self.pool, blocksize=100).download(
+            [("/file", None)], callback=lambda remote, block: blocks.append(block))
+        self.assertTrue(report.success)
+        self.assertEqual(self.server.files["/file"], b"".join(blocks))
+
+    def test_download_errors(self):
+        self.server.files["/file"] = b"content"
+        report = FtpTransfer(self.pool).download([("/missing", self.local("missing")), ("/file", self.local("file"))],
+                                                 sessions=1)
+        self.assertFalse(report.success)
+        self.assertEqual(["/missing"], [result.remote for result in report.failed])
+        self.assertIsInstance(report.failed[0].error, error_perm)
+        # session is not discarded because of missing file
+        self.assertEqual(1, len(self.sessions))
+
+    def test_local_file_errors(self):
+        self.server.files["/file"] = b"content"
+        with open(self.local("plain"), "wb") as stream:
+            stream.write(b"not a directory")
+        transfer = FtpTransfer(self.pool, retries=3)
+        report = transfer.download([("/file", os.path.join(self.local("plain"), "file")), ("/file", self.local("file"))],
+                                   sessions=1)
+        self.assertEqual([os.path.join(self.local("plain"), "file")], [result.local for result in report.failed])
+        self.assertIsInstance(report.failed[0].error, OSError)
+        report = transfer.upload([("/missing", self.local("missing"))], sessions=1)
+        self.assertIsInstance(report.failed[0].error, FileNotFoundError)
+        # healthy session is neither discarded nor retried because of local file errors
+        self.assertEqual(1, len(self.sessions))
+        self.assertFalse(self.sessions[0].closed)
+        self.assertEqual([None], self.sessions[0].rests)
+        self.assertEqual(b"content", self.read("file"))
+
+    def test_upload(self):
+        content = os.urandom(1500)
+        with open(self.local("file"), "wb") as stream:
+            stream.write(content)
+        self.server.files["/partial"] = content[:500]
+        self.server.drop_after = 200
+        report = FtpTransfer(self.pool, blocksize=100).upload(
+            [("/file", self.local("file")), ("/partial", self.local("file"))], sessions=1)
+        self.assertTrue(report.success)
+        self.assertEqual(content, self.server.files["/file"])
+        self.assertEqual(content, self.server.files["/partial"])
+        self.assertEqual(500, report.results[1].offset)
+        self.assertEqual(1500 + 1000, report.bytes)
+        self.assertEqual(0, FtpTransfer(self.pool).upload([("/file", self.local("file"))]).bytes)
+
+    def test_empty(self):
+        report = FtpTransfer(self.pool).download([])
+        self.assertEqual([], report.results)
+        self.assertEqual(0, report.throughput)
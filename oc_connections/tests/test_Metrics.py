@@ -0,0 +1,51 @@
+from unittest import TestCase
+from oc_connections.ConnectionManager import ClientEvent
+from oc_connections.Metrics import Histogram, MetricsCollector
+
+
+class MockConnectionManager(object):
+    def get_pool_stats(self):
+        return {("psql", "PSQL"): {"size": 3, "idle": 1, "in_use": 2}}
+
+
+class MetricsTestSuite(TestCase):
+
+    def test_histogram(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        self.assertIsNone(histogram.percentile(50))
+        for value in [0.05, 0.05, 0.5, 3.0]:
+            histogram.observe(value)
+        self.assertEqual([2, 1, 1], histogram.counts)
+        self.assertEqual(4, histogram.count)
+        self.assertAlmostEqual(3.6, histogram.sum)
+        self.assertEqual(0.1, histogram.percentile(50))
+        self.assertEqual(1.0, histogram.percentile(75))
+        self.assertEqual(3.0, histogram.percentile(100))
+        self.assertEqual(0.05, histogram.min)
+
+    def test_collector(self):
+        collector = MetricsCollector(buckets=(0.1, 1.0))
+        collector(ClientEvent("ftp", "FTP", "connect", 0.05))
+        collector(ClientEvent("ftp", "FTP", "connect", 0.5, IOError("refused")))
+        collector(ClientEvent("ftp", "FTP", "total", 0.6, IOError("refused")))
+        collector(ClientEvent("smtp", "SMTP", "total", 0.2))
+        self.assertEqual(2, collector.histogram("ftp", "FTP", "connect").count)
+        self.assertIsNone(collector.histogram("ftp", "FTP", "login"))
+        self.assertEqual(1, collector.errors())
+        self.assertEqual(2, collector.errors("ftp", stage=None))
+        self.assertEqual(0, collector.errors("smtp"))
+        collector.reset()
+        self.assertIsNone(collector.histogram("smtp", "SMTP"))
+
+    def test_prometheus(self):
+        collector = MetricsCollector(MockConnectionManager(), buckets=(0.1, 1.0))
+        collector(ClientEvent("ftp", "FTP \"main\"", "total", 0.5, OSError("refused")))
+        lines = collector.to_prometheus().splitlines()
+        labels = 'kind="ftp",resource="FTP \\"main\\"",stage="total"'
+        self.assertIn("# TYPE oc_connections_client_seconds histogram", lines)
+        self.assertIn('oc_connections_client_seconds_bucket{%s,le="0.1"} 0' % labels, lines)
+        self.assertIn('oc_connections_client_seconds_bucket{%s,le="1.0"} 1' % labels, lines)
+        self.assertIn('oc_connections_client_seconds_bucket{%s,le="+Inf"} 1' % labels, lines)
+        self.assertIn('oc_connections_client_seconds_count{%s} 1' % labels, lines)
+        self.assertIn('oc_connections_client_errors_total{%s,error="OSError"} 1' % labels, lines)
+        self.assertIn('oc_connections_pool_clients{kind="psql",resource="PSQL",state="in_use"} 2', lines)
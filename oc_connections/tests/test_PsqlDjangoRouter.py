@@ -0,0 +1,44 @@
+from unittest import TestCase
+from oc_connections.PsqlDjangoRouter import PsqlDjangoRouter, PsqlDjangoRouterError
+
+DATABASES = {
+    "default": {"NAME": "db"},
+    "replica_1": {"NAME": "db", "TEST": {"MIRROR": "default"}},
+    "replica_2": {"NAME": "db", "TEST": {"MIRROR": "default"}},
+    "other": {"NAME": "other"},
+}
+
+
+class MockState(object):
+    def __init__(self, db):
+        self.db = db
+
+
+class MockModel(object):
+    def __init__(self, db):
+        self._state = MockState(db)
+
+
+class PsqlDjangoRouterTestSuite(TestCase):
+
+    def test_reads_and_writes(self):
+        router = PsqlDjangoRouter(DATABASES)
+        self.assertEqual(["replica_1", "replica_2"], router.replicas)
+        self.assertEqual({"replica_1", "replica_2"}, {router.db_for_read(MockModel) for _ in range(2)})
+        self.assertEqual("default", router.db_for_write(MockModel))
+        # related objects are read from the alias their instance came from
+        self.assertEqual("replica_2", router.db_for_read(MockModel, instance=MockModel("replica_2")))
+        self.assertIn(router.db_for_read(MockModel, instance=MockModel("other")), router.replicas)
+
+    def test_relations_and_migrations(self):
+        router = PsqlDjangoRouter(DATABASES)
+        self.assertTrue(router.allow_relation(MockModel("default"), MockModel("replica_1")))
+        self.assertIsNone(router.allow_relation(MockModel("default"), MockModel("other")))
+        self.assertIsNone(router.allow_migrate("default", "app"))
+        self.assertFalse(router.allow_migrate("replica_1", "app"))
+
+    def test_no_replicas(self):
+        router = PsqlDjangoRouter({"default": {}})
+        self.assertEqual("default", router.db_for_read(MockModel))
+        with self.assertRaises(PsqlDjangoRouterError):
+            PsqlDjangoRouter({"replica": {}})
@@ -0,0 +1,50 @@
+import time
+from unittest import TestCase
+from oc_connections.PsqlHostRouter import PsqlHostRouter, PsqlHostRouterError
+
+PRIMARY = ("primary", 5432)
+REPLICA_1 = ("replica1", 5432)
+REPLICA_2 = ("replica2", 5432)
+
+
+class PsqlHostRouterTestSuite(TestCase):
+
+    def test_writes_go_to_primary(self):
+        router = PsqlHostRouter([PRIMARY, REPLICA_1, REPLICA_2])
+        self.assertEqual([PRIMARY, REPLICA_1, REPLICA_2], router.candidates())
+        # replica was promoted
+        router.record_success(REPLICA_2, 0.01, primary=True)
+        router.record_success(PRIMARY, 0.01, primary=False)
+        self.assertEqual(REPLICA_2, router.primary)
+        self.assertEqual([REPLICA_2, PRIMARY, REPLICA_1], router.candidates())
+        self.assertEqual([PRIMARY], router.replicas)
+
+    def test_reads_round_robin(self):
+        router = PsqlHostRouter([PRIMARY, REPLICA_1, REPLICA_2])
+        first = router.candidates(readonly=True)
+        second = router.candidates(readonly=True)
+        self.assertEqual(PRIMARY, first[-1])
+        self.assertEqual(PRIMARY, second[-1])
+        self.assertEqual({REPLICA_1, REPLICA_2}, {first[0], second[0]})
+
+    def test_reads_by_latency(self):
+        router = PsqlHostRouter([PRIMARY, REPLICA_1, REPLICA_2], strategy=PsqlHostRouter.LATENCY, latency_weight=0.5)
+        router.record_success(REPLICA_1, 0.2, primary=False)
+        router.record_success(REPLICA_2, 0.1, primary=False)
+        self.assertEqual([REPLICA_2, REPLICA_1, PRIMARY], router.candidates(readonly=True))
+        router.record_success(REPLICA_2, 0.5, primary=False)
+        self.assertAlmostEqual(0.3, router.latency(REPLICA_2))
+        self.assertEqual([REPLICA_1, REPLICA_2, PRIMARY], router.candidates(readonly=True))
+
+    def test_failed_hosts_are_tried_last(self):
+        router = PsqlHostRouter([PRIMARY, REPLICA_1], failure_timeout=0.05)
+        router.record_failure(PRIMARY)
+        self.assertEqual([REPLICA_1, PRIMARY], router.candidates())
+        time.sleep(0.06)
+        self.assertEqual([PRIMARY, REPLICA_1], router.candidates())
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(PsqlHostRouterError):
+            PsqlHostRouter([])
+        with self.assertRaises(PsqlHostRouterError):
+            PsqlHostRouter([PRIMARY], strategy="random")
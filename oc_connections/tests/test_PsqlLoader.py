@@ -0,0 +1,178 @@
+import re
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+from oc_connections.ConnectionPool import ConnectionPool
+from oc_connections.PsqlLoader import PsqlLoader, PsqlLoaderError, _copy_value
+
+
+class MockCursor(object):
+    def __init__(self, connection):
+        self.connection = connection
+
+    def copy_expert(self, sql, stream):
+        if self.connection.fail:
+            raise Exception("duplicate key value violates unique constraint")
+        self.connection.statements.append(sql)
+        self.connection.pending.extend(line.split("\t") for line in stream.read().splitlines())
+
+    def close(self):
+        pass
+
+
+class MockConnection(object):
+    lock = threading.Lock()
+
+    def __init__(self, table):
+        self.table = table
+        self.statements = []
+        self.pending = []
+        self.fail = False
+        self.closed = 0
+
+    def cursor(self):
+        return MockCursor(self)
+
+    def commit(self):
+        with MockConnection.lock:
+            self.table.extend(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.closed = 1
+
+
+def parse_copy_array(field):
+    """
+    Parse array literal from COPY text field as PostgreSQL does, elements are left as strings.
+    """
+    text = re.sub(r"\\(.)", lambda match: {"t": "\t", "n": "\n", "r": "\r"}.get(match.group(1), match.group(1)), field)
+    tokens = re.findall(r'[{},]|"(?:[^"\\]|\\.)*"|[^{},"]+', text)
+    stack = [[]]
+    for token in tokens:
+        if token == "{":
+            stack.append([])
+        elif token == "}":
+            array = stack.pop()
+            stack[-1].append(array)
+        elif token.startswith('"'):
+            stack[-1].append(re.sub(r"\\(.)", r"\1", token[1:-1]))
+        elif token != ",":
+            stack[-1].append(None if token == "NULL" else token)
+    return stack[0][0]
+
+
+def as_text(value):
+    """
+    Convert array elements to their text form.
+    """
+    if isinstance(value, (list, tuple)):
+        return [as_text(item) for item in value]
+    return None if value is None else str(value)
+
+
+class PsqlLoaderTestSuite(TestCase):
+
+    def setUp(self):
+        self.table = []
+        self.connections = []
+
+        def factory():
+            connection = MockConnection(self.table)
+            self.connections.append(connection)
+            return connection
+
+        self.pool = ConnectionPool(factory, max_size=4)
+
+    def test_copy_value(self):
+        self.assertEqual("\\N", _copy_value(None))
+        self.assertEqual("t", _copy_value(True))
+        self.assertEqual("a\\tb\\nc\\\\", _copy_value("a\tb\nc\\"))
+        self.assertEqual("\\\\x0aff", _copy_value(b"\x0a\xff"))
+        self.assertEqual('{"a": 1}', _copy_value({"a": 1}))
+        self.assertEqual("1.5", _copy_value(1.5))
+        self.assertEqual("{1,NULL,t}", _copy_value([1, None, True]))
+        self.assertEqual('{{1,2},{"a b","q\\\\"\\\\\\\\"}}', _copy_value(((1, 2), ["a b", 'q"\\'])))
+        self.assertEqual("{}", _copy_value([]))
+
+    def test_load_tuples(self):
+        loader = PsqlLoader(self.pool, "public.items", columns=["id", "name"], batch_size=3)
+        reports = []
+        result = loader.load(((number, "item%d" % number) for number in range(7)),
+                             callback=lambda result: reports.append(result.rows))
+        self.assertTrue(result.success)
+        self.assertEqual((7, 3), (result.rows, result.batches))
+        self.assertEqual([3, 6, 7], reports)
+        self.assertGreater(result.rows_per_second, 0)
+        self.assertEqual([str(number) for number in range(7)], [row[0] for row in self.table])
+        self.assertEqual('COPY "public"."items" ("id", "name") FROM STDIN WITH (FORMAT text)',
+                         self.connections[0].statements[0])
+        self.assertEqual(1, len(self.connections))
+
+    def test_load_dicts(self):
+        loader = PsqlLoader(self.pool, "items", batch_size=10)
+        result = loader.load([{"id": 1, "name": "a"}, {"name": "b", "id": 2}])
+        self.assertEqual(2, result.rows)
+        self.assertEqual([["1", "a"], ["2", "b"]], self.table)
+        self.assertEqual('COPY "items" ("id", "name") FROM STDIN WITH (FORMAT text)', self.connections[0].statements[0])
+        # missing key fails the load
+        self.assertIsInstance(loader.load([{"id": 3, "name": "c"}, {"id": 4}]).error, KeyError)
+
+    def test_load_concurrently(self):
+        loader = PsqlLoader(self.pool, "items", batch_size=10, workers=3)
+        result = loader.load((number, "x") for number in range(1000))
+        self.assertTrue(result.success)
+        self.assertEqual((1000, 100), (result.rows, result.batches))
+        self.assertEqual(set(str(number) for number in range(1000)), set(row[0] for row in self.table))
+        self.assertLessEqual(len(self.connections), 3)
+        self.assertEqual(0, self.pool.in_use)
+
+    def test_load_concurrently_fails(self):
+        loader = PsqlLoader(self.pool, "items", batch_size=10, workers=2)
+        consumed = []
+
+        def records():
+            for number in range(100000):
+                consumed.append(number)
+                if number == 50:
+                    for connection in self.connections:
+                        connection.fail = True
+                yield (number,)
+
+        result = loader.load(records())
+        self.assertIn("duplicate key", str(result.error))
+        # records are not read far ahead of failed workers
+        self.assertLess(len(consumed), 1000)
+        self.assertEqual(0, self.pool.in_use)
+
+        def broken():
+            yield (1,)
+            raise ValueError("broken source")
+
+        self.assertIsInstance(loader.load(broken()).error, ValueError)
+        self.assertEqual(0, self.pool.in_use)
+
+    def test_load_values(self):
+        loader = PsqlLoader(self.pool, "items", columns=["id"], method=PsqlLoader.VALUES, batch_size=2)
+        with patch("psycopg2.extras.execute_values") as execute_values:
+            result = loader.load([(1,), (2,), (3,)])
+        self.assertEqual(3, result.rows)
+        self.assertEqual(2, execute_values.call_count)
+        self.assertEqual('INSERT INTO "items" ("id") VALUES %s', execute_values.call_args[0][1])
+        self.assertEqual({"page_size": 1}, execute_values.call_args[1])
+
+    def test_arrays_in_both_methods(self):
+        records = [(1, [1, 2, None]), (2, ["a b", 'q"\\', "{x,y}", "NULL", "tab\there"]), (3, [[1, 2], [3, 4]])]
+        PsqlLoader(self.pool, "items", columns=["id", "tags"]).load(records)
+        with patch("psycopg2.extras.execute_values") as execute_values:
+            PsqlLoader(self.pool, "items", columns=["id", "tags"], method=PsqlLoader.VALUES).load(records)
+        # psycopg2 sends lists as ARRAY, COPY must give the same arrays
+        values = execute_values.call_args[0][2]
+        self.assertEqual([as_text(row[1]) for row in values], [parse_copy_array(row[1]) for row in self.table])
+        self.assertEqual("NULL", parse_copy_array(self.table[1][1])[3])
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(PsqlLoaderError):
+            PsqlLoader(self.pool, "items", method="insert")
+        with self.assertRaises(PsqlLoaderError):
+            PsqlLoader(self.pool, "items", workers=0)
@@ -0,0 +1,155 @@
+import io
+from psycopg2.extensions import encodings
+from unittest import TestCase
+from oc_connections.ConnectionPool import ConnectionPool
+from oc_connections.PsqlStream import PsqlStream, PsqlStreamError
+
+
+class MockCursor(object):
+    def __init__(self, connection, name=None):
+        self.connection = connection
+        self.name = name
+        self.itersize = 2000
+        self.rows = []
+        self.rowcount = -1
+
+    def execute(self, query, params=None):
+        self.connection.queries.append((self.name, query, params))
+        self.rows = list(self.connection.table)
+
+    def __iter__(self):
+        while self.rows:
+            self.connection.fetches.append(min(self.itersize, len(self.rows)))
+            batch, self.rows = self.rows[:self.itersize], self.rows[self.itersize:]
+            for row in batch:
+                yield row
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def mogrify(self, query, params):
+        return (query % tuple("'%s'" % param for param in params)).encode(encodings[self.connection.encoding])
+
+    def copy_expert(self, sql, stream):
+        self.connection.queries.append((None, sql, None))
+        if " TO STDOUT " in sql:
+            for row in self.connection.table:
+                stream.write("%s,%s\n" % row)
+            self.rowcount = len(self.connection.table)
+        else:
+            lines = stream.read().splitlines()
+            self.connection.table.extend(tuple(line.split(",")) for line in lines)
+            self.rowcount = len(lines)
+
+    def close(self):
+        if self.connection.broken:
+            raise Exception("connection already closed")
+        self.connection.open_cursors -= 1
+
+
+class MockConnection(object):
+    def __init__(self, table):
+        self.table = table
+        self.queries = []
+        self.fetches = []
+        self.open_cursors = 0
+        self.commits = 0
+        self.broken = False
+        self.closed = 0
+        self.encoding = "UTF8"
+
+    def cursor(self, name=None):
+        self.open_cursors += 1
+        return MockCursor(self, name)
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class PsqlStreamTestSuite(TestCase):
+
+    def setUp(self):
+        self.table = [(number, "row%d" % number) for number in range(10)]
+        self.connections = []
+
+        def factory():
+            connection = MockConnection(self.table)
+            self.connections.append(connection)
+            return connection
+
+        self.pool = ConnectionPool(factory, max_size=1)
+        self.stream = PsqlStream(self.pool, itersize=4)
+
+    def test_rows(self):
+        rows = self.stream.rows("SELECT * FROM t WHERE id > %s", (0,))
+        self.assertEqual(self.table, list(rows))
+        connection = self.connections[0]
+        # named cursor fetches rows by itersize
+        self.assertTrue(connection.queries[0][0].startswith("oc_stream_"))
+        self.assertEqual((0,), connection.queries[0][2])
+        self.assertEqual([4, 4, 2], connection.fetches)
+        self.assertEqual(0, connection.open_cursors)
+        self.assertEqual((1, 1, 0), (self.pool.size, self.pool.idle, self.pool.in_use))
+
+    def test_rows_closed_early(self):
+        rows = self.stream.rows("SELECT * FROM t", itersize=3)
+        self.assertEqual(self.table[0], next(rows))
+        self.assertEqual(1, self.pool.in_use)
+        rows.close()
+        self.assertEqual([3], self.connections[0].fetches)
+        self.assertEqual(0, self.pool.in_use)
+
+    def test_broken_connection_is_discarded(self):
+        rows = self.stream.rows("SELECT * FROM t")
+        next(rows)
+        self.connections[0].broken = True
+        rows.close()
+        self.assertTrue(self.connections[0].closed)
+        self.assertEqual(0, self.pool.size)
+
+    def test_batches(self):
+        batches = list(self.stream.batches("SELECT * FROM t", size=3))
+        self.assertEqual([3, 3, 3, 1], [len(batch) for batch in batches])
+        self.assertEqual(self.table, [row for batch in batches for row in batch])
+
+    def test_copy_to(self):
+        output = io.StringIO()
+        self.assertEqual(10, self.stream.copy_to(output, "SELECT * FROM t WHERE name = %s", ("x",), header=True))
+        self.assertEqual("0,row0", output.getvalue().splitlines()[0])
+        self.assertEqual("COPY (SELECT * FROM t WHERE name = 'x') TO STDOUT WITH (FORMAT csv, HEADER true)",
+                         self.connections[0].queries[-1][1])
+        # connection encoding is PostgreSQL name, it is not always known to Python
+        self.connections[0].encoding = "WIN1251"
+        self.stream.copy_to(io.StringIO(), "SELECT * FROM t WHERE name = %s", ("\u0438\u043c\u044f",))
+        self.assertEqual("COPY (SELECT * FROM t WHERE name = '\u0438\u043c\u044f') TO STDOUT WITH (FORMAT csv)",
+                         self.connections[0].queries[-1][1])
+        self.stream.copy_to(io.StringIO(), table="public.t", format="text")
+        self.assertEqual('COPY "public"."t" TO STDOUT WITH (FORMAT text)', self.connections[0].queries[-1][1])
+        # query without spaces is not taken for table name
+        self.stream.copy_to(io.StringIO(), "TABLE\tt")
+        self.assertEqual("COPY (TABLE\tt) TO STDOUT WITH (FORMAT csv)", self.connections[0].queries[-1][1])
+
+    def test_copy_from(self):
+        self.assertEqual(2, self.stream.copy_from(io.StringIO("10,a\n11,b\n"), "t", columns=["id", "name"]))
+        connection = self.connections[0]
+        self.assertEqual('COPY "t" ("id", "name") FROM STDIN WITH (FORMAT csv)', connection.queries[-1][1])
+        self.assertEqual(1, connection.commits)
+        self.assertEqual(("11", "b"), self.table[-1])
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(PsqlStreamError):
+            PsqlStream(self.pool, itersize=0)
+        with self.assertRaises(PsqlStreamError):
+            self.stream.copy_to(io.StringIO(), table="t", format="xml")
+        with self.assertRaises(PsqlStreamError):
+            self.stream.copy_to(io.StringIO(), "SELECT 1", table="t")
+        with self.assertRaises(PsqlStreamError):
+            self.stream.copy_to(io.StringIO())
+        with self.assertRaises(PsqlStreamError):
+            self.stream.copy_to(io.StringIO(), params=("x",), table="t")
+        with self.assertRaises(PsqlStreamError):
+            self.stream.copy_from(io.BytesIO(), "t", format="binary", header=True)
@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from smb.base import NotConnectedError
+from smb.smb_structs import OperationFailure
+from oc_connections.ConnectionPool import ConnectionPool
+from oc_connections.SmbFileClient import SmbFileClient, SmbFileClientError
+
+
+class MockSharedFile(object):
+    def __init__(self, filename, file_size=0):
+        self.filename = filename
+        self.file_size = file_size
+
+
+class MockSMBSession(object):
+    def __init__(self, files, broken=False):
+        self.files = files
+        self.broken = broken
+        self.reads = []
+        self.closed = False
+
+    def __check(self, share, path):
+        if self.broken:
+            raise NotConnectedError("Not connected to server")
+        if share != "share":
+            raise OperationFailure("Unable to connect to shared device", [])
+
+    def listPath(self, share, path, **kwargs):
+        self.__check(share, path)
+        prefix = path + "/" if path else ""
+        return [MockSharedFile("."), MockSharedFile("..")] + [
+            MockSharedFile(name[len(prefix):]) for name in sorted(self.files) if name.startswith(prefix)]
+
+    def getAttributes(self, share, path, **kwargs):
+        self.__check(share, path)
+        if path not in self.files:
+            raise OperationFailure("Unable to open file", [])
+        return MockSharedFile(path.rsplit("/", 1)[-1], len(self.files[path]))
+
+    def retrieveFileFromOffset(self, share, path, file_obj, offset=0, max_length=-1, **kwargs):
+        self.__check(share, path)
+        data = self.files[path][offset:] if max_length < 0 else self.files[path][offset:offset + max_length]
+        self.reads.append(len(data))
+        file_obj.write(data)
+        return 0, len(data)
+
+    def storeFileFromOffset(self, share, path, file_obj, offset=0, truncate=False, **kwargs):
+        self.__check(share, path)
+        data = b""
+        while True:
+            block = file_obj.read(4)
+            if not block:
+                break
+            data += block
+        current = (b"" if truncate else self.files.get(path, b"")).ljust(offset, b"\0")
+        self.files[path] = current[:offset] + data + current[offset + len(data):]
+        return offset + len(data)
+
+    def close(self):
+        self.closed = True
+
+
+class SmbFileClientTestSuite(TestCase):
+
+    def setUp(self):
+        self.files = {"dir/big.bin": bytes(bytearray(range(256))) * 40, "dir/small.txt": b"hello"}
+        self.sessions = []
+        self.lock = threading.Lock()
+        self.broken = 0
+        self.pool = ConnectionPool(self.factory, max_size=4)
+        self.client = SmbFileClient(self.pool, "share", "/dir/", chunk_size=1000)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def factory(self):
+        with self.lock:
+            session = MockSMBSession(self.files, broken=self.broken > 0)
+            self.broken -= 1
+            self.sessions.append(session)
+        return session
+
+    def test_listdir_and_getsize(self):
+        self.assertEqual(["big.bin", "small.txt"], self.client.listdir())
+        self.assertEqual(10240, self.client.getsize("big.bin"))
+        with self.assertRaises(OperationFailure):
+            self.client.getsize("missing")
+        self.assertEqual(self.pool.size, self.pool.idle)
+
+    def test_read_chunks(self):
+        chunks = list(self.client.read_chunks("big.bin"))
+        self.assertEqual([1000] * 10 + [240], [len(chunk) for chunk in chunks])
+        self.assertEqual(self.files["dir/big.bin"], b"".join(chunks))
+        self.assertEqual(b"ell", b"".join(self.client.read_chunks("small.txt", 1, 3)))
+        self.assertEqual(0, self.pool.in_use)
+
+    def test_parallel_download(self):
+        local = os.path.join(self.directory, "sub", "big.bin")
+        received = []
+        result = self.client.download("big.bin", local, sessions=3,
+                                      callback=lambda path, offset, chunk: received.append(offset))
+        self.assertTrue(result.success, result.error)
+        with open(local, "rb") as stream:
+            self.assertEqual(self.files["dir/big.bin"], stream.read())
+        self.assertEqual(10240, result.bytes)
+        self.assertEqual(list(range(0, 10240, 1000)), sorted(received))
+        self.assertLessEqual(len(self.sessions), 3)
+        self.assertTrue(all(read <= 1000 for session in self.sessions for read in session.reads))
+
+    def test_broken_session_is_replaced(self):
+        self.broken = 1
+        local = os.path.join(self.directory, "small.txt")
+        result = self.client.download("small.txt", local, sessions=1)
+        self.assertTrue(result.success, result.error)
+        self.assertTrue(self.sessions[0].closed)
+        self.assertEqual(2, len(self.sessions))
+
+    def test_download_error(self):
+        result = self.client.download("missing", os.path.join(self.directory, "missing"))
+        self.assertIsInstance(result.error, OperationFailure)
+        self.assertEqual(0, self.pool.in_use)
+
+    def test_upload_and_write_chunks(self):
+        local = os.path.join(self.directory, "upload.txt")
+        with open(local, "wb") as stream:
+            stream.write(b"uploaded data")
+        result = self.client.upload(local, "upload.txt")
+        self.assertTrue(result.success, result.error)
+        self.assertEqual(13, result.bytes)
+        self.assertEqual(b"uploaded data", self.files["dir/upload.txt"])
+        self.assertEqual(6, self.client.write_chunks("chunks.txt", [b"abc", b"def"]))
+        self.assertEqual(b"abcdef", self.files["dir/chunks.txt"])
+        self.client.write_chunks("chunks.txt", [b"XY"], offset=2)
+        self.assertEqual(b"abXYef", self.files["dir/chunks.txt"])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(SmbFileClientError):
+            SmbFileClient(self.pool, "share", chunk_size=0)
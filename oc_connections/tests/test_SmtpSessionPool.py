@@ -0,0 +1,110 @@
+import threading
+from email.message import EmailMessage
+from smtplib import SMTPServerDisconnected, SMTPRecipientsRefused
+from unittest import TestCase
+from oc_connections.SmtpSessionPool import SmtpSessionPool
+
+
+class MockSMTPSession(object):
+    def __init__(self, fail_after=None):
+        self.sent = []
+        self.alive = True
+        self.quit_called = False
+        self.fail_after = fail_after
+
+    def noop(self):
+        if not self.alive:
+            raise SMTPServerDisconnected("Connection unexpectedly closed")
+        return 250, b"OK"
+
+    def send_message(self, message, from_addr=None, to_addrs=None):
+        if self.fail_after is not None and len(self.sent) >= self.fail_after:
+            self.alive = False
+        if not self.alive:
+            raise SMTPServerDisconnected("Connection unexpectedly closed")
+        if message["To"] == "nobody@example.com":
+            raise SMTPRecipientsRefused({"nobody@example.com": (550, b"No such user")})
+        self.sent.append(message)
+        return {}
+
+    def quit(self):
+        self.quit_called = True
+
+    def close(self):
+        pass
+
+
+def make_message(number, to="somebody@example.com"):
+    message = EmailMessage()
+    message["From"] = "robot@example.com"
+    message["To"] = to
+    message["Subject"] = "Message %d" % number
+    message.set_content("Body %d" % number)
+    return message
+
+
+class SmtpSessionPoolTestSuite(TestCase):
+
+    def setUp(self):
+        self.sessions = []
+        self.lock = threading.Lock()
+        self.fail_after = None
+
+    def factory(self):
+        session = MockSMTPSession(self.fail_after)
+        with self.lock:
+            self.sessions.append(session)
+        return session
+
+    def test_send_reuses_session(self):
+        pool = SmtpSessionPool(self.factory)
+        self.assertEqual({}, pool.send(make_message(1)))
+        self.assertEqual({}, pool.send(make_message(2)))
+        self.assertEqual(1, len(self.sessions))
+        self.assertEqual(2, len(self.sessions[0].sent))
+
+    def test_dead_session_replaced_on_checkout(self):
+        pool = SmtpSessionPool(self.factory)
+        pool.send(make_message(1))
+        self.sessions[0].alive = False
+        pool.send(make_message(2))
+        self.assertEqual(2, len(self.sessions))
+        self.assertTrue(self.sessions[0].quit_called)
+        self.assertEqual(1, len(self.sessions[1].sent))
+
+    def test_reconnect_on_disconnect_while_sending(self):
+        self.fail_after = 1
+        pool = SmtpSessionPool(self.factory)
+        # NOOP passes, but server drops connection on the second message
+        pool.send(make_message(1))
+        pool.send(make_message(2))
+        self.assertEqual(2, len(self.sessions))
+        self.assertEqual(1, pool.size)
+
+    def test_send_error(self):
+        pool = SmtpSessionPool(self.factory)
+        with self.assertRaises(SMTPRecipientsRefused):
+            pool.send(make_message(1, to="nobody@example.com"))
+        # session remains usable
+        self.assertEqual(1, pool.idle)
+
+    def test_send_many(self):
+        pool = SmtpSessionPool(self.factory, max_size=3)
+        messages = [make_message(number) for number in range(20)]
+        messages[5] = (make_message(5, to="nobody@example.com"), None, None)
+        results = pool.send_many(messages)
+        self.assertEqual(20, len(results))
+        self.assertEqual([True] * 5 + [False] + [True] * 14, [result.success for result in results])
+        self.assertIsInstance(results[5].error, SMTPRecipientsRefused)
+        self.assertIs(messages[7], results[7].message)
+        self.assertLessEqual(len(self.sessions), 3)
+        self.assertEqual(19, sum(len(session.sent) for session in self.sessions))
+        self.assertEqual(0, pool.in_use)
+
+    def test_send_many_with_disconnects(self):
+        self.fail_after = 2
+        pool = SmtpSessionPool(self.factory, max_size=2)
+        results = pool.send_many([make_message(number) for number in range(10)], sessions=2)
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(10, sum(len(session.sent) for session in self.sessions))
+        self.assertEqual([], pool.send_many([]))
@@ -0,0 +1,77 @@
+import threading
+import time
+from unittest import TestCase
+from oc_connections.SvnClientPool import SvnClientPool
+from oc_connections.SvnBatch import SvnBatch, SvnBatchError
+
+
+class MockSvnFs(object):
+    def __init__(self):
+        self.calls = 0
+
+    def listdir(self, path):
+        self.calls += 1
+        if path == "missing":
+            raise KeyError(path)
+        if path == "slow":
+            time.sleep(0.2)
+        return [path + "/trunk"]
+
+    def readbytes(self, path):
+        return path.encode("utf-8")
+
+    def getinfo(self, path, namespaces=None):
+        return {"path": path, "namespaces": namespaces}
+
+
+class SvnBatchTestSuite(TestCase):
+
+    def setUp(self):
+        self.created = []
+        self.lock = threading.Lock()
+        self.pool = SvnClientPool(self.factory, max_size=4, thread_affinity=True)
+
+    def factory(self):
+        fs = MockSvnFs()
+        with self.lock:
+            self.created.append(fs)
+        return fs
+
+    def test_listdir(self):
+        paths = ["module%d" % number for number in range(20)]
+        results = list(SvnBatch(self.pool).listdir(paths))
+        self.assertEqual(sorted(paths), sorted(result.path for result in results))
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(["module3/trunk"], [result.value for result in results if result.path == "module3"][0])
+        self.assertLessEqual(len(self.created), 4)
+        self.assertEqual(20, sum(fs.calls for fs in self.created))
+
+    def test_completion_order(self):
+        results = list(SvnBatch(self.pool, workers=2).listdir(["slow", "fast"]))
+        self.assertEqual(["fast", "slow"], [result.path for result in results])
+
+    def test_errors_are_reported(self):
+        results = dict((result.path, result) for result in SvnBatch(self.pool).listdir(["missing", "doc"]))
+        self.assertIsInstance(results["missing"].error, KeyError)
+        self.assertTrue(results["doc"].success)
+        self.assertEqual(len(self.created), self.pool.idle)
+
+    def test_info_and_cat(self):
+        batch = SvnBatch(self.pool, workers=2)
+        self.assertEqual([b"README"], [result.value for result in batch.cat(["README"])])
+        info = list(batch.info(["README"]))[0].value
+        self.assertEqual(["details"], info["namespaces"])
+        custom = list(batch.run(lambda fs, path, suffix: path + suffix, ["a"], "/b"))
+        self.assertEqual("a/b", custom[0].value)
+
+    def test_early_stop(self):
+        batch = SvnBatch(self.pool, workers=2)
+        results = batch.listdir("module%d" % number for number in range(1000))
+        next(results)
+        results.close()
+        time.sleep(0.3)
+        self.assertLess(sum(fs.calls for fs in self.created), 1000)
+
+    def test_invalid_workers(self):
+        with self.assertRaises(SvnBatchError):
+            SvnBatch(self.pool, workers=-1)
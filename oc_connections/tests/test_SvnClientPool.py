@@ -0,0 +1,117 @@
+import threading
+from unittest import TestCase
+from oc_connections.SvnClientPool import SvnClientPool, _is_svn_auth_error, _svn_fs_client
+
+
+class MockClientError(Exception):
+    pass
+
+
+class MockLogin(object):
+    def __init__(self):
+        self.resets = 0
+
+    def reset(self):
+        self.resets += 1
+
+
+class MockSvnClient(object):
+    def __init__(self, password):
+        self.password = password
+        self.callback_get_login = MockLogin()
+        self.closed = False
+
+    def ls(self, url):
+        if self.password != "password":
+            raise MockClientError("Unable to connect to a repository at URL '%s'" % url,
+                                  [("Authentication failed", 215004)])
+        return [url + "/trunk"]
+
+
+class MockSvnFs(object):
+    def __init__(self, client):
+        self.svn = client
+        self.closed = False
+
+    def delegate_fs(self):
+        return self
+
+    def close(self):
+        self.closed = True
+
+
+class SvnClientPoolTestSuite(TestCase):
+
+    def setUp(self):
+        self.password = "password"
+        self.created = []
+        self.lock = threading.Lock()
+
+    def factory(self):
+        client = MockSvnClient(self.password)
+        with self.lock:
+            self.created.append(client)
+        return client
+
+    def test_client_reused_with_login_reset(self):
+        pool = SvnClientPool(self.factory, max_size=2)
+        with pool.connection() as first:
+            self.assertEqual(["svn://repo/trunk"], first.ls("svn://repo"))
+        with pool.connection() as second:
+            self.assertIs(first, second)
+        self.assertEqual(1, len(self.created))
+        self.assertEqual(2, first.callback_get_login.resets)
+
+    def test_clients_are_exclusive(self):
+        pool = SvnClientPool(self.factory, max_size=4)
+        barrier = threading.Barrier(4)
+        used = []
+
+        def use():
+            with pool.connection() as client:
+                barrier.wait(5)
+                used.append(client)
+
+        threads = [threading.Thread(target=use) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(4, len(set(id(client) for client in used)))
+        self.assertEqual(4, pool.idle)
+
+    def test_auth_failure_evicts_clients(self):
+        pool = SvnClientPool(self.factory, max_size=2)
+        with pool.connection() as first, pool.connection() as second:
+            pass
+        self.password = "old"
+        for client in self.created:
+            client.password = "old"
+        with self.assertRaises(MockClientError):
+            with pool.connection() as client:
+                client.ls("svn://repo")
+        self.assertEqual(0, pool.size)
+        self.password = "password"
+        with pool.connection() as client:
+            self.assertEqual(["svn://repo/trunk"], client.ls("svn://repo"))
+        self.assertEqual(3, len(self.created))
+
+    def test_other_errors_keep_client(self):
+        pool = SvnClientPool(self.factory)
+        with self.assertRaises(KeyError):
+            with pool.connection() as client:
+                raise KeyError("path")
+        self.assertEqual(1, pool.idle)
+
+    def test_svn_fs_objects(self):
+        pool = SvnClientPool(lambda: MockSvnFs(self.factory()), svn_client=_svn_fs_client)
+        with pool.connection() as fs:
+            pass
+        self.assertEqual(1, fs.svn.callback_get_login.resets)
+        pool.close()
+        self.assertTrue(fs.closed)
+
+    def test_is_auth_error(self):
+        self.assertTrue(_is_svn_auth_error(MockClientError("E", [("Not authorized", 170001)])))
+        self.assertTrue(_is_svn_auth_error(Exception("Authorization failed")))
+        self.assertFalse(_is_svn_auth_error(MockClientError("E", [("Path not found", 160013)])))
@@ -16,7 +16,7 @@ spec = {
       'pysmb'
     ],
     "package_data": {},
-    "python_requires": ">=3.6",
+    "python_requires": ">=3.7",
 }
 
 setup(**spec)